@@ -0,0 +1,243 @@
+"""Benchmark the cleaning and analysis functions on synthetic census data.
+
+Every function is timed (best of ``--repeat`` runs) and run once more under
+tracemalloc to record the peak memory it allocates on top of its inputs. The results
+are compared with the saved baselines; ``--save`` stores them as new baselines.
+
+    $ python benchmarks/benchmark.py --rows 1e5 1e6
+    $ python benchmarks/benchmark.py --rows 1e5 1e6 --save
+
+The analysis functions run on individual data, not on the count cube used by the
+pipeline, so their costs scale with the number of persons. Scales beyond 1e7 rows
+need more memory than the eager functions can get on a workstation; use
+``--functions clean_raw_data_chunked`` there.
+
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from epp_final.analysis.bootstrap import bootstrap_bands
+from epp_final.analysis.predict import (
+    control_variables,
+    data_processing,
+    gen_plot_data,
+    gen_plot_data3,
+    gen_plot_data_control,
+    rural_urban_dataframe,
+    year_data_split,
+    year_data_split3,
+)
+from epp_final.config import SRC
+from epp_final.data_management.clean_data import (
+    CUBE_COLUMNS,
+    clean_count_cube,
+    clean_data_3did,
+    clean_data_with_control,
+    clean_fig1_data,
+    clean_fig2_data,
+    clean_raw_data,
+    clean_raw_data_chunked,
+)
+from epp_final.data_management.synthetic import (
+    PERSONS_PER_HOUSEHOLD,
+    write_synthetic_census,
+)
+from epp_final.utilities import read_yaml
+
+BASELINES = Path(__file__).parent / "baselines.json"
+# Slowdown relative to the baseline reported as a regression.
+TOLERANCE = 1.25
+
+
+def benchmark_cases(raw_path, data_info):
+    """Functions to benchmark with functions creating their arguments.
+
+    Arguments are created before every run, so that functions which mutate their
+    inputs get fresh copies and the copies are not part of the measurements. Inputs
+    are only loaded once a function needs them.
+
+    Args:
+        raw_path (pathlib.Path): synthetic raw data stored as csv file.
+        data_info (dict): information on the raw data, see ``data_info1990.yaml``.
+
+    Returns:
+        dict: (function, argument factory) by name.
+
+    """
+
+    @functools.cache
+    def raw():
+        return pd.read_csv(raw_path)
+
+    @functools.cache
+    def data1990():
+        return clean_raw_data(raw(), data_info)
+
+    @functools.cache
+    def children():
+        return data_processing(data1990().copy())
+
+    @functools.cache
+    def sample2():
+        return clean_data_with_control(data1990())
+
+    @functools.cache
+    def triple_did():
+        return clean_data_3did(data1990())
+
+    chunked = (raw_path, data_info, raw_path.with_name("data1990.csv"))
+    return {
+        "clean_raw_data": (clean_raw_data, lambda: (raw(), data_info)),
+        "clean_raw_data_chunked": (clean_raw_data_chunked, lambda: chunked),
+        "clean_count_cube": (clean_count_cube, lambda: (data1990()[CUBE_COLUMNS],)),
+        "clean_fig1_data": (clean_fig1_data, lambda: (data1990(),)),
+        "clean_fig2_data": (clean_fig2_data, lambda: (data1990(),)),
+        "clean_data_with_control": (clean_data_with_control, lambda: (data1990(),)),
+        "clean_data_3did": (clean_data_3did, lambda: (data1990(),)),
+        "data_processing": (data_processing, lambda: (data1990().copy(),)),
+        "year_data_split": (year_data_split, lambda: (children(),)),
+        "gen_plot_data": (gen_plot_data, lambda: (year_data_split(children()),)),
+        "rural_urban_dataframe": (
+            rural_urban_dataframe,
+            lambda: (year_data_split(children()),),
+        ),
+        "gen_plot_data_control": (
+            gen_plot_data_control,
+            lambda: (year_data_split(sample2()), control_variables(sample2())),
+        ),
+        "gen_plot_data3": (
+            gen_plot_data3,
+            lambda: (year_data_split3(triple_did()),),
+        ),
+        "bootstrap_bands": (bootstrap_bands, lambda: (data1990(), 99)),
+    }
+
+
+def measure(func, make_args, repeat):
+    """Measure the wall time and the peak memory of a function.
+
+    Args:
+        func (callable): function.
+        make_args (callable): returns the arguments of a run.
+        repeat (int): number of timed runs.
+
+    Returns:
+        dict: best wall time in seconds and peak traced memory in MiB.
+
+    """
+    times = []
+    for _ in range(repeat):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    args = make_args()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "peak_mib": peak / 2**20}
+
+
+def run(scales, functions=None, repeat=3, seed=0):
+    """Run the benchmarks at several scales.
+
+    Args:
+        scales (list): numbers of raw data rows.
+        functions (list, optional): names of the functions to run, default all.
+        repeat (int): number of timed runs per function.
+        seed (int): seed of the synthetic data.
+
+    Returns:
+        dict: results by scale and function name.
+
+    """
+    data_info = read_yaml(SRC / "data_management" / "data_info1990.yaml")
+    results = {}
+    for scale in scales:
+        n_households = int(scale / PERSONS_PER_HOUSEHOLD)
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_path = Path(tmp) / "raw_data.csv"
+            write_synthetic_census(raw_path, n_households, seed)
+            cases = benchmark_cases(raw_path, data_info)
+            results[f"{scale:.0e}"] = {
+                name: measure(func, make_args, repeat)
+                for name, (func, make_args) in cases.items()
+                if functions is None or name in functions
+            }
+    return results
+
+
+def compare(results, baselines):
+    """Format a table of the results relative to the baselines.
+
+    Args:
+        results (dict): results of ``run``.
+        baselines (dict): saved results.
+
+    Returns:
+        pd.DataFrame: seconds, peak MiB and ratios to the baselines.
+
+    """
+    rows = []
+    for scale, functions in results.items():
+        for name, result in functions.items():
+            base = baselines.get(scale, {}).get(name, {})
+            rows.append(
+                {
+                    "rows": scale,
+                    "function": name,
+                    **result,
+                    "time_ratio": result["seconds"] / base.get("seconds", np.nan),
+                    "memory_ratio": result["peak_mib"] / base.get("peak_mib", np.nan),
+                },
+            )
+    table = pd.DataFrame(rows)
+    table["regression"] = table["time_ratio"] > TOLERANCE
+    return table
+
+
+def main():
+    """Time the functions and compare them with the baselines."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, nargs="+", default=[1e5, 1e6])
+    parser.add_argument("--functions", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baselines", type=Path, default=BASELINES)
+    parser.add_argument("--save", action="store_true", help="store as baselines")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.functions, args.repeat)
+    baselines = {}
+    if args.baselines.exists():
+        baselines = json.loads(args.baselines.read_text())["results"]
+    with pd.option_context("display.width", 120, "display.max_rows", None):
+        table = compare(results, baselines).round(3)
+        print(table.to_string(index=False))  # noqa: T201
+    if args.save:
+        stored = {
+            "machine": f"{platform.machine()} {platform.processor()}".strip(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "results": {
+                scale: {**baselines.get(scale, {}), **functions}
+                for scale, functions in {**baselines, **results}.items()
+            },
+        }
+        args.baselines.write_text(json.dumps(stored, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Load test of the query server on synthetic census data.
+
+The server is started in this process on the count cube and Sample 2 data of a
+synthetic census, unless ``--url`` points to a running server. Every client sends
+random queries (model, region, nation, controls and windows) one after another; the
+throughput and the latency percentiles of all requests are printed.
+
+    $ python benchmarks/load_test.py --rows 1e6 --clients 8 --requests 2000
+    $ python benchmarks/load_test.py --url http://127.0.0.1:8000
+
+"""
+import argparse
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import numpy as np
+
+from epp_final.config import SRC
+from epp_final.data_management.clean_data import (
+    CUBE_COLUMNS,
+    clean_count_cube,
+    clean_data_with_control,
+    clean_raw_data,
+)
+from epp_final.data_management.synthetic import (
+    PERSONS_PER_HOUSEHOLD,
+    synthetic_census,
+)
+from epp_final.server import EffectStatistics, make_server
+from epp_final.utilities import read_yaml
+
+# Share of the queries of the two-child (triple did) model.
+TRIPLE_DID_SHARE = 0.3
+
+
+def random_queries(n_queries, seed=0):
+    """Draw query strings of ``/effects``.
+
+    Args:
+        n_queries (int): number of queries.
+        seed (int): seed of the random number generator.
+
+    Returns:
+        list: query strings.
+
+    """
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(n_queries):
+        params = {
+            "region": rng.choice(["all", "rural", "urban"]),
+            "nation": rng.choice(["all", "all", "han"]),
+        }
+        if rng.random() < TRIPLE_DID_SHARE:
+            params["model"] = "triple_did"
+            params["years"] = int(rng.integers(1985, 1991))
+        else:
+            first = int(rng.integers(1973, 1978))
+            params["compare"] = f"{first}-1979"
+            params["years"] = f"1980-{rng.integers(1980, 1991)}"
+            params["controls"] = rng.choice(["none", "education"])
+        queries.append(urlencode(params))
+    return queries
+
+
+def start_server(rows, seed=0):
+    """Start a server on synthetic data in a background thread.
+
+    Args:
+        rows (float): number of persons of the synthetic census.
+        seed (int): seed of the synthetic data.
+
+    Returns:
+        tuple: the server and the seconds needed to build its statistics.
+
+    """
+    data_info = read_yaml(SRC / "data_management" / "data_info1990.yaml")
+    census = synthetic_census(int(rows / PERSONS_PER_HOUSEHOLD), seed)
+    data1990 = clean_raw_data(census, data_info)
+    start = time.perf_counter()
+    statistics = EffectStatistics(
+        clean_count_cube(data1990[CUBE_COLUMNS]),
+        clean_data_with_control(data1990),
+    )
+    seconds = time.perf_counter() - start
+    server = make_server(statistics, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, seconds
+
+
+def run(url, queries, clients):
+    """Send queries from concurrent clients.
+
+    Args:
+        url (str): address of the server.
+        queries (list): query strings.
+        clients (int): number of concurrent clients.
+
+    Returns:
+        tuple: latencies in seconds (np.ndarray) and the total wall time.
+
+    """
+
+    def request(query):
+        start = time.perf_counter()
+        # The url is the http address of the server under test.
+        with urllib.request.urlopen(f"{url}/effects?{query}") as response:  # noqa: S310
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = np.array(list(executor.map(request, queries)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    """Run the load test and print the throughput and latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, default=1e6)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--url", help="address of a running server")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, seconds = start_server(args.rows)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        info = f"Statistics of {args.rows:.0e} persons built in {seconds:.2f}s"
+        print(info)  # noqa: T201
+    queries = random_queries(args.requests)
+    # Warm up the cached cross products, as a long running server would have them.
+    run(url, queries[:100], args.clients)
+    latencies, seconds = run(url, queries, args.clients)
+    p50, p95, p99 = np.quantile(latencies, [0.5, 0.95, 0.99]) * 1000
+    print(  # noqa: T201
+        f"{len(queries)} requests from {args.clients} clients in {seconds:.2f}s: "
+        f"{len(queries) / seconds:.0f} requests/s, latency p50 {p50:.1f}ms, "
+        f"p95 {p95:.1f}ms, p99 {p99:.1f}ms",
+    )
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
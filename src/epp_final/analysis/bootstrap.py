@@ -0,0 +1,219 @@
+"""Household bootstrap of the regressions by birth year."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from epp_final.analysis.design import design_matrix, factor_columns
+from epp_final.analysis.predict import (
+    _PESR,
+    _PESR3,
+    TRIPLE_DID_TERMS,
+    _solve_ols,
+    data_processing,
+)
+from epp_final.data_management.clean_data import clean_data_3did
+from epp_final.data_management.households import HouseholdIndex
+
+
+def bootstrap_coefficients(
+    data,
+    X_variables,
+    years,
+    compare,
+    n_draws=999,
+    seed=0,
+    n_jobs=1,
+    region=None,
+):
+    """Bootstrap the coefficients of all year windows by resampling households.
+
+    Individuals are collapsed into cells of identical birth year, sex and factors
+    of the X variables within each household. Drawing households with replacement
+    then only changes the frequency weights of the cells, so every replicate is a
+    weighted solve of the stacked normal equations instead of a refit on resampled
+    data.
+    Every replicate gets its own seed spawned from ``seed``, so the draws do not
+    depend on ``n_jobs``.
+
+    Args:
+        data (pd.DataFrame): individuals with SERIAL, CN1990A_BIRTHY, CN1990A_SEX
+            and the X variables.
+        X_variables (list): X variables used, see ``design_matrix``.
+        years (range): treated birth years, one window each.
+        compare (range): birth years of the comparison cohort.
+        n_draws (int): number of bootstrap replicates.
+        seed (int): seed of the random number generator.
+        n_jobs (int): number of processes, -1 uses all cores.
+        region (int, optional): only use observations with this CN1990A_HHTYA.
+
+    Returns:
+        np.ndarray: coefficients (intercept first) of shape (n_draws, len(years), k).
+
+    """
+    keep = data["CN1990A_BIRTHY"].isin([*compare, *years])
+    if region is not None:
+        keep &= data["CN1990A_HHTYA"] == region
+    cell_keys = factor_columns(["CN1990A_BIRTHY", "CN1990A_SEX", *X_variables])
+    data = data.loc[keep, ["SERIAL", *cell_keys]]
+    household = HouseholdIndex.from_serial(data["SERIAL"]).household
+    pairs = data.assign(SERIAL=household).groupby(["SERIAL", *cell_keys]).size()
+    pairs = pairs.reset_index(name="count")
+    cells = pairs.groupby(cell_keys)
+    cell = cells.ngroup().to_numpy()
+    cells = cells.size().index.to_frame(index=False)
+
+    X = design_matrix(cells, X_variables).astype(float)
+    X = np.column_stack([np.ones(X.shape[0]), X])
+    Y = cells["CN1990A_SEX"].to_numpy(dtype=float)
+    birth = cells["CN1990A_BIRTHY"].to_numpy()
+    windows = np.column_stack([(birth == i) | np.isin(birth, compare) for i in years])
+
+    seeds = np.random.SeedSequence(seed).spawn(n_draws)
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    # More processes than replicates would get empty chunks.
+    n_jobs = max(min(n_jobs, n_draws), 1)
+    chunks = np.array_split(np.arange(n_draws), n_jobs)
+    args = {
+        "household": pairs["SERIAL"].to_numpy(),
+        "count": pairs["count"].to_numpy(dtype=float),
+        "cell": cell,
+        "XX": X[:, :, None] * X[:, None, :],
+        "XY": X * Y[:, None],
+        "windows": windows.astype(float),
+    }
+    if n_jobs == 1:
+        return _bootstrap_draws(seeds, **args)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(_bootstrap_draws, [seeds[i] for i in chunk], **args)
+            for chunk in chunks
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+
+def _bootstrap_draws(seeds, household, count, cell, XX, XY, windows):
+    """Solve the window regressions for a batch of bootstrap replicates.
+
+    Args:
+        seeds (list): np.random.SeedSequence, one per replicate.
+        household (np.ndarray): household of every (household, cell) pair.
+        count (np.ndarray): number of individuals of every pair.
+        cell (np.ndarray): cell of every pair.
+        XX (np.ndarray): x x' of every cell.
+        XY (np.ndarray): x y of every cell.
+        windows (np.ndarray): cells (rows) used in each window (columns).
+
+    Returns:
+        np.ndarray: coefficients of shape (len(seeds), n_windows, k).
+
+    """
+    n_households = household.max() + 1
+    weights = np.empty((len(seeds), XX.shape[0]))
+    for r, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        draws = np.bincount(
+            rng.integers(n_households, size=n_households),
+            minlength=n_households,
+        )
+        weights[r] = np.bincount(
+            cell,
+            weights=draws[household] * count,
+            minlength=XX.shape[0],
+        )
+    XtX = np.einsum("rc,cw,ckl->rwkl", weights, windows, XX, optimize=True)
+    XtY = np.einsum("rc,cw,ck->rwk", weights, windows, XY, optimize=True)
+    return _solve_ols(XtX, XtY)
+
+
+def bootstrap_bands(data, n_draws=999, seed=0, n_jobs=1, level=0.95):
+    """Bootstrap confidence bands for the alpha 3, PESR, alpha 7 and PESR3 figures.
+
+    Args:
+        data (pd.DataFrame): 1990 data with SERIAL.
+        n_draws (int): number of bootstrap replicates.
+        seed (int): seed of the random number generator.
+        n_jobs (int): number of processes, -1 uses all cores.
+        level (float): coverage of the percentile intervals.
+
+    Returns:
+        pd.DataFrame: lower and upper bounds by figure, year (x) and region, and
+            the number of replicates without a finite estimate ("dropped").
+
+    """
+    options = {"n_draws": n_draws, "seed": seed, "n_jobs": n_jobs}
+    X_variables = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+    children = data_processing(data.copy())
+    bands = []
+    for region, name in [(None, "All"), (1, "Rural"), (0, "Urban")]:
+        coef = bootstrap_coefficients(
+            children,
+            X_variables,
+            range(980, 991),
+            range(973, 980),
+            region=region,
+            **options,
+        )
+        suffix = "_regional" if region is not None else ""
+        # Replicates with a0 = 1 in a small cell have no finite PESR.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pesr = _PESR(*coef.T).T
+        bands += [
+            _percentile_band(coef[..., 3], f"A3{suffix}", 1980, name, level),
+            _percentile_band(pesr, f"PESR{suffix}", 1980, name, level),
+        ]
+    coef3 = bootstrap_coefficients(
+        clean_data_3did(data),
+        TRIPLE_DID_TERMS,
+        range(985, 991),
+        range(980, 985),
+        **options,
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pesr3 = _PESR3(*coef3.T).T
+    bands += [
+        _percentile_band(coef3[..., 7], "A7", 1985, "All", level),
+        _percentile_band(pesr3, "PESR_twochild", 1985, "All", level),
+    ]
+    return pd.concat(bands, ignore_index=True)
+
+
+def _percentile_band(draws, figure, first_year, region, level):
+    """Percentile interval of bootstrap draws by year.
+
+    Draws which are not finite, e.g. a PESR dividing by zero, are dropped and
+    counted. The interval of a year without finite draws is undefined.
+
+    Args:
+        draws (np.ndarray): draws of shape (n_draws, n_years).
+        figure (str): name of the figure.
+        first_year (int): first birth year.
+        region (str): region label, "All" for the whole country.
+        level (float): coverage of the interval.
+
+    Returns:
+        pd.DataFrame: figure, x, region, lower, upper and the number of dropped
+            draws.
+
+    """
+    finite = np.isfinite(draws)
+    lower, upper = np.full((2, draws.shape[1]), np.nan)
+    kept = finite.any(axis=0)
+    if kept.any():
+        lower[kept], upper[kept] = np.nanquantile(
+            np.where(finite, draws, np.nan)[:, kept],
+            [(1 - level) / 2, (1 + level) / 2],
+            axis=0,
+        )
+    return pd.DataFrame(
+        {
+            "figure": figure,
+            "x": range(first_year, first_year + draws.shape[1]),
+            "region": region,
+            "lower": lower,
+            "upper": upper,
+            "dropped": (~finite).sum(axis=0),
+        },
+    )
@@ -0,0 +1,87 @@
+"""Regressors built from formulas, with interactions computed when they are used.
+
+A term is a column of the data or a product of factors joined by "*", e.g. "H*K*T".
+Factors are columns or the short names in ``FACTORS``. Interactions are not stored
+with the data; they are computed for the rows of the regression at hand, e.g. one
+window of birth years, in the dtype of their factors.
+
+"""
+
+import functools
+import itertools
+
+import numpy as np
+
+# Short names of the factors of the difference-in-differences models.
+FACTORS = {"H": "CN1990A_NATION", "K": "CN1990A_HHTYA", "T": "Treat"}
+
+
+def expand_formula(formula):
+    """Terms of a full factorial formula.
+
+    Args:
+        formula (str): factors joined by "*", e.g. "H*T*K".
+
+    Returns:
+        list: main effects, then the interactions by order, e.g. "H", "T", "K",
+            "H*T", "H*K", "T*K" and "H*T*K".
+
+    """
+    factors = [factor.strip() for factor in formula.split("*")]
+    return [
+        "*".join(term)
+        for order in range(1, len(factors) + 1)
+        for term in itertools.combinations(factors, order)
+    ]
+
+
+def term_factors(term):
+    """Columns of the factors of a term.
+
+    Args:
+        term (str): column or factors joined by "*".
+
+    Returns:
+        list: column names.
+
+    """
+    return [FACTORS.get(factor, factor) for factor in term.split("*")]
+
+
+def factor_columns(terms):
+    """Columns needed to build terms.
+
+    Args:
+        terms (list): terms, see ``term_factors``.
+
+    Returns:
+        list: column names without duplicates, in the order of the terms.
+
+    """
+    return list(dict.fromkeys(c for term in terms for c in term_factors(term)))
+
+
+def design_matrix(data, terms):
+    """Regressors of the rows of a data set.
+
+    Terms which are columns of the data are taken as they are, other terms are
+    multiplied from their factors.
+
+    Args:
+        data (pd.DataFrame): observations.
+        terms (list): terms, see ``term_factors``.
+
+    Returns:
+        np.ndarray: one column per term, in the common dtype of the terms.
+
+    """
+    columns = []
+    for term in terms:
+        if term in data.columns:
+            columns.append(data[term].to_numpy())
+        else:
+            factors = [data[name].to_numpy() for name in term_factors(term)]
+            columns.append(functools.reduce(np.multiply, factors))
+    if not columns:
+        return np.empty((data.shape[0], 0))
+    return np.column_stack(columns)
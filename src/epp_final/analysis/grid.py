@@ -0,0 +1,159 @@
+"""Grid of robustness specifications of the one-child model on Sample 2.
+
+A specification is one choice of covariates, region, comparison window and
+estimator, all named in the dictionaries below, and a grid is their cross product,
+see ``spec_grid``. The grid is estimated in one pass over the data: Sample 2 is
+collapsed into cells of the union of all covariates once, the cross products of
+every region are summed by birth year once, and every specification is solved from
+these small matrices, see ``epp_final.analysis.moments``. Dozens of specifications
+therefore cost about as much as one.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from epp_final.analysis.design import expand_formula
+from epp_final.analysis.moments import BirthYearMoments, collapse_cells
+from epp_final.analysis.predict import _PESR, EDUCATION_CONTROLS
+from epp_final.analysis.results import ONE_CHILD_COEFFICIENTS, table_results
+
+# Regressors of the one-child model: Han, Treat and their interaction.
+DID_TERMS = expand_formula("H*T")
+# Covariates added to the regressors of the model.
+COVARIATE_SETS = {
+    "none": [],
+    "hukou": ["CN1990A_HHTYA"],
+    "education": EDUCATION_CONTROLS,
+    "education_hukou": [*EDUCATION_CONTROLS, "CN1990A_HHTYA"],
+}
+# Code of the regions in CN1990A_HHTYA, None for the whole country.
+REGIONS = {"All": None, "Rural": 1, "Urban": 0}
+# Comparison cohorts of the treated birth years 1980 to 1990.
+WINDOWS = {
+    "1973-1979": range(973, 980),
+    "1975-1979": range(975, 980),
+    "1977-1979": range(977, 980),
+}
+TREATED_YEARS = range(980, 991)
+# Methods of ``BirthYearMoments`` of the estimators: one regression per treated
+# birth year, as in the figures, or one with a dummy per treated birth year.
+ESTIMATORS = {"windows": "window_ols", "event_study": "event_study"}
+# The specification of the figures with educational controls.
+CONTROL_SPECIFICATION = "one_child_control"
+
+
+def spec_grid(
+    covariates=None,
+    regions=None,
+    windows=None,
+    estimators=None,
+    specification=None,
+):
+    """Cross product of specification choices.
+
+    Args:
+        covariates (list, optional): names of ``COVARIATE_SETS``. Defaults to all.
+        regions (list, optional): names of ``REGIONS``. Defaults to all.
+        windows (list, optional): names of ``WINDOWS``. Defaults to all.
+        estimators (list, optional): names of ``ESTIMATORS``. Defaults to all.
+        specification (str, optional): name of all specifications, e.g. of one
+            specification in several regions. Defaults to
+            "<estimator>/<covariates>/<window>".
+
+    Returns:
+        pd.DataFrame: one row per specification and region with the specification
+            name and the choices.
+
+    Raises:
+        ValueError: if a choice is unknown.
+
+    """
+    choices = {
+        "covariates": (covariates, COVARIATE_SETS),
+        "region": (regions, REGIONS),
+        "window": (windows, WINDOWS),
+        "estimator": (estimators, ESTIMATORS),
+    }
+    levels = []
+    for name, (chosen, known) in choices.items():
+        chosen = list(known) if chosen is None else list(chosen)
+        unknown = [value for value in chosen if value not in known]
+        if unknown:
+            raise ValueError(f"Unknown {name} {unknown}, use some of {list(known)}.")
+        levels.append(chosen)
+    grid = pd.MultiIndex.from_product(levels, names=list(choices)).to_frame(
+        index=False,
+    )
+    if specification is None:
+        specification = grid["estimator"] + "/" + grid["covariates"]
+        specification += "/" + grid["window"]
+    grid.insert(0, "specification", specification)
+    return grid
+
+
+# The specification of the figures and all robustness specifications.
+SPEC_GRID = pd.concat(
+    [
+        spec_grid(
+            ["education_hukou"],
+            windows=["1973-1979"],
+            estimators=["windows"],
+            specification=CONTROL_SPECIFICATION,
+        ),
+        spec_grid(),
+    ],
+    ignore_index=True,
+)
+
+
+def run_grid(data, grid=SPEC_GRID, weights=None):
+    """Estimate all specifications of a grid from one pass over the data.
+
+    Args:
+        data (pd.DataFrame): Sample 2 data, see ``clean_data_with_control``.
+        grid (pd.DataFrame): specifications, see ``spec_grid``.
+        weights (str, optional): column with frequency weights.
+
+    Returns:
+        pd.DataFrame: coefficients a0 to a3 and the PESR of every specification,
+            region and treated birth year in the format of the results store, see
+            ``epp_final.analysis.results``.
+
+    Raises:
+        ValueError: if a specification occurs twice in a region.
+
+    """
+    if grid.duplicated(["specification", "region"]).any():
+        raise ValueError("A specification occurs more than once in a region.")
+    covariates = list(
+        dict.fromkeys(
+            column for name in grid["covariates"] for column in COVARIATE_SETS[name]
+        ),
+    )
+    cells = collapse_cells(data, covariates, weights)
+    names, coefs = [], []
+    for region, specs in grid.groupby("region", sort=False):
+        mask = None
+        if REGIONS[region] is not None:
+            mask = cells["CN1990A_HHTYA"].to_numpy() == REGIONS[region]
+        moments = BirthYearMoments(cells, [*DID_TERMS, *covariates], mask)
+        for spec in specs.itertuples(index=False):
+            solve = getattr(moments, ESTIMATORS[spec.estimator])
+            coef = solve(
+                [*DID_TERMS, *COVARIATE_SETS[spec.covariates]],
+                WINDOWS[spec.window],
+                TREATED_YEARS,
+            )
+            names.append((spec.specification, region))
+            coefs.append(coef[:, :4])
+    coef = np.concatenate(coefs)
+    results = pd.DataFrame(
+        np.column_stack([coef, _PESR(*coef.T)]),
+        columns=ONE_CHILD_COEFFICIENTS,
+    )
+    results.insert(0, "birth_year", np.tile(np.array(TREATED_YEARS) + 1000, len(names)))
+    names = np.repeat(np.array(names, dtype=object), len(TREATED_YEARS), axis=0)
+    results.insert(0, "region", names[:, 1])
+    results.insert(0, "specification", names[:, 0])
+    return table_results(results, ONE_CHILD_COEFFICIENTS)
@@ -1,16 +0,0 @@
-"""Functions for fitting the regression model."""
-
-from statsmodels.iolib.smpickle import load_pickle
-
-
-def load_model(path):
-    """Load statsmodels model.
-
-    Args:
-        path (str or pathlib.Path): Path to model file.
-
-    Returns:
-        statsmodels.base.model.Results: The stored model.
-
-    """
-    return load_pickle(path)
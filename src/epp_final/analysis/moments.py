@@ -0,0 +1,194 @@
+"""Regressions by birth year window from cross products of cells.
+
+The regressors of the difference-in-differences models only vary between cells of
+birth year and a few factors, e.g. Han, hukou and parental education. Individuals
+are therefore collapsed into cells with the number of individuals and of males, and
+the cross products of the regressors are summed by birth year once. Treat is 1 in
+the treated birth years of a window and 0 in its comparison cohort, so every
+regressor is a base term without Treat, times Treat or not. The cross products of a
+regression of any window are sums of the ones of its birth years, and many
+regressions (windows, subsets of regressors, estimators) are solved from the same
+small matrices instead of from the data.
+
+"""
+
+import numpy as np
+
+from epp_final.analysis.design import design_matrix, term_factors
+from epp_final.analysis.predict import _solve_ols
+
+
+def collapse_cells(data, columns=(), weights=None):
+    """Collapse individuals into cells of birth year, nation, hukou and columns.
+
+    Args:
+        data (pd.DataFrame): processed individuals with CN1990A_SEX (1 for males).
+        columns (list): further columns the cells are split by.
+        weights (str, optional): column with frequency weights.
+
+    Returns:
+        pd.DataFrame: one row per cell with the number of individuals ("n") and of
+            males ("males").
+
+    """
+    keys = ["CN1990A_BIRTHY", "CN1990A_NATION", "CN1990A_HHTYA", *columns]
+    keys = list(dict.fromkeys(keys))
+    n = np.ones(data.shape[0]) if weights is None else data[weights].to_numpy(float)
+    cells = data[keys].assign(n=n, males=n * data["CN1990A_SEX"].to_numpy())
+    return cells.groupby(keys, as_index=False, observed=True).sum()
+
+
+class BirthYearMoments:
+    """Cross products of the base terms of regressors by birth year.
+
+    Args:
+        cells (pd.DataFrame): cells, see ``collapse_cells``.
+        terms (list): all regressors which may be used, see ``design_matrix``.
+        mask (np.ndarray, optional): boolean condition of the cells to use, e.g. a
+            region.
+
+    Attributes:
+        first (int): first birth year of the cells.
+        bases (list): base terms, "1" is the intercept.
+        XX (np.ndarray): x x' of the base terms of every birth year from the first
+            to the last one of the cells.
+        XY (np.ndarray): x y of the base terms of every birth year.
+
+    """
+
+    def __init__(self, cells, terms, mask=None):
+        """Accumulate the moments of the cells by birth year."""
+        if mask is not None:
+            cells = cells[np.asarray(mask)]
+        self.bases = list(dict.fromkeys(["1", *(_split(term)[1] for term in terms)]))
+        birth = cells["CN1990A_BIRTHY"].to_numpy()
+        self.first = int(birth.min()) if birth.shape[0] else 0
+        n_years = int(birth.max()) - self.first + 1 if birth.shape[0] else 0
+        X = design_matrix(cells, self.bases[1:]).astype(float)
+        X = np.column_stack([np.ones(X.shape[0]), X])
+        n = cells["n"].to_numpy()
+        XX = n[:, None, None] * X[:, :, None] * X[:, None, :]
+        self.XX = np.zeros((n_years, len(self.bases), len(self.bases)))
+        self.XY = np.zeros((n_years, len(self.bases)))
+        np.add.at(self.XX, birth - self.first, XX)
+        np.add.at(self.XY, birth - self.first, cells["males"].to_numpy()[:, None] * X)
+
+    def window_ols(self, terms, compare, years):
+        """Regressions of the comparison cohort and one treated birth year each.
+
+        Args:
+            terms (list): regressors without the intercept.
+            compare (range): birth years of the comparison cohort.
+            years (range): treated birth years, one regression each.
+
+        Returns:
+            np.ndarray: coefficients (intercept first) of shape (len(years), k).
+
+        """
+        treat, position = self._regressors(terms)
+        compare, years = self._rows(compare), self._rows(years)
+        pairs = (position[:, None], position)
+        XtX = self.XX[years][:, pairs[0], pairs[1]]
+        XtY = self.XY[years][:, position]
+        in_year = treat[:, None] | treat[None, :]
+        XtX += np.where(in_year, 0, self.XX[compare].sum(axis=0)[pairs])
+        XtY += np.where(treat, 0, self.XY[compare].sum(axis=0)[position])
+        return _solve_ols(XtX, XtY)
+
+    def event_study(self, terms, compare, years):
+        """One regression of all treated birth years with a Treat dummy each.
+
+        Every regressor with Treat is replaced by one regressor per treated birth
+        year, e.g. "H*T" by Han times the dummy of the birth year, as in
+        ``event_study``.
+
+        Args:
+            terms (list): regressors without the intercept.
+            compare (range): birth years of the comparison cohort.
+            years (range): treated birth years.
+
+        Returns:
+            np.ndarray: coefficients (intercept first) of shape (len(years), k), the
+                coefficients without Treat are the same in all rows.
+
+        """
+        treat, position = self._regressors(terms)
+        rows = self._rows(years)
+        n_years = rows.shape[0]
+        window = self.XX[self._rows(compare)].sum(axis=0) + self.XX[rows].sum(axis=0)
+        window_y = self.XY[self._rows(compare)].sum(axis=0) + self.XY[rows].sum(axis=0)
+        # Blocks 0 (window), 1 to n_years (treated years) and a zero block.
+        blocks = np.concatenate([window[None], self.XX[rows], 0 * window[None]])
+        blocks_y = np.concatenate([window_y[None], self.XY[rows]])
+        # Regressors: the fixed ones, then every Treat term times each year dummy.
+        fixed, dummies = np.flatnonzero(~treat), np.flatnonzero(treat)
+        base = np.concatenate([position[fixed], np.repeat(position[dummies], n_years)])
+        year = np.concatenate(
+            [
+                np.zeros(len(fixed), dtype=int),
+                np.tile(1 + np.arange(n_years), len(dummies)),
+            ],
+        )
+        shared = (year[:, None] == year) | (year[:, None] == 0) | (year == 0)
+        block = np.where(shared, np.maximum(year[:, None], year), n_years + 1)
+        coef = _solve_ols(blocks[block, base[:, None], base], blocks_y[year, base])
+        index = np.empty((n_years, len(treat)), dtype=int)
+        index[:, fixed] = np.arange(len(fixed))
+        index[:, dummies] = (
+            len(fixed) + np.arange(len(dummies)) * n_years + np.arange(n_years)[:, None]
+        )
+        return coef[index]
+
+    def _regressors(self, terms):
+        """Whether the regressors contain Treat and the positions of their bases.
+
+        Args:
+            terms (list): regressors without the intercept.
+
+        Returns:
+            tuple: Treat (np.ndarray of bool) and base position (np.ndarray) of the
+                intercept and the terms.
+
+        """
+        split = [(False, "1"), *(_split(term) for term in terms)]
+        treat = np.array([has_treat for has_treat, _ in split])
+        position = np.array([self.bases.index(base) for _, base in split])
+        return treat, position
+
+    def _rows(self, years):
+        """Rows of birth years in the cross products.
+
+        Args:
+            years (range): birth years.
+
+        Returns:
+            np.ndarray: rows.
+
+        Raises:
+            ValueError: if a birth year is not in the cells.
+
+        """
+        rows = np.asarray(years) - self.first
+        if rows.shape[0] and (rows.min() < 0 or rows.max() >= self.XX.shape[0]):
+            info = (
+                f"The data has birth years {self.first + 1000} to "
+                f"{self.first + self.XX.shape[0] + 999} only."
+            )
+            raise ValueError(info)
+        return rows
+
+
+def _split(term):
+    """Split a regressor into Treat and its base term.
+
+    Args:
+        term (str): regressor, see ``term_factors``.
+
+    Returns:
+        tuple: whether the term contains Treat and the product of its other factors,
+            "1" if there are none.
+
+    """
+    factors = term_factors(term)
+    base = "*".join(factor for factor in factors if factor != "Treat")
+    return "Treat" in factors, base or "1"
@@ -0,0 +1,248 @@
+"""Randomization inference for the effects on Han children by permuting Han status."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from epp_final.analysis.design import design_matrix, expand_formula, factor_columns
+from epp_final.analysis.predict import TRIPLE_DID_TERMS, _solve_ols, data_processing
+from epp_final.data_management.clean_data import clean_data_3did
+from epp_final.data_management.households import HouseholdIndex
+
+
+def permutation_coefficients(
+    data,
+    X_variables,
+    years,
+    compare,
+    n_permutations=999,
+    seed=0,
+    n_jobs=1,
+):
+    """Coefficients of all year windows under permutations of Han status.
+
+    The observed coefficients are the ones of the individual Han statuses, i.e. of
+    the regressions in the figures. Han status is permuted between households as a
+    whole: every household gets the vector of the statuses of its members of another
+    household with as many members in the data, so the statuses within households,
+    e.g. mixed ones, are kept. Individuals are collapsed into cells of identical
+    birth year, sex and X variables other than Han. A permutation then only splits
+    the individuals of every cell between Han and minorities, so its coefficients
+    are a weighted solve of the stacked normal equations. Every permutation gets its
+    own seed spawned from ``seed``, so the permutations do not depend on
+    ``n_jobs``.
+
+    Args:
+        data (pd.DataFrame): individuals with SERIAL, CN1990A_BIRTHY, CN1990A_SEX
+            and the X variables, Han is CN1990A_NATION.
+        X_variables (list): X variables used, given as terms of Han
+            (CN1990A_NATION or "H") and other factors, see ``design_matrix``.
+        years (range): treated birth years, one window each.
+        compare (range): birth years of the comparison cohort.
+        n_permutations (int): number of permutations.
+        seed (int): seed of the random number generator.
+        n_jobs (int): number of processes, -1 uses all cores.
+
+    Returns:
+        tuple: coefficients (intercept first) for the observed Han status of shape
+            (len(years), k) and for the permutations of shape
+            (n_permutations, len(years), k).
+
+    """
+    data = data[data["CN1990A_BIRTHY"].isin([*compare, *years])]
+    cell_keys = [
+        name
+        for name in factor_columns(["CN1990A_BIRTHY", "CN1990A_SEX", *X_variables])
+        if name != "CN1990A_NATION"
+    ]
+    households = HouseholdIndex.from_serial(data["SERIAL"])
+    # Members in the order of their households.
+    rows = households.order
+    status = data["CN1990A_NATION"].to_numpy(dtype=float)[rows]
+    cells = data[cell_keys].groupby(cell_keys)
+    cell = cells.ngroup().to_numpy()[rows]
+    cells = cells.size().index.to_frame(index=False)
+
+    birth = cells["CN1990A_BIRTHY"].to_numpy()
+    windows = np.column_stack([(birth == i) | np.isin(birth, compare) for i in years])
+    Y = cells["CN1990A_SEX"].to_numpy(dtype=float)
+    XX, XY = [], []
+    for han in [0, 1]:
+        X = _design(cells, X_variables, han)
+        XX.append(X[:, :, None] * X[:, None, :])
+        XY.append(X * Y[:, None])
+    args = {
+        "cell": cell,
+        "XX": np.stack(XX),
+        "XY": np.stack(XY),
+        "windows": windows.astype(float),
+    }
+    observed = _fits([status], **args)[0]
+    seeds = np.random.SeedSequence(seed).spawn(n_permutations)
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs == 1:
+        return observed, _permuted_fits(seeds, status, households.offsets, **args)
+    chunks = np.array_split(np.arange(n_permutations), n_jobs)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(
+                _permuted_fits,
+                [seeds[i] for i in chunk],
+                status,
+                households.offsets,
+                **args,
+            )
+            for chunk in chunks
+        ]
+        return observed, np.concatenate([future.result() for future in futures])
+
+
+def _design(cells, X_variables, status):
+    """Regressors of the cells for a given Han status.
+
+    Args:
+        cells (pd.DataFrame): cells with the factors of the X variables but Han.
+        X_variables (list): X variables used, see ``design_matrix``.
+        status (int): 1 for Han, 0 for minorities.
+
+    Returns:
+        np.ndarray: regressors with an intercept first.
+
+    """
+    X = design_matrix(cells.assign(CN1990A_NATION=status), X_variables)
+    return np.column_stack([np.ones(cells.shape[0]), X.astype(float)])
+
+
+def _permute(status, offsets, seeds):
+    """Permute the Han status vectors between households of the same size.
+
+    Args:
+        status (np.ndarray): Han status of the members in the order of their
+            households.
+        offsets (np.ndarray): household i has the members ``offsets[i]`` to
+            ``offsets[i + 1] - 1``, see ``HouseholdIndex``.
+        seeds (list): np.random.SeedSequence, one per permutation.
+
+    Yields:
+        np.ndarray: permuted Han status of the members, one array per seed.
+
+    """
+    sizes = np.diff(offsets)
+    household = np.repeat(np.arange(sizes.shape[0]), sizes)
+    by_size = np.argsort(sizes, kind="stable")
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        # Households sorted by size, in random order within every size.
+        donor = np.empty_like(by_size)
+        donor[by_size] = np.lexsort((rng.random(sizes.shape[0]), sizes))
+        shift = offsets[donor] - offsets[:-1]
+        yield status[np.arange(status.shape[0]) + shift[household]]
+
+
+def _permuted_fits(seeds, status, offsets, cell, XX, XY, windows):
+    """Solve the window regressions for a batch of permutations.
+
+    Args:
+        seeds (list): np.random.SeedSequence, one per permutation.
+        status (np.ndarray): Han status of the members, see ``_permute``.
+        offsets (np.ndarray): offsets of the households, see ``_permute``.
+        cell (np.ndarray): cell of every member.
+        XX (np.ndarray): x x' of every cell for minorities and Han.
+        XY (np.ndarray): x y of every cell for minorities and Han.
+        windows (np.ndarray): cells (rows) used in each window (columns).
+
+    Returns:
+        np.ndarray: coefficients of shape (len(seeds), n_windows, k).
+
+    """
+    return _fits(_permute(status, offsets, seeds), cell, XX, XY, windows)
+
+
+def _fits(statuses, cell, XX, XY, windows):
+    """Solve the window regressions for Han statuses of the members.
+
+    Args:
+        statuses (iterable): Han status of every member, one array per fit.
+        cell (np.ndarray): cell of every member.
+        XX (np.ndarray): x x' of every cell for minorities and Han.
+        XY (np.ndarray): x y of every cell for minorities and Han.
+        windows (np.ndarray): cells (rows) used in each window (columns).
+
+    Returns:
+        np.ndarray: coefficients of shape (n_fits, n_windows, k).
+
+    """
+    n_cells = XX.shape[1]
+    total = np.bincount(cell, minlength=n_cells).astype(float)
+    han = np.stack(
+        [np.bincount(cell, weights=status, minlength=n_cells) for status in statuses],
+    )
+    weights = np.stack([total - han, han], axis=1)
+    XtX = np.einsum("rsc,cw,sckl->rwkl", weights, windows, XX, optimize=True)
+    XtY = np.einsum("rsc,cw,sck->rwk", weights, windows, XY, optimize=True)
+    return _solve_ols(XtX, XtY)
+
+
+def randomization_inference(data, n_permutations=999, seed=0, n_jobs=1):
+    """Randomization p-values of the one-child and two-child effects on Han.
+
+    Args:
+        data (pd.DataFrame): 1990 data with SERIAL.
+        n_permutations (int): number of permutations.
+        seed (int): seed of the random number generator.
+        n_jobs (int): number of processes, -1 uses all cores.
+
+    Returns:
+        tuple: the estimated effect (OneChildInteract by birth year 1980 to 1990,
+            H*K*T by birth year 1985 to 1990) with its two-sided p-value
+            (pd.DataFrame with effect, x, estimate and p_value), and the
+            permutation distributions (pd.DataFrame with effect, x, permutation and
+            value).
+
+    """
+    options = {"n_permutations": n_permutations, "seed": seed, "n_jobs": n_jobs}
+    # The effects are the interactions of all factors, the last terms.
+    specifications = [
+        ("OneChildInteract", data_processing, expand_formula("H*T"), 980, 973),
+        ("H*K*T", clean_data_3did, TRIPLE_DID_TERMS, 985, 980),
+    ]
+    summaries, distributions = [], []
+    for effect, clean, X_variables, first_treated, first_compare in specifications:
+        years = range(first_treated, 991)
+        observed, permuted = permutation_coefficients(
+            clean(data.copy()),
+            X_variables,
+            years,
+            range(first_compare, first_treated),
+            **options,
+        )
+        observed, permuted = observed[:, -1], permuted[..., -1]
+        x = np.array(years) + 1000
+        # Permutations as extreme as the estimate up to rounding errors count.
+        extreme = np.abs(permuted) >= np.abs(observed) - 1e-12
+        summaries.append(
+            pd.DataFrame(
+                {
+                    "effect": effect,
+                    "x": x,
+                    "estimate": observed,
+                    "p_value": (1 + extreme.sum(axis=0)) / (1 + n_permutations),
+                },
+            ),
+        )
+        distributions.append(
+            pd.DataFrame(
+                {
+                    "effect": effect,
+                    "x": np.tile(x, n_permutations),
+                    "permutation": np.repeat(np.arange(n_permutations), len(x)),
+                    "value": permuted.ravel(),
+                },
+            ),
+        )
+    return (
+        pd.concat(summaries, ignore_index=True),
+        pd.concat(distributions, ignore_index=True),
+    )
@@ -1,8 +1,33 @@
 """Functions for predicting outcomes based on the estimated model."""
 
+from collections.abc import Mapping
+
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+
+from epp_final.analysis.design import design_matrix, expand_formula
+from epp_final.data_management.schema import DTYPES
+
+# Regressors of the triple did: Han, Treat, Hukou and all their interactions.
+TRIPLE_DID_TERMS = expand_formula("H*T*K")
+# Signs and coefficients of the odds p / (1 - p) in the PESR, see ``_PESR``.
+_PESR_TERMS = [(1, [0, 1, 2, 3]), (-1, [0, 1]), (-1, [0, 2]), (1, [0])]
+# The same for the two-child PESR without its first odds, see ``_PESR3``.
+_PESR3_TERMS = [
+    (-1, [0, 1, 3, 5]),
+    (-1, [0, 2, 3, 4]),
+    (1, [0, 3]),
+    (-1, [0, 1, 2, 4]),
+    (1, [0, 1]),
+    (1, [0, 2]),
+    (-1, [0]),
+]
+# Education dummies of father and mother in Sample 2, "High" is the reference level.
+EDUCATION_CONTROLS = [
+    f"CN1990A_EDLEV1_{level}_{parent}"
+    for parent in ["father", "mother"]
+    for level in ["Illiterate", "Junior", "Primary"]
+]
 
 
 def data_processing(data):
@@ -22,7 +47,7 @@ def data_processing(data):
     data.reset_index(drop=True, inplace=True)
     data.drop(data[data["CN1990A_BIRTHY"] < 973].index, inplace=True)
     data.reset_index(drop=True, inplace=True)
-    data["Treat"] = np.zeros(data.shape[0], dtype="int")
+    data["Treat"] = np.zeros(data.shape[0], dtype=DTYPES["Treat"])
     data.loc[data["CN1990A_BIRTHY"] > 979, "Treat"] = 1
     data["OneChildInteract"] = data["Treat"] * data["CN1990A_NATION"]
     return data
@@ -48,6 +73,226 @@ def _PESR(a0, a1, a2, a3):
     return PES
 
 
+def _PESR_gradient(a0, a1, a2, a3):
+    """Gradient of the PESR with respect to the coefficients.
+
+    Like ``_PESR``, the coefficients may be arrays, e.g. one entry per year or per
+    bootstrap draw.
+
+    Args:
+        a0 (float or np.ndarray): intercept
+        a1 (float or np.ndarray): Han effect
+        a2 (float or np.ndarray): 1979 dummy
+        a3 (float or np.ndarray): One child policy on Han after 1979
+
+    Returns:
+        np.ndarray: derivatives by a0 to a3 along the last axis.
+
+    """
+    coef = np.stack(np.broadcast_arrays(a0, a1, a2, a3), axis=-1).astype(float)
+    return _odds_gradient(coef, _PESR_TERMS)
+
+
+def _odds_gradient(coef, terms):
+    """Gradient of 100 times a signed sum of odds p / (1 - p).
+
+    Args:
+        coef (np.ndarray): coefficients along the last axis.
+        terms (list): sign and indices of the coefficients summed to p, per odds.
+
+    Returns:
+        np.ndarray: derivatives by the coefficients along the last axis.
+
+    """
+    grad = np.zeros_like(coef)
+    for sign, index in terms:
+        p = coef[..., index].sum(axis=-1)
+        grad[..., index] += (sign / (1 - p) ** 2)[..., None]
+    return 100 * grad
+
+
+def delta_method_se(gradient, cov):
+    """Standard errors of functions of coefficients by the delta method.
+
+    Args:
+        gradient (np.ndarray): gradients of the functions, shape (..., k).
+        cov (np.ndarray): covariance of the coefficients, shape (..., k, k).
+
+    Returns:
+        np.ndarray: standard errors, shape (...).
+
+    """
+    return np.sqrt(np.einsum("...i,...ij,...j->...", gradient, cov, gradient))
+
+
+def _cross_products(data, X_variables, weights=None, region=None):
+    """Cross products of the regression of sex on X variables and an intercept.
+
+    Args:
+        data (pd.DataFrame): observations used in the regression.
+        X_variables (list): X variables used, interactions are built from their
+            factors, see ``design_matrix``.
+        weights (str, optional): column with frequency weights, e.g. the counts of
+            the count cube.
+        region (int, optional): only use observations with this CN1990A_HHTYA.
+
+    Returns:
+        tuple: X'X (np.ndarray) and X'y (np.ndarray), intercept first.
+
+    """
+    X = design_matrix(data, X_variables).astype(float)
+    X = np.column_stack([np.ones(X.shape[0]), X])
+    Y = data["CN1990A_SEX"].to_numpy(dtype=float)
+    w = np.ones(X.shape[0]) if weights is None else data[weights].to_numpy(float)
+    if region is not None:
+        w = w * (data["CN1990A_HHTYA"].to_numpy() == region)
+    Xw = X * w[:, None]
+    return Xw.T @ X, Xw.T @ Y
+
+
+def _window_ols(year_data, X_variables, years, region=None, weights=None):
+    """Fit the OLS regressions of all year windows in one stacked solve.
+
+    Every window consists of the comparison cohort and one treated birth year. The
+    cross products of the comparison cohort are computed once and added to the ones
+    of each treated year, so every observation is visited a single time.
+
+    Args:
+        year_data (YearWindows): data split by year.
+        X_variables (list): X variables used
+        years (range): treated birth years, one window each.
+        region (int, optional): only use observations with this CN1990A_HHTYA.
+        weights (str, optional): column with frequency weights.
+
+    Returns:
+        np.ndarray: coefficients (intercept first) with one row per window.
+
+    """
+    XtX_c, XtY_c = _cross_products(
+        year_data.comparison,
+        X_variables,
+        weights,
+        region,
+    )
+    XtX = []
+    XtY = []
+    for i in years:
+        XtX_i, XtY_i = _cross_products(
+            year_data.block(i),
+            X_variables,
+            weights,
+            region,
+        )
+        XtX.append(XtX_c + XtX_i)
+        XtY.append(XtY_c + XtY_i)
+    return _solve_ols(np.stack(XtX), np.stack(XtY))
+
+
+def _solve_ols(XtX, XtY):
+    """Solve stacked normal equations like sklearn's LinearRegression.
+
+    The regressors are centered, so that the intercept is not penalized, and the
+    minimum norm solution is returned for collinear regressors, e.g. a region
+    dummy within a single region.
+
+    Args:
+        XtX (np.ndarray): X'X with the intercept first, shape (..., k, k).
+        XtY (np.ndarray): X'y with the intercept first, shape (..., k).
+
+    Returns:
+        np.ndarray: coefficients (intercept first), shape (..., k).
+
+    """
+    n = XtX[..., 0, 0, None]
+    X_mean = XtX[..., 0, 1:] / n
+    Y_mean = XtY[..., 0, None] / n
+    Sxx = XtX[..., 1:, 1:] - n[..., None] * X_mean[..., :, None] * X_mean[..., None, :]
+    Sxy = XtY[..., 1:] - n * X_mean * Y_mean
+    beta = (np.linalg.pinv(Sxx, rcond=1e-10, hermitian=True) @ Sxy[..., None])[..., 0]
+    intercept = Y_mean - np.sum(X_mean * beta, axis=-1, keepdims=True)
+    return np.concatenate([intercept, beta], axis=-1)
+
+
+class YearWindows(Mapping):
+    """Windows of the comparison cohort and one treated birth year each.
+
+    The observations are sorted by birth year and stored once, and every birth year
+    is a range of rows of this store. The comparison cohort is therefore shared by
+    all windows instead of being copied into each of them, and ``block`` and
+    ``comparison`` return slices without copying. Looking up ``"Birth{i}"`` as in a
+    dict materializes the window of year ``i``, ordered by the index of the data.
+
+    Args:
+        data (pd.DataFrame): observations with CN1990A_BIRTHY.
+        years (range): treated birth years, one window each.
+        compare (range): birth years of the comparison cohort.
+
+    """
+
+    def __init__(self, data, years, compare):
+        """Sort the observations of the windows by birth year."""
+        self.years = years
+        self.compare = compare
+        birth = data["CN1990A_BIRTHY"].to_numpy()
+        rows = np.flatnonzero(np.isin(birth, [*compare, *years]))
+        rows = rows[np.argsort(birth[rows], kind="stable")]
+        self.data = data.take(rows)
+        bounds = np.searchsorted(
+            birth[rows],
+            [*compare, *years, max(*compare, *years) + 1],
+        )
+        self._offsets = dict(
+            zip(
+                [*compare, *years],
+                zip(bounds[:-1], bounds[1:], strict=True),
+                strict=True,
+            ),
+        )
+
+    def block(self, year):
+        """Observations born in one year.
+
+        Args:
+            year (int): birth year.
+
+        Returns:
+            pd.DataFrame: slice of the sorted store.
+
+        """
+        start, stop = self._offsets[year]
+        return self.data.iloc[start:stop]
+
+    @property
+    def comparison(self):
+        """pd.DataFrame: slice of the sorted store with the comparison cohort."""
+        return self.data.iloc[
+            self._offsets[self.compare[0]][0] : self._offsets[self.compare[-1]][1]
+        ]
+
+    def __getitem__(self, key):
+        """Materialize the window "Birth{i}" of treated birth year i."""
+        if key not in self:
+            raise KeyError(key)
+        year = int(key.removeprefix("Birth"))
+        return pd.concat([self.comparison, self.block(year)]).sort_index()
+
+    def __iter__(self):
+        """Iterate over the names of the windows."""
+        return (f"Birth{i}" for i in self.years)
+
+    def __len__(self):
+        """Number of windows."""
+        return len(self.years)
+
+    def __contains__(self, key):
+        """Whether a window of this name exists."""
+        return key in {f"Birth{i}" for i in self.years}
+
+    def __cache_key__(self):
+        """Contents identifying the windows, see ``epp_final.cache``."""
+        return self.years, self.compare, self.data
+
+
 def year_data_split(data):
     """Split data by year.
 
@@ -55,106 +300,210 @@ def year_data_split(data):
          data (pd.DataFrame): 1990 processed data.
 
     Returns:
-         dict: Split data by years.
+         YearWindows: Split data by years.
 
     """
-    compare = (data["CN1990A_BIRTHY"] <= 979) * (data["CN1990A_BIRTHY"] >= 973)
-    year_data = {}
-    for i in range(980, 991):
-        year_data[f"Birth{i}"] = data[(data["CN1990A_BIRTHY"] == i) + compare].copy()
-    return year_data
+    return YearWindows(data, range(980, 991), range(973, 980))
 
 
-def gen_plot_data(data):
+def gen_plot_data(data, weights=None):
     """Generate data used for plot.
 
     Args:
-        data (dict): data split by year.
+        data (YearWindows): data split by year.
+        weights (str, optional): column with frequency weights.
 
     Returns:
         dict: regression coefficients(value) by year(key)
 
     """
-    X_variables = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+    estimates, _ = event_study(data.data, data.years, data.compare, weights)
     year_results_all = {}
-    for i in range(980, 991):
-        workdf = data[f"Birth{i}"].copy()
-        Obs = workdf.shape[0]
-        Y = workdf["CN1990A_SEX"].values.reshape(Obs, 1)
-        X = workdf[X_variables].values.reshape(Obs, 3)
-        reg_all = LinearRegression().fit(X, Y)
-        a0 = reg_all.intercept_[0]
-        a1, a2, a3 = reg_all.coef_[0]
-        Pesr = _PESR(a0, a1, a2, a3)
-        year_results_all[f"{i}"] = [a0, a1, a2, a3, Pesr]
+    for i, row in estimates.iterrows():
+        year_results_all[f"{i}"] = row[["a0", "a1", "a2", "a3", "PESR"]].tolist()
     return year_results_all
 
 
-def gen_plot_data_control(year_data_c, X_variables_c):
+def event_study(data, years, compare, weights=None, region=None):
+    """Fit the effects of all treated birth years in one regression.
+
+    Sex is regressed on Han, a dummy for every treated birth year and the
+    interactions of Han with these dummies. The pooled comparison cohort is the
+    left-out reference, so alpha 2 and alpha 3 of a year are the same as in the
+    regression of the comparison cohort and this year alone, but all coefficients
+    come with a joint covariance matrix. Since the regressors only vary between
+    cells of birth year and ethnicity, the regression and its heteroskedasticity
+    robust (HC1) covariance are computed from the sums of the cells.
+
+    Args:
+        data (pd.DataFrame): processed children data.
+        years (range): treated birth years.
+        compare (range): birth years of the comparison cohort.
+        weights (str, optional): column with frequency weights.
+        region (int, optional): only use observations with this CN1990A_HHTYA.
+
+    Returns:
+        tuple: coefficients a0 to a3, PESR and the standard errors of a2, a3 and
+            PESR (delta method) as pd.DataFrame indexed by birth year, and the
+            covariance matrix of the coefficients (pd.DataFrame).
+
+    """
+    cells = _event_cells(data, [*compare, *years], weights, region)
+    han = cells["CN1990A_NATION"].to_numpy(dtype=float)
+    birth = cells["CN1990A_BIRTHY"].to_numpy()
+    dummies = (birth[:, None] == np.array(years)).astype(float)
+    X = np.column_stack([np.ones(len(cells)), han, dummies, han[:, None] * dummies])
+    n, sy, syy = (cells[name].to_numpy() for name in ["n", "sy", "syy"])
+    XtX = (X * n[:, None]).T @ X
+    coef = _solve_ols(XtX, X.T @ sy)
+    fitted = X @ coef
+    meat = (X * (syy - 2 * fitted * sy + fitted**2 * n)[:, None]).T @ X
+    bread = np.linalg.pinv(XtX, rcond=1e-10, hermitian=True)
+    cov = bread @ meat @ bread * n.sum() / (n.sum() - X.shape[1])
+    names = [
+        "const",
+        "Han",
+        *(f"Birth{i}" for i in years),
+        *(f"Han*Birth{i}" for i in years),
+    ]
+    se = np.sqrt(np.diag(cov))
+    k = len(years)
+    a0, a1, a2, a3 = coef[0], coef[1], coef[2 : 2 + k], coef[2 + k :]
+    # Positions of a0, a1 and of a2 and a3 of every year among the coefficients.
+    year = np.arange(k)
+    index = np.column_stack([0 * year, 0 * year + 1, 2 + year, 2 + k + year])
+    cov_year = cov[index[:, :, None], index[:, None, :]]
+    estimates = pd.DataFrame(
+        {
+            "a0": a0,
+            "a1": a1,
+            "a2": a2,
+            "a3": a3,
+            "PESR": _PESR(a0, a1, a2, a3),
+            "se_a2": se[2 : 2 + k],
+            "se_a3": se[2 + k :],
+            "se_PESR": delta_method_se(_PESR_gradient(a0, a1, a2, a3), cov_year),
+        },
+        index=pd.Index(years, name="CN1990A_BIRTHY"),
+    )
+    return estimates, pd.DataFrame(cov, index=names, columns=names)
+
+
+def _event_cells(data, birth_years, weights=None, region=None):
+    """Sums of sex by birth year and ethnicity.
+
+    Args:
+        data (pd.DataFrame): processed children data.
+        birth_years (list): birth years kept.
+        weights (str, optional): column with frequency weights.
+        region (int, optional): only use observations with this CN1990A_HHTYA.
+
+    Returns:
+        pd.DataFrame: CN1990A_BIRTHY, CN1990A_NATION, the number of observations
+            (n) and the sums of sex (sy) and squared sex (syy).
+
+    """
+    keep = data["CN1990A_BIRTHY"].isin(birth_years)
+    if region is not None:
+        keep &= data["CN1990A_HHTYA"] == region
+    data = data[keep]
+    w = np.ones(data.shape[0]) if weights is None else data[weights].to_numpy(float)
+    y = data["CN1990A_SEX"].to_numpy(dtype=float)
+    sums = pd.DataFrame(
+        {
+            "CN1990A_BIRTHY": data["CN1990A_BIRTHY"].to_numpy(),
+            "CN1990A_NATION": data["CN1990A_NATION"].to_numpy(),
+            "n": w,
+            "sy": w * y,
+            "syy": w * y**2,
+        },
+    )
+    return sums.groupby(["CN1990A_BIRTHY", "CN1990A_NATION"], as_index=False).sum()
+
+
+def control_variables(data):
+    """X variables of the regressions with educational controls.
+
+    Args:
+        data (pd.DataFrame): Sample 2 data.
+
+    Returns:
+        list: Han, Treat, OneChildInteract, the education dummies of father and
+            mother without the reference level, and Hukou.
+
+    Raises:
+        ValueError: if a control variable is not in the data.
+
+    """
+    X_variables = [
+        "CN1990A_NATION",
+        "Treat",
+        "OneChildInteract",
+        *EDUCATION_CONTROLS,
+        "CN1990A_HHTYA",
+    ]
+    missing = [name for name in X_variables if name not in data.columns]
+    if missing:
+        raise ValueError(f"Sample 2 has no control variables {missing}.")
+    return X_variables
+
+
+def gen_plot_data_control(year_data_c, X_variables_c, weights=None):
     """Generate plot data with control.
 
     Args:
-        year_data_c (dict): data split by year.
+        year_data_c (YearWindows): data split by year.
         X_variables_c (string): X variables used
+        weights (str, optional): column with frequency weights.
 
     Returns:
         pd.DataFrame: regression coefficients
 
     """
-    year_results_all_c = {}
-    for i in range(980, 991):
-        workdf = year_data_c[f"Birth{i}"].copy()
-        Obs = workdf.shape[0]
-        Y = workdf["CN1990A_SEX"].values.reshape(Obs, 1)
-        X = workdf[X_variables_c].values
-        reg_all = LinearRegression().fit(X, Y)
-        a0 = reg_all.intercept_[0]
-        a1, a2, a3 = reg_all.coef_[0][[0, 1, 2]]
-        year_results_all_c[f"{i}"] = [a0, a1, a2, a3]
-    a3_all = []
-    for i in range(980, 991):
-        a3_all.append(year_results_all_c[f"{i}"][3])
+    coef = _window_ols(year_data_c, X_variables_c, range(980, 991), weights=weights)
     x = list(range(1980, 1991))
-    dfa3 = pd.DataFrame({"x": x, "y": a3_all})
+    dfa3 = pd.DataFrame({"x": x, "y": coef[:, 3]})
     return dfa3
 
 
-def _rural_urban(choose, year_dict, year_data, X_variables):
+def _rural_urban(choose, year_dict, year_data, X_variables, weights=None):
     """Function only for rural and urban regressions.
 
     Args:
         choose (int): 0 for urban, 1 for rural
         year_dict (empty dictionary): results container
-        year_data (dict): data for each year
+        year_data (YearWindows): data for each year
         X_variables(string): X variables used
+        weights (str, optional): column with frequency weights.
 
     Returns:
         dict: results
 
     """
-    for i in range(980, 991):
-        region_bool = year_data[f"Birth{i}"]["CN1990A_HHTYA"] == choose
-        workdf = year_data[f"Birth{i}"][region_bool].copy()
-        Obs = workdf.shape[0]
-        Y = workdf["CN1990A_SEX"].values.reshape(Obs, 1)
-        X = workdf[X_variables].values
-        reg_all = LinearRegression().fit(X, Y)
-        a0 = reg_all.intercept_[0]
-        a1, a2, a3 = reg_all.coef_[0][[0, 1, 2]]
-        Pesr = _PESR(a0, a1, a2, a3)
-        year_dict[f"{i}"] = [a0, a1, a2, a3, Pesr]
+    coef = _window_ols(
+        year_data,
+        X_variables,
+        range(980, 991),
+        region=choose,
+        weights=weights,
+    )
+    pesr = _PESR(*coef[:, :4].T)
+    for i, coef_i, pesr_i in zip(range(980, 991), coef[:, :4], pesr, strict=True):
+        year_dict[f"{i}"] = [*coef_i, pesr_i]
     return year_dict
 
 
 def rural_urban_dataframe(
     year_data,
     X_variables=["CN1990A_NATION", "Treat", "OneChildInteract"],
+    weights=None,
 ):
     """Store rural and urban data in two dataframes.
 
     Args:
-        year_data (dict): data for each year
+        year_data (YearWindows): data for each year
         X_variables(string): X variables used
+        weights (str, optional): column with frequency weights.
 
     Returns:
         pd.DataFrame: coefficients with labels for plotting
@@ -162,8 +511,20 @@ def rural_urban_dataframe(
     """
     year_results_rural = {}
     year_results_urban = {}
-    year_results_rural = _rural_urban(1, year_results_rural, year_data, X_variables)
-    year_results_urban = _rural_urban(0, year_results_urban, year_data, X_variables)
+    year_results_rural = _rural_urban(
+        1,
+        year_results_rural,
+        year_data,
+        X_variables,
+        weights,
+    )
+    year_results_urban = _rural_urban(
+        0,
+        year_results_urban,
+        year_data,
+        X_variables,
+        weights,
+    )
     Pesr_rural = []
     a3_rural = []
     Pesr_urban = []
@@ -230,6 +591,38 @@ def _PESR3(a0, a1, a2, a3, a4, a5, a6, a7):
     return PES
 
 
+def _PESR3_gradient(a0, a1, a2, a3, a4, a5, a6, a7):
+    """Gradient of the two-child PESR with respect to the coefficients.
+
+    The first odds of ``_PESR3`` leave a0 out of their denominator, which the
+    gradient follows.
+
+    Args:
+        a0 (float or np.ndarray): intercept
+        a1 (float or np.ndarray): ethnic effect
+        a2 (float or np.ndarray): 1984 dummy, time effect
+        a3 (float or np.ndarray): Hukou effect
+        a4 (float or np.ndarray): ethnic effect times time effect
+        a5 (float or np.ndarray): ethnic effect times Hukou effect
+        a6 (float or np.ndarray): time effect times Hukou effect
+        a7 (float or np.ndarray): two-child policy on Han household with non-ag
+            Hukou after 1984
+
+    Returns:
+        np.ndarray: derivatives by a0 to a7 along the last axis.
+
+    """
+    coef = np.stack(
+        np.broadcast_arrays(a0, a1, a2, a3, a4, a5, a6, a7),
+        axis=-1,
+    ).astype(float)
+    grad = _odds_gradient(coef, _PESR3_TERMS)
+    denominator = 1 - coef[..., 1:].sum(axis=-1)
+    grad[..., 0] += 100 / denominator
+    grad[..., 1:] += (100 * (1 + coef[..., 0]) / denominator**2)[..., None]
+    return grad
+
+
 def year_data_split3(data):
     """Split data by year.
 
@@ -237,44 +630,26 @@ def year_data_split3(data):
          data (pd.DataFrame): 1990 data for triple did.
 
     Returns:
-         dict: Split data by years.
+         YearWindows: Split data by years.
 
     """
-    compare = (data["CN1990A_BIRTHY"] <= 984) * (data["CN1990A_BIRTHY"] >= 980)
-    year_data = {}
-    for i in range(985, 991):
-        year_data[f"Birth{i}"] = data[(data["CN1990A_BIRTHY"] == i) + compare].copy()
-    return year_data
+    return YearWindows(data, range(985, 991), range(980, 985))
 
 
-def gen_plot_data3(data):
+def gen_plot_data3(data, weights=None):
     """Generate data used for plot under triple did model.
 
     Args:
-        data (dict): data split by year.
+        data (YearWindows): data split by year.
+        weights (str, optional): column with frequency weights.
 
     Returns:
         dict: regression coefficients(value) by year(key)
 
     """
-    X_variables = [
-        "CN1990A_NATION",
-        "Treat",
-        "CN1990A_HHTYA",
-        "H*T",
-        "H*K",
-        "K*T",
-        "H*K*T",
-    ]
+    coef = _window_ols(data, TRIPLE_DID_TERMS, range(985, 991), weights=weights)
+    pesr3 = _PESR3(*coef.T)
     year_results_all = {}
-    for i in range(985, 991):
-        workdf = data[f"Birth{i}"].copy()
-        Obs = workdf.shape[0]
-        Y = workdf["CN1990A_SEX"].values.reshape(Obs, 1)
-        X = workdf[X_variables].values.reshape(Obs, 7)
-        reg_all = LinearRegression().fit(X, Y)
-        a0 = reg_all.intercept_[0]
-        a1, a2, a3, a4, a5, a6, a7 = reg_all.coef_[0]
-        Pesr3 = _PESR3(a0, a1, a2, a3, a4, a5, a6, a7)
-        year_results_all[f"{i}"] = [a0, a1, a2, a3, a4, a5, a6, a7, Pesr3]
+    for i, coef_i, pesr3_i in zip(range(985, 991), coef, pesr3, strict=True):
+        year_results_all[f"{i}"] = [*coef_i, pesr3_i]
     return year_results_all
@@ -0,0 +1,184 @@
+"""Store of the estimation results in a long columnar table.
+
+Every estimate is one row of (specification, region, birth_year, coefficient,
+estimate, se), e.g. alpha 3 of the one-child model for the rural children born in
+1985. The store is a directory of csv or parquet files, its parts. Every writer,
+e.g. a pytask task, appends its own part, and readers load only the parts, columns
+and rows a figure needs, with the selection pushed into the read of parquet files.
+The rows of a part are sorted by ``RESULT_INDEX``, which identifies every estimate,
+so that the row group statistics of parquet files index the part.
+
+"""
+
+import pandas as pd
+
+from epp_final.utilities import read_data, write_data
+
+RESULT_INDEX = ["specification", "region", "coefficient", "birth_year"]
+RESULT_COLUMNS = [
+    "specification",
+    "region",
+    "birth_year",
+    "coefficient",
+    "estimate",
+    "se",
+]
+RESULT_DTYPES = {"birth_year": "int16", "estimate": "float64", "se": "float64"}
+ONE_CHILD_COEFFICIENTS = ["a0", "a1", "a2", "a3", "PESR"]
+TWO_CHILD_COEFFICIENTS = ["a0", "a1", "a2", "a3", "a4", "a5", "a6", "a7", "PESR"]
+
+
+def coefficient_results(coef, specification, coefficients, region="All"):
+    """Results of coefficients stored by birth year.
+
+    Args:
+        coef (dict): coefficients by birth year (e.g. "985"), see
+            ``gen_plot_data`` and ``gen_plot_data3``.
+        specification (str): name of the specification.
+        coefficients (list): names of the coefficients in the order of ``coef``.
+        region (str): region of the estimates.
+
+    Returns:
+        pd.DataFrame: results, see ``RESULT_COLUMNS``.
+
+    """
+    values = pd.DataFrame.from_dict(coef, orient="index", columns=coefficients)
+    values.index = values.index.astype(int) + 1000
+    results = values.rename_axis("birth_year").reset_index()
+    results = results.melt("birth_year", var_name="coefficient", value_name="estimate")
+    return _format(results.assign(specification=specification, region=region))
+
+
+def frame_results(data, specification, coefficient):
+    """Results of a coefficient stored as plot data.
+
+    Args:
+        data (pd.DataFrame): birth year (x), estimate (y) and optionally the region,
+            see ``gen_plot_data_control`` and ``rural_urban_dataframe``.
+        specification (str): name of the specification.
+        coefficient (str): name of the coefficient.
+
+    Returns:
+        pd.DataFrame: results, see ``RESULT_COLUMNS``.
+
+    """
+    results = data.rename(columns={"x": "birth_year", "y": "estimate"})
+    if "region" not in results.columns:
+        results = results.assign(region="All")
+    return _format(results.assign(specification=specification, coefficient=coefficient))
+
+
+def table_results(data, coefficients):
+    """Results of coefficients stored in the columns of a table.
+
+    Args:
+        data (pd.DataFrame): specification, region, birth year and one column per
+            coefficient, e.g. of many specifications, see ``run_grid``.
+        coefficients (list): names of the columns of the coefficients.
+
+    Returns:
+        pd.DataFrame: results, see ``RESULT_COLUMNS``.
+
+    """
+    results = data.melt(
+        ["specification", "region", "birth_year"],
+        coefficients,
+        var_name="coefficient",
+        value_name="estimate",
+    )
+    return _format(results)
+
+
+def event_study_results(estimates, specification="event_study"):
+    """Results of the event study with their standard errors.
+
+    Args:
+        estimates (pd.DataFrame): coefficients and standard errors by birth year, see
+            ``event_study``.
+        specification (str): name of the specification.
+
+    Returns:
+        pd.DataFrame: results, see ``RESULT_COLUMNS``.
+
+    """
+    values = estimates.rename(index=lambda year: year + 1000)
+    values = values.rename_axis("birth_year").reset_index()
+    results = values.melt(
+        "birth_year",
+        ONE_CHILD_COEFFICIENTS,
+        var_name="coefficient",
+        value_name="estimate",
+    )
+    se = values.filter(regex="^(birth_year|se_)").rename(
+        columns=lambda name: name.removeprefix("se_"),
+    )
+    se = se.melt("birth_year", var_name="coefficient", value_name="se")
+    results = results.merge(se, on=["birth_year", "coefficient"], how="left")
+    return _format(results.assign(specification=specification, region="All"))
+
+
+def write_results(results, path):
+    """Write a part of the results store.
+
+    Args:
+        results (pd.DataFrame): results, see ``RESULT_COLUMNS``, se is optional.
+        path (str or pathlib.Path): path of the part, the suffix selects the format.
+
+    Raises:
+        ValueError: If an estimate is given more than once.
+
+    """
+    results = _format(results)
+    duplicated = results.duplicated(RESULT_INDEX)
+    if duplicated.any():
+        info = (
+            "The results contain estimates more than once, e.g. "
+            f"{results.loc[duplicated, RESULT_INDEX].iloc[0].tolist()}."
+        )
+        raise ValueError(info)
+    write_data(results, path)
+
+
+def read_results(
+    paths,
+    specifications=None,
+    coefficients=None,
+    regions=None,
+    columns=None,
+):
+    """Read a selection of the results store.
+
+    Args:
+        paths (list): paths of the parts to read.
+        specifications (list, optional): specifications to read. Defaults to all.
+        coefficients (list, optional): coefficients to read. Defaults to all.
+        regions (list, optional): regions to read. Defaults to all.
+        columns (list, optional): columns to read. Defaults to all.
+
+    Returns:
+        pd.DataFrame: results sorted by ``RESULT_INDEX`` within every part.
+
+    """
+    selection = {
+        "specification": specifications,
+        "coefficient": coefficients,
+        "region": regions,
+    }
+    filters = [
+        (name, "in", list(values))
+        for name, values in selection.items()
+        if values is not None
+    ]
+    parts = [
+        read_data(path, columns=columns, filters=filters or None, dtypes=RESULT_DTYPES)
+        for path in paths
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def _format(results):
+    """Bring results into the columns, dtypes and row order of the store."""
+    if "se" not in results.columns:
+        results = results.assign(se=float("nan"))
+    results = results[RESULT_COLUMNS].astype(RESULT_DTYPES)
+    return results.sort_values(RESULT_INDEX, ignore_index=True)
@@ -1,117 +1,217 @@
 """Tasks running the core analyses."""
 
-import pickle
-
-import pandas as pd
 import pytask
 
-from epp_final.analysis.predict import (
-    data_processing,
-    gen_plot_data,
-    gen_plot_data3,
-    gen_plot_data_control,
-    rural_urban_dataframe,
-    year_data_split,
-    year_data_split3,
-)
-from epp_final.config import BLD
+from epp_final.analysis.results import write_results
+from epp_final.config import BLD, BOOTSTRAP_BANDS, CACHE_DIR, DATA_FORMAT, SRC
+from epp_final.data_management.schema import DTYPES, SAMPLE2_DTYPES
+from epp_final.session import Session
+from epp_final.utilities import read_data, write_data
+
+CHILD_COLUMNS = [
+    "CN1990A_SEX",
+    "CN1990A_NATION",
+    "CN1990A_HHTYA",
+    "CN1990A_BIRTHY",
+    "CN1990A_RELATE",
+    "count",
+]
+CHILD_FILTERS = [("CN1990A_RELATE", "==", 3), ("CN1990A_BIRTHY", ">=", 973)]
+BOOTSTRAP_DRAWS = 999
+BOOTSTRAP_SEED = 1990
+PERMUTATIONS = 999
+PERMUTATION_SEED = 1990
+RESULTS = BLD / "python" / "models" / "results"
+# Modules every task runs through the session and the results store.
+SESSION_SCRIPTS = [SRC / "session.py", SRC / "cache.py", "results.py"]
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["predict.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
+        "scripts": [*SESSION_SCRIPTS, "design.py", "predict.py"],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
     },
 )
-@pytask.mark.produces(BLD / "python" / "models" / "coef1990.pickle")
+@pytask.mark.produces(RESULTS / f"one_child.{DATA_FORMAT}")
 def task_fit_model_1990(depends_on, produces):
     """Fit a linear regression model (without controls and regional split)."""
-    data = pd.read_csv(depends_on["data"])
-    dataprocessed = data_processing(data)
-    year_data = year_data_split(dataprocessed)
-    coef = gen_plot_data(year_data)
-    with open(produces, "wb") as f:
-        pickle.dump(coef, f)
+    data = read_data(
+        depends_on["data"],
+        columns=CHILD_COLUMNS,
+        filters=CHILD_FILTERS,
+        dtypes=DTYPES,
+    )
+    results = Session(count_cube=data, cache=CACHE_DIR).results(["one_child"])
+    write_results(results, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["predict.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
-    },
-)
-@pytask.mark.produces(
-    {
-        "produces1": BLD / "python" / "models" / "dfa3_regional.pickle",
-        "produces2": BLD / "python" / "models" / "dfpesr_regional.pickle",
+        "scripts": [*SESSION_SCRIPTS, "design.py", "predict.py"],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
     },
 )
+@pytask.mark.produces(RESULTS / f"one_child_regional.{DATA_FORMAT}")
 def task_urabn_rural_data(depends_on, produces):
     """Fit regression model for rural and urban regions separately."""
-    data = pd.read_csv(depends_on["data"])
-    dataprocessed = data_processing(data)
-    year_data = year_data_split(dataprocessed)
-    dfa3_regional, dfpesr_regional = rural_urban_dataframe(year_data)
-    with open(produces["produces1"], "wb") as f:
-        pickle.dump(dfa3_regional, f)
-    with open(produces["produces2"], "wb") as f:
-        pickle.dump(dfpesr_regional, f)
+    data = read_data(
+        depends_on["data"],
+        columns=CHILD_COLUMNS,
+        filters=CHILD_FILTERS,
+        dtypes=DTYPES,
+    )
+    session = Session(count_cube=data, cache=CACHE_DIR)
+    write_results(session.results(["one_child_regional"]), produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["predict.py"],
-        "data": BLD / "python" / "data" / "Sample2.csv",
+        "scripts": [*SESSION_SCRIPTS, "design.py", "predict.py"],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
     },
 )
 @pytask.mark.produces(
-    {"produces1": BLD / "python" / "models" / "dfa3_control.pickle"},
+    {
+        "results": RESULTS / f"event_study.{DATA_FORMAT}",
+        "cov": BLD / "python" / "models" / f"event_study_cov.{DATA_FORMAT}",
+    },
 )
-def task_data_with_control(depends_on, produces):
-    """Fit a regression model with educational controls."""
-    data = pd.read_csv(depends_on["data"])
-    year_data = year_data_split(data)
-    X_variables_c = data.columns[[2, 8, 9, 11, 12, 13, 15, 16, 17, 3]]
-    dfa3_control = gen_plot_data_control(year_data, X_variables_c)
-    with open(produces["produces1"], "wb") as f:
-        pickle.dump(dfa3_control, f)
+def task_fit_event_study(depends_on, produces):
+    """Fit the effects of all birth years jointly, with robust standard errors."""
+    data = read_data(
+        depends_on["data"],
+        columns=CHILD_COLUMNS,
+        filters=CHILD_FILTERS,
+        dtypes=DTYPES,
+    )
+    session = Session(count_cube=data, cache=CACHE_DIR)
+    write_results(session.results(["event_study"]), produces["results"])
+    cov = session.event_study[1]
+    write_data(cov.rename_axis("coefficient").reset_index(), produces["cov"])
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["predict.py"],
-        "data": BLD / "python" / "data" / "Sample2.csv",
+        "scripts": [
+            *SESSION_SCRIPTS,
+            "design.py",
+            "grid.py",
+            "moments.py",
+            "predict.py",
+        ],
+        "data": BLD / "python" / "data" / f"Sample2.{DATA_FORMAT}",
     },
 )
 @pytask.mark.produces(
     {
-        "produces1": BLD / "python" / "models" / "dfa3_regional_control.pickle",
-        "produces2": BLD / "python" / "models" / "dfpesr_regional_control.pickle",
+        "control": RESULTS / f"one_child_control.{DATA_FORMAT}",
+        "grid": RESULTS / f"spec_grid.{DATA_FORMAT}",
     },
 )
-def task_urabn_rural_control(depends_on, produces):
-    """Fit regression model with educational controls for rural and urban."""
-    data = pd.read_csv(depends_on["data"])
-    year_data = year_data_split(data)
-    X_variables_c = data.columns[[2, 8, 9, 11, 12, 13, 15, 16, 17, 3]]
-    dfa3_regional_c, dfpesr_regional_c = rural_urban_dataframe(year_data, X_variables_c)
-    with open(produces["produces1"], "wb") as f:
-        pickle.dump(dfa3_regional_c, f)
-    with open(produces["produces2"], "wb") as f:
-        pickle.dump(dfpesr_regional_c, f)
+def task_fit_spec_grid(depends_on, produces):
+    """Fit the models with educational controls and all robustness specifications."""
+    data = read_data(
+        depends_on["data"],
+        filters=CHILD_FILTERS[1:],
+        dtypes=SAMPLE2_DTYPES,
+    )
+    session = Session(sample2=data, cache=CACHE_DIR)
+    write_results(session.results(["one_child_control"]), produces["control"])
+    write_results(session.results(["spec_grid"]), produces["grid"])
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["predict.py"],
-        "data": BLD / "python" / "data" / "triple_did.csv",
+        "scripts": [
+            *SESSION_SCRIPTS,
+            "design.py",
+            "predict.py",
+            SRC / "data_management" / "clean_data.py",
+        ],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
     },
 )
-@pytask.mark.produces(BLD / "python" / "models" / "coef_triple_did.pickle")
+@pytask.mark.produces(RESULTS / f"two_child.{DATA_FORMAT}")
 def task_fit_model_triple_did(depends_on, produces):
     """Fit a linear regression model (triple did)."""
-    data = pd.read_csv(depends_on["data"])
-    year_data = year_data_split3(data)
-    coef = gen_plot_data3(year_data)
-    with open(produces, "wb") as f:
-        pickle.dump(coef, f)
+    data = read_data(
+        depends_on["data"],
+        columns=CHILD_COLUMNS,
+        filters=[("CN1990A_BIRTHY", ">=", 980)],
+        dtypes=DTYPES,
+    )
+    results = Session(count_cube=data, cache=CACHE_DIR).results(["two_child"])
+    write_results(results, produces)
+
+
+@pytask.mark.depends_on(
+    {
+        "scripts": [
+            *SESSION_SCRIPTS,
+            "bootstrap.py",
+            "design.py",
+            "predict.py",
+            SRC / "data_management" / "clean_data.py",
+            SRC / "data_management" / "households.py",
+        ],
+        "data": BLD / "python" / "data" / f"data1990_raw.{DATA_FORMAT}",
+    },
+)
+@pytask.mark.produces(BLD / "python" / "models" / f"bootstrap_bands.{DATA_FORMAT}")
+@pytask.mark.skipif(
+    not BOOTSTRAP_BANDS,
+    reason="Set EPP_FINAL_BOOTSTRAP_BANDS=1 to draw the bands.",
+)
+def task_bootstrap_bands(depends_on, produces):
+    """Bootstrap confidence bands by resampling households."""
+    data = read_data(
+        depends_on["data"],
+        columns=["SERIAL", *CHILD_COLUMNS[:-1]],
+        filters=[CHILD_FILTERS[1]],
+        dtypes=DTYPES,
+    )
+    bands = Session(data, cache=CACHE_DIR).bootstrap_bands(
+        BOOTSTRAP_DRAWS,
+        BOOTSTRAP_SEED,
+        n_jobs=-1,
+    )
+    write_data(bands, produces)
+
+
+@pytask.mark.depends_on(
+    {
+        "scripts": [
+            *SESSION_SCRIPTS,
+            "design.py",
+            "permutation.py",
+            "predict.py",
+            SRC / "data_management" / "clean_data.py",
+            SRC / "data_management" / "households.py",
+        ],
+        "data": BLD / "python" / "data" / f"data1990_raw.{DATA_FORMAT}",
+    },
+)
+@pytask.mark.produces(
+    {
+        "p_values": BLD
+        / "python"
+        / "models"
+        / f"randomization_inference.{DATA_FORMAT}",
+        "permutations": BLD / "python" / "models" / f"permutations.{DATA_FORMAT}",
+    },
+)
+def task_randomization_inference(depends_on, produces):
+    """Randomization p-values by permuting Han status between households."""
+    data = read_data(
+        depends_on["data"],
+        columns=["SERIAL", *CHILD_COLUMNS[:-1]],
+        filters=[CHILD_FILTERS[1]],
+        dtypes=DTYPES,
+    )
+    p_values, permutations = Session(data, cache=CACHE_DIR).randomization_inference(
+        PERMUTATIONS,
+        PERMUTATION_SEED,
+        n_jobs=-1,
+    )
+    write_data(p_values, produces["p_values"])
+    write_data(permutations, produces["permutations"])
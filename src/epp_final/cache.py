@@ -0,0 +1,260 @@
+"""Content-addressed on-disk cache of expensive pipeline functions."""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from epp_final.config import CACHE_DIR, CACHE_SIZE
+
+
+def cached(func, directory=CACHE_DIR, max_size=CACHE_SIZE, ignore=()):
+    """Cache the results of a function on disk.
+
+    Results are stored under a hash of the arguments, i.e. of the contents of data
+    frames and arrays and of parameters such as ``X_variables``, and of the source of
+    the function, of the project functions and classes it uses and of the project
+    classes of its arguments, e.g. ``YearWindows``. A result is therefore reused
+    as long as neither the data nor the code computing it changes, whatever else
+    changed in the project. The key is computed before the function is called, and
+    a cache hit does not mutate the arguments like e.g. ``data_processing`` would.
+
+    Args:
+        func (callable): function with picklable results.
+        directory (str or pathlib.Path): directory of the cache.
+        max_size (int): size of the cache in bytes. The least recently used results
+            are removed when it is exceeded, 0 disables the cache.
+        ignore (list): names of arguments which do not change the result, e.g.
+            ``n_jobs``, and are left out of the key.
+
+    Returns:
+        callable: the cached function.
+
+    """
+    if max_size == 0:
+        return func
+    directory = Path(directory)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        path = directory / f"{cache_key(func, args, kwargs, ignore)}.pickle"
+        if path.exists():
+            _touch(path)
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        result = func(*args, **kwargs)
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+        _touch(path)
+        _evict(directory, max_size)
+        return result
+
+    return wrapper
+
+
+def cache_key(func, args, kwargs, ignore=()):
+    """Hash of a function call.
+
+    Args:
+        func (callable): function.
+        args (tuple): positional arguments.
+        kwargs (dict): keyword arguments.
+        ignore (list): names of arguments left out of the hash.
+
+    Returns:
+        str: hex digest.
+
+    """
+    if ignore:
+        arguments = inspect.signature(func).bind(*args, **kwargs)
+        arguments.apply_defaults()
+        for name in ignore:
+            arguments.arguments.pop(name, None)
+        args, kwargs = arguments.args, arguments.kwargs
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{func.__module__}.{func.__qualname__}".encode())
+    h.update(_source(func).encode())
+    for cls in _project_types((args, kwargs)):
+        h.update(_source(cls).encode())
+    _update(h, args)
+    _update(h, sorted(kwargs.items()))
+    return h.hexdigest()
+
+
+def _source(obj, seen=None):
+    """Source of a function or class and of the project objects it uses.
+
+    The functions, classes and constants used by a function, or by the methods of a
+    class, are followed, so that e.g. ``YearWindows.block`` is part of the source of
+    a class using year windows.
+
+    Args:
+        obj (callable): function or class.
+        seen (set, optional): objects already included.
+
+    Returns:
+        str: concatenated source code.
+
+    """
+    seen = set() if seen is None else seen
+    seen.add(obj)
+    sources = [_getsource(obj)]
+    if inspect.isclass(obj):
+        functions = [_method_function(member) for member in vars(obj).values()]
+        functions = [function for function in functions if function is not None]
+    else:
+        functions = [obj]
+    for function in functions:
+        codes = [function.__code__]
+        while codes:
+            code = codes.pop()
+            codes += [c for c in code.co_consts if inspect.iscode(c)]
+            for name in code.co_names:
+                used = function.__globals__.get(name)
+                if (
+                    (inspect.isfunction(used) or inspect.isclass(used))
+                    and used.__module__.startswith("epp_final")
+                    and used not in seen
+                ):
+                    sources.append(_source(used, seen))
+                elif isinstance(
+                    used,
+                    (bool, int, float, str, list, tuple, dict, range),
+                ):
+                    sources.append(f"{name} = {used!r}")
+    return "\n".join(sources)
+
+
+def _method_function(member):
+    """Function of a method, property or cached property, None for other members.
+
+    Args:
+        member: attribute of a class.
+
+    Returns:
+        function or None: the function.
+
+    """
+    if isinstance(member, (staticmethod, classmethod)):
+        member = member.__func__
+    elif isinstance(member, property):
+        member = member.fget
+    elif isinstance(member, functools.cached_property):
+        member = member.func
+    return member if inspect.isfunction(member) else None
+
+
+def _project_types(obj, types=None):
+    """Project classes of an object and of the items of its containers.
+
+    Args:
+        obj: object, e.g. the arguments of a call.
+        types (dict, optional): classes already found.
+
+    Returns:
+        list: classes defined in the project.
+
+    """
+    types = {} if types is None else types
+    if type(obj).__module__.startswith("epp_final"):
+        types[type(obj)] = None
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _project_types(item, types)
+    elif isinstance(obj, dict):
+        for item in obj.values():
+            _project_types(item, types)
+    return list(types)
+
+
+def _getsource(obj):
+    """Source of a function or class, or its bytecode if the source is unavailable.
+
+    Args:
+        obj (callable): function or class.
+
+    Returns:
+        str: source code.
+
+    """
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        code = getattr(obj, "__code__", None)
+        return repr(None if code is None else (code.co_code, code.co_consts))
+
+
+def _update(h, obj):
+    """Feed an object into a hash.
+
+    Objects with a ``__cache_key__`` method are hashed by the contents it returns,
+    e.g. the data of ``YearWindows``.
+
+    Args:
+        h (hashlib.blake2b): hash.
+        obj: data frame, array, container, object with ``__cache_key__`` or
+            picklable object.
+
+    """
+    if isinstance(obj, pd.DataFrame):
+        h.update(pickle.dumps(("DataFrame", list(obj.columns), list(obj.dtypes))))
+        h.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(pickle.dumps(("Series", obj.name, obj.dtype)))
+        h.update(pd.util.hash_pandas_object(obj).to_numpy().tobytes())
+    elif isinstance(obj, pd.Index):
+        _update(h, ("Index", list(obj)))
+    elif isinstance(obj, np.ndarray) and obj.dtype != object:
+        h.update(pickle.dumps(("ndarray", obj.dtype, obj.shape)))
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif hasattr(type(obj), "__cache_key__"):
+        _update(h, (type(obj).__qualname__, obj.__cache_key__()))
+    elif isinstance(obj, Mapping):
+        _update(h, ("Mapping", list(obj.items())))
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update(h, item)
+    else:
+        h.update(pickle.dumps(obj))
+
+
+def _touch(path):
+    """Mark a result as used now, at a finer resolution than the file system clock.
+
+    Args:
+        path (pathlib.Path): result file.
+
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _evict(directory, max_size):
+    """Remove the least recently used results until the cache fits its size.
+
+    Args:
+        directory (pathlib.Path): directory of the cache.
+        max_size (int): size of the cache in bytes.
+
+    """
+    entries = sorted(
+        (path.stat().st_mtime_ns, path.stat().st_size, path)
+        for path in directory.glob("*.pickle")
+    )
+    size = sum(entry[1] for entry in entries)
+    for _, entry_size, path in entries[:-1]:
+        if size <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        size -= entry_size
@@ -1,4 +1,6 @@
 """All the general configuration of the project."""
+
+import os
 from pathlib import Path
 
 SRC = Path(__file__).parent.resolve()
@@ -7,4 +9,41 @@ BLD = SRC.joinpath("..", "..", "bld").resolve()
 TEST_DIR = SRC.joinpath("..", "..", "tests").resolve()
 PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
-__all__ = ["BLD", "SRC", "TEST_DIR"]
+# Storage format of the data sets in BLD / "python" / "data", "csv" or "parquet".
+DATA_FORMAT = os.environ.get("EPP_FINAL_DATA_FORMAT", "csv")
+
+# Engine of the cleaning tasks, "pandas" or "duckdb" (out of core, see
+# ``epp_final.data_management.clean_data_sql``).
+ENGINE = os.environ.get("EPP_FINAL_ENGINE", "pandas")
+
+# Format of the figures in BLD / "python" / "figures", "png", "svg", "pdf" or "html"
+# (fast, needs no image renderer).
+FIGURE_FORMAT = os.environ.get("EPP_FINAL_FIGURE_FORMAT", "png")
+
+# Bootstrap confidence bands of the result figures, 1 to draw them. The bootstrap
+# refits all regressions 999 times, so the default build plots point estimates only.
+BOOTSTRAP_BANDS = bool(int(os.environ.get("EPP_FINAL_BOOTSTRAP_BANDS", 0)))
+
+# Cache of cleaned data and estimates, see ``epp_final.cache``. Its size is given in
+# bytes, 0 disables the cache.
+CACHE_DIR = BLD / "python" / "cache"
+CACHE_SIZE = int(os.environ.get("EPP_FINAL_CACHE_SIZE", 2**30))
+
+# Run reports of the pipeline, see ``epp_final.profiling``. Call profiles (cProfile)
+# are kept for the given number of slowest tasks, 0 runs the tasks without cProfile.
+PROFILE_DIR = BLD / "python" / "profile"
+PROFILE_TASKS = int(os.environ.get("EPP_FINAL_PROFILE_TASKS", 0))
+
+__all__ = [
+    "BLD",
+    "BOOTSTRAP_BANDS",
+    "CACHE_DIR",
+    "CACHE_SIZE",
+    "DATA_FORMAT",
+    "ENGINE",
+    "FIGURE_FORMAT",
+    "PROFILE_DIR",
+    "PROFILE_TASKS",
+    "SRC",
+    "TEST_DIR",
+]
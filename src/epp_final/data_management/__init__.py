@@ -1,17 +1,34 @@
 """Functions for managing data."""
 
 from epp_final.data_management.clean_data import (
+    clean_census_data_chunked,
+    clean_count_cube,
     clean_data_with_control,
     clean_fig1_data,
     clean_fig2_data,
     clean_raw_data,
+    clean_raw_data_chunked,
     clean_wage_data,
 )
+from epp_final.data_management.households import HouseholdIndex, link_members
+from epp_final.data_management.synthetic import (
+    synthetic_census,
+    synthetic_census_chunks,
+    write_synthetic_census,
+)
 
 __all__ = [
     clean_wage_data,
     clean_raw_data,
+    clean_raw_data_chunked,
+    clean_census_data_chunked,
     clean_data_with_control,
+    clean_count_cube,
     clean_fig1_data,
     clean_fig2_data,
+    HouseholdIndex,
+    link_members,
+    synthetic_census,
+    synthetic_census_chunks,
+    write_synthetic_census,
 ]
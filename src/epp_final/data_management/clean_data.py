@@ -3,23 +3,126 @@
 import numpy as np
 import pandas as pd
 
+from epp_final.data_management.households import HouseholdIndex, link_members
+from epp_final.data_management.schema import DTYPES
+from epp_final.utilities import set_dtypes, write_data_partitions
+
+_BIRTH_YEARS = range(945, 991)
+CUBE_COLUMNS = [
+    "CN1990A_BIRTHY",
+    "CN1990A_SEX",
+    "CN1990A_NATION",
+    "CN1990A_HHTYA",
+    "CN1990A_RELATE",
+    "CN1990A_EDLEV1",
+]
+
 
 def clean_raw_data(data, data_info):
-    """Generate data for year 1990.
+    """Generate data for one census year, 1990 by default.
 
     Args:
         data (pandas.DataFrame): raw data
+        data_info (dict): Information on the raw data, see ``data_info1990.yaml``.
+            The rows of the census "year" are kept with the variables in
+            "variable<year>", which get the types in "dtypes", int64 if they have
+            none.
 
     Returns:
-        pandas.DataFrame: The 1990 data set.
+        pandas.DataFrame: The data set of the census year.
 
     """
-    data1990 = data[data["YEAR"] == 1990].copy()
-    data1990_2000 = data1990.filter(like="2000", axis=1).copy()
-    data1990_no2000 = data1990.drop(data1990_2000.columns, axis=1).copy()
-    data1990_no2000 = data1990_no2000[data_info["variable1990"]].copy()
-    data1990_no2000 = data1990_no2000.astype("int64")
-    return data1990_no2000
+    year = data_info.get("year", 1990)
+    variables = data_info[f"variable{year}"]
+    census = data.loc[data["YEAR"] == year, variables]
+    dtypes = data_info.get("dtypes", {})
+    return set_dtypes(
+        census,
+        {name: dtypes.get(name, "int64") for name in variables},
+    )
+
+
+def clean_census_data_chunked(path, data_infos, produces, chunksize=500_000):
+    """Split the raw data into one data set per census year in a single pass.
+
+    Only ``YEAR`` and the variables of the census years are parsed, and every chunk
+    of the raw data is split into the census years with :func:`clean_raw_data` and
+    appended to their files. Peak memory therefore grows with ``chunksize`` and not
+    with the size of the raw file, and the raw file is read once for all years.
+
+    Args:
+        path (str or pathlib.Path): Path to the raw data.
+        data_infos (list): Information on the raw data of every census year, see
+            ``data_info1990.yaml`` and ``data_info2000.yaml``.
+        produces (dict): Path of the csv or parquet file to write by census year.
+        chunksize (int): Number of rows read at once.
+
+    Returns:
+        dict: Number of rows written by census year.
+
+    """
+    columns = raw_columns(path, data_infos)
+    with pd.read_csv(path, usecols=columns, chunksize=chunksize) as reader:
+        return write_data_partitions(
+            (
+                {info["year"]: clean_raw_data(chunk, info) for info in data_infos}
+                for chunk in reader
+            ),
+            produces,
+        )
+
+
+def raw_columns(path, data_infos):
+    """Columns of the raw data needed for the census years.
+
+    Args:
+        path (str or pathlib.Path): Path to the raw data.
+        data_infos (list): Information on the raw data of every census year, see
+            ``data_info1990.yaml`` and ``data_info2000.yaml``.
+
+    Returns:
+        list: ``YEAR`` and the variables of all census years.
+
+    Raises:
+        ValueError: If a variable of a census year is not in the header of the raw
+            data.
+
+    """
+    header = set(pd.read_csv(path, nrows=0).columns)
+    columns = ["YEAR"]
+    for data_info in data_infos:
+        year = data_info["year"]
+        variables = data_info[f"variable{year}"]
+        missing = [name for name in ["YEAR", *variables] if name not in header]
+        if missing:
+            info = (
+                f"The raw data {path} has no columns {missing}, check the variables "
+                f"of data_info{year}.yaml against its header."
+            )
+            raise ValueError(info)
+        columns.extend(variables)
+    return list(dict.fromkeys(columns))
+
+
+def clean_raw_data_chunked(path, data_info, produces, chunksize=500_000):
+    """Generate data for one census year by streaming the raw data in chunks.
+
+    See :func:`clean_census_data_chunked`.
+
+    Args:
+        path (str or pathlib.Path): Path to the raw data.
+        data_info (dict): Information on the raw data, see ``data_info1990.yaml``.
+        produces (str or pathlib.Path): Path of the csv or parquet file to write.
+        chunksize (int): Number of rows read at once.
+
+    Returns:
+        int: Number of rows written.
+
+    """
+    data_info = {"year": 1990, **data_info}
+    produces = {data_info["year"]: produces}
+    n_rows = clean_census_data_chunked(path, [data_info], produces, chunksize)
+    return n_rows[data_info["year"]]
 
 
 def _to_decimal(x):
@@ -54,207 +157,212 @@ def clean_wage_data(data):
     return wage_gap
 
 
-def clean_fig1_data(data):
-    """Generate data for figure 1.
+def clean_count_cube(data):
+    """Collapse the 1990 data into the number of individuals per cell.
+
+    All variables used in the figures and in the regressions without parental
+    controls are binary or have few values, so the millions of individuals collapse
+    to a few thousand cells. The figure data and the regressions can be computed
+    from the cells with the counts as frequency weights.
 
     Args:
         data (pd.DataFrame): data1990.csv
-        years: from 1945 to 1990
-        birth: dictionary with individuals' birth year and sex
-        birth_male: sum of male newborns by birth year
-        birth_female: sum of female newborns by birth year
-        birth_sex: sex ratio in each birth year.
+
+    Returns:
+        pd.DataFrame: one row per observed combination of ``CUBE_COLUMNS`` and the
+            number of individuals in column "count".
+
+    """
+    return data.groupby(CUBE_COLUMNS).size().reset_index(name="count")
+
+
+def _birth_sex_counts(data, by=(), weights=None):
+    """Count males and females by birth year in a single pass over the data.
+
+    Args:
+        data (pd.DataFrame): data1990.csv or the count cube.
+        by (list): Further keys (column names or pd.Series) to split the counts by,
+            they make up the outer levels of the index.
+        weights (str, optional): Column with the number of individuals per row.
+
+    Returns:
+        pd.DataFrame: Number of males (column 1) and females (column 2).
+
+    """
+    groups = data.groupby([*by, "CN1990A_BIRTHY", "CN1990A_SEX"])
+    counts = groups.size() if weights is None else groups[weights].sum()
+    return counts.unstack(fill_value=0).reindex(columns=[1, 2], fill_value=0)
+
+
+def clean_fig1_data(data, weights=None):
+    """Generate data for figure 1.
+
+    Args:
+        data (pd.DataFrame): data1990.csv or the count cube.
+        weights (str, optional): Column with the number of individuals per row.
 
     Returns:
         pd.DataFrame: birth_sex--sex ratios by birth cohorts.
 
     """
-    years = range(945, 991)
-    birth = {}
-    birth_male = {}
-    birth_female = {}
-    for year in years:
-        birth[year] = data[data["CN1990A_BIRTHY"] == year]
-        birth[year] = birth[year][["CN1990A_BIRTHY", "CN1990A_SEX"]]
-    birth_df = pd.concat(list(birth.values()))
-
-    for year in years:
-        birth_male[year] = birth_df.loc[
-            (birth_df["CN1990A_BIRTHY"] == year) & (birth_df["CN1990A_SEX"] == 1)
-        ].sum()
-    birth_male = pd.DataFrame(birth_male)
-    birth_male = birth_male.iloc[1:]
-
-    for year in years:
-        birth_female[year] = (
-            birth_df.loc[
-                (birth_df["CN1990A_BIRTHY"] == year) & (birth_df["CN1990A_SEX"] == 2)
-            ].sum()
-            / 2
-        )
-    birth_female = pd.DataFrame(birth_female)
-    birth_female = birth_female.iloc[1:]
-    birth_sex = pd.concat([birth_male, birth_female], axis=0)
-    birth_sex = birth_sex.div(birth_sex.shift(-1))
-    birth_sex.columns = range(1945, 1991)
-
-    birth_sex = birth_sex.dropna()
-    birth_sex = birth_sex.transpose()
+    counts = _birth_sex_counts(data, weights=weights)
+    counts = counts.reindex(_BIRTH_YEARS, fill_value=0)
+    birth_sex = pd.DataFrame({"CN1990A_SEX": counts[1] / counts[2]})
+    birth_sex = birth_sex.dropna(axis=1)
+    birth_sex.index = range(1945, 1991)
     birth_sex["Year"] = range(1945, 1991)
     return birth_sex
 
 
-def clean_fig2_data(data):
-    """Generate data for figure 1.
+def clean_fig2_data(data, weights=None):
+    """Generate data for figure 2.
 
     Args:
-        data (pd.DataFrame): data1990.csv
-        years: from 1945 to 1990
-        nation: dictionary with individuals' birth year, sex and nation
-        han_male: sum of han male newborns by birth year
-        han_female: sum of han female newborns by birth year
-        nohan_male: sum of minority male newborns by birth year
-        nohan_female:
+        data (pd.DataFrame): data1990.csv or the count cube.
+        weights (str, optional): Column with the number of individuals per row.
 
     Returns:
-        pd.DataFrame: birth_sex--sex ratios by birth cohorts.
+        pd.DataFrame: sex ratios by birth cohorts for Han and minorities.
 
     """
-    years = range(945, 991)
-    nation = {}
-    han_male = {}
-    nohan_male = {}
-    han_female = {}
-    nohan_female = {}
-
-    for year in years:
-        nation[year] = data[data["CN1990A_BIRTHY"] == year]
-        nation[year] = nation[year][["CN1990A_BIRTHY", "CN1990A_SEX", "CN1990A_NATION"]]
-    nation_df = pd.concat(list(nation.values()))
-    nation_df["CN1990A_NATION"].replace(list(range(2, 100)), 0, inplace=True)
-    han = nation_df[nation_df["CN1990A_NATION"] == 1]
-    nohan = nation_df[nation_df["CN1990A_NATION"] == 0]
-
-    for year in years:
-        han_male[year] = han.loc[
-            (han["CN1990A_BIRTHY"] == year) & (han["CN1990A_SEX"] == 1)
-        ].sum()
-    han_male = pd.DataFrame(han_male)
-    han_male = han_male.loc["CN1990A_SEX"]
-
-    for year in years:
-        han_female[year] = (
-            han.loc[(han["CN1990A_BIRTHY"] == year) & (han["CN1990A_SEX"] == 2)].sum()
-            / 2
-        )
-    han_female = pd.DataFrame(han_female)
-    han_female = han_female.loc["CN1990A_SEX"]
-    han_sex = han_male / han_female
-
-    for year in years:
-        nohan_male[year] = nohan.loc[
-            (nohan["CN1990A_BIRTHY"] == year) & (nohan["CN1990A_SEX"] == 1)
-        ].sum()
-    nohan_male = pd.DataFrame(nohan_male)
-    nohan_male = nohan_male.loc["CN1990A_SEX"]
-
-    for year in years:
-        nohan_female[year] = (
-            nohan.loc[
-                (nohan["CN1990A_BIRTHY"] == year) & (nohan["CN1990A_SEX"] == 2)
-            ].sum()
-            / 2
-        )
-    nohan_female = pd.DataFrame(nohan_female)
-    nohan_female = nohan_female.loc["CN1990A_SEX"]
-    nohan_sex = nohan_male / nohan_female
-    han_sex.name = "Han"
-    nohan_sex.name = "Minorities"
-    fig2_nation = pd.concat([han_sex, nohan_sex], axis=1).reset_index(drop=True)
+    nation = data["CN1990A_NATION"].replace(list(range(2, 100)), 0)
+    counts = _birth_sex_counts(data, by=[nation], weights=weights).reindex(
+        pd.MultiIndex.from_product([[1, 0], _BIRTH_YEARS]),
+        fill_value=0,
+    )
+    han = counts.loc[1]
+    nohan = counts.loc[0]
+    fig2_nation = pd.DataFrame(
+        {"Han": han[1] / han[2], "Minorities": nohan[1] / nohan[2]},
+    ).reset_index(drop=True)
     fig2_nation["Year"] = range(1945, 1991)
     return fig2_nation
 
 
-def clean_data_with_control(data1990_no2000):
+def clean_data_with_control(data1990_no2000, households=None):
     """Create the cleaned data with control variables.
 
+    Households are reduced to heads, spouses and children with boolean masks, and
+    children are linked to their parents within households through the household
+    index, so that the rows which are kept are copied exactly once and the input data
+    is left unchanged. Peak memory target: the input data plus at most three times
+    its size (the former implementation with repeated copies needed about ten times).
+    The output equals the one of the former implementation row by row, see
+    ``tests/data_management/test_clean_data.py``.
+
     Args:
         data1990_no2000 (pd.DataFrame): 1990 raw data.
+        households (HouseholdIndex, optional): index of the households of the data,
+            built from SERIAL if not given.
 
     Returns:
         pd.DataFrame: Sample 2 data in original paper.
 
+    Raises:
+        ValueError: if the household index is not the one of the data.
+
     """
-    data1990_no2000["CN1990A_SEX"].replace({2: 0}, inplace=True)
-    data1990_no2000["CN1990A_NATION"].replace(list(range(2, 100)), 0, inplace=True)
-    data1990_no2000["CN1990A_HHTYA"].replace([2, 9], 0, inplace=True)
-    data1990_no2000["Treat"] = np.zeros(data1990_no2000.shape[0], dtype="int")
-    data1990_no2000.loc[data1990_no2000["CN1990A_BIRTHY"] > 979, "Treat"] = 1
-    data1990_no2000["OneChildInteract"] = (
-        data1990_no2000["Treat"] * data1990_no2000["CN1990A_NATION"]
-    )
-    data1990_no2000.drop(
-        data1990_no2000[data1990_no2000["CN1990A_RELATE"] > 3].index,
-        inplace=True,
+    if households is None:
+        households = HouseholdIndex.from_serial(data1990_no2000["SERIAL"])
+    elif households.n_rows != data1990_no2000.shape[0]:
+        raise ValueError("The household index does not match the rows of the data.")
+    relate = data1990_no2000["CN1990A_RELATE"].to_numpy()
+    edu = data1990_no2000["CN1990A_EDLEV1"].to_numpy()
+    keep = (relate <= 3) & ((relate == 3) | (edu != 0))
+    keep &= (households.count(keep) >= 3)[households.household]
+    households = households.subset(keep)
+
+    sample2 = data1990_no2000.take(np.flatnonzero(keep))
+    sample2.index = pd.RangeIndex(sample2.shape[0])
+    sample2["CN1990A_SEX"] = sample2["CN1990A_SEX"].replace({2: 0})
+    nation = sample2["CN1990A_NATION"]
+    sample2["CN1990A_NATION"] = nation.mask(nation.between(2, 99), 0)
+    sample2["CN1990A_HHTYA"] = sample2["CN1990A_HHTYA"].replace([2, 9], 0)
+    sample2["Treat"] = (sample2["CN1990A_BIRTHY"] > 979).astype(DTYPES["Treat"])
+    sample2["OneChildInteract"] = sample2["Treat"] * sample2["CN1990A_NATION"]
+    sample2["CN1990A_EDLEV1"] = _education_labels(sample2["CN1990A_EDLEV1"])
+
+    parent = sample2["CN1990A_RELATE"].isin([1, 2])
+    father = parent & (sample2["CN1990A_SEX"] == 1)
+    mother = parent & (sample2["CN1990A_SEX"] == 0) & (sample2["CN1990A_BIRTHY"] >= 952)
+    child = (sample2["CN1990A_RELATE"] == 3) & (sample2["CN1990A_BIRTHY"] >= 973)
+    child = np.flatnonzero(child)
+    pairs, fathers = link_members(households, child, father)
+    child = child[pairs]
+    pairs, mothers = link_members(households, child, mother)
+    parents = sample2["CN1990A_EDLEV1"]
+    father_edu = _parent_education(parents[father]).take(
+        _rank(father)[fathers[pairs]],
     )
-    data1990_no2000.reset_index(drop=True, inplace=True)
-    sample2_data = data1990_no2000.copy()
-    NIU_edu = sample2_data[sample2_data["CN1990A_RELATE"] != 3]["CN1990A_EDLEV1"] == 0
-    drop_index = sample2_data[sample2_data["CN1990A_RELATE"] != 3].loc[NIU_edu, :].index
-    sample2_data.drop(drop_index, inplace=True)
-    data1990_group = sample2_data.groupby(["SERIAL"])
-    wl = np.array(list(data1990_group.groups.values()), dtype=object)
-    get_len = np.vectorize(len)
-    wl_drop = wl[get_len(wl) < 3]
-    wlf = [j for i in wl_drop for j in i]
-    sample2_true = sample2_data.drop(wlf)
-    sample2_true.reset_index(drop=True, inplace=True)
-    sample2_true["CN1990A_EDLEV1"].replace([4, 5, 6, 7], 4, inplace=True)
-    sample2_true["CN1990A_EDLEV1"].replace(
-        {1: "Illiterate", 2: "Primary", 3: "Junior", 4: "High"},
-        inplace=True,
+    mother_edu = _parent_education(parents[mother]).take(_rank(mother)[mothers])
+    common = father_edu.columns.intersection(mother_edu.columns)
+    return pd.concat(
+        [
+            sample2.take(child[pairs]).reset_index(drop=True),
+            *[
+                edu.rename(
+                    columns={name: f"{name}_{suffix}" for name in common},
+                ).reset_index(drop=True)
+                for edu, suffix in [(father_edu, "father"), (mother_edu, "mother")]
+            ],
+        ],
+        axis=1,
     )
-    HHH = sample2_true["CN1990A_RELATE"] == 1
-    HHS = sample2_true["CN1990A_RELATE"] == 2
-    HHC = sample2_true["CN1990A_RELATE"] == 3
-    HHM = sample2_true["CN1990A_SEX"] == 1
-    HHF = sample2_true["CN1990A_SEX"] == 0
-    HHH_male = HHH * HHM
-    HHH_female = HHH * HHF
-    HHSpouse_male = HHS * HHM
-    HHSpouse_female = HHS * HHF
-    Child = HHC
-    sample_father = sample2_true[HHH_male + HHSpouse_male].copy()
-    sample_mother = sample2_true[HHH_female + HHSpouse_female].copy()
-    sample_mother.drop(
-        sample_mother[sample_mother["CN1990A_BIRTHY"] < 952].index,
-        inplace=True,
-    )
-    sample_child = sample2_true[Child].copy()
-    sample_father_d = pd.get_dummies(sample_father, columns=["CN1990A_EDLEV1"]).copy()
-    sample_mother_d = pd.get_dummies(sample_mother, columns=["CN1990A_EDLEV1"]).copy()
-    edu = sample_father_d.iloc[:, [0, 9, 10, 11, 12]].columns
-    sample_parents_d = (
-        sample_father_d[edu]
-        .merge(
-            sample_mother_d[edu],
-            how="inner",
-            on="SERIAL",
-            suffixes=("_father", "_mother"),
-        )
-        .copy()
-    )
-    working_data = sample_child.merge(sample_parents_d, how="inner", on="SERIAL").copy()
-    working_data.drop(
-        working_data[working_data["CN1990A_BIRTHY"] < 973].index,
-        inplace=True,
+
+
+def _rank(mask):
+    """Position of every row among the rows for which a condition holds.
+
+    Args:
+        mask (pd.Series): boolean condition of every row.
+
+    Returns:
+        np.ndarray: position among the selected rows, meaningless for other rows.
+
+    """
+    return np.cumsum(mask.to_numpy()) - 1
+
+
+def _education_labels(edu):
+    """Label the education levels, levels 4 to 7 are merged into "High".
+
+    Args:
+        edu (pd.Series): CN1990A_EDLEV1.
+
+    Returns:
+        pd.Series: categorical with the labels in alphabetical order, levels without
+            a label (e.g. 0) are kept as strings.
+
+    """
+    edu = edu.mask(edu.between(4, 7), 4).astype("category")
+    labels = {1: "Illiterate", 2: "Primary", 3: "Junior", 4: "High"}
+    edu = edu.cat.rename_categories(
+        [labels.get(level, str(level)) for level in edu.cat.categories],
     )
-    return working_data
+    return edu.cat.reorder_categories(sorted(edu.cat.categories))
+
+
+def _parent_education(edu):
+    """Dummies for the first four education levels of parents.
+
+    Args:
+        edu (pd.Series): CN1990A_EDLEV1 of fathers or mothers in Sample 2.
+
+    Returns:
+        pd.DataFrame: the education dummies with a range index.
+
+    """
+    edu = edu.cat.remove_unused_categories().reset_index(drop=True)
+    return pd.get_dummies(edu, prefix="CN1990A_EDLEV1").iloc[:, :4]
 
 
 def clean_data_3did(data1990_no2000):
     """Create the cleaned data for triple diff-in-diff.
 
+    The interactions of Han, Treat and Hukou are not stored, the regressions build
+    them from these columns, see ``epp_final.analysis.design``. The input is left
+    unchanged.
+
     Args:
         data1990_no2000 (pd.DataFrame): 1990 raw data.
 
@@ -262,28 +370,10 @@ def clean_data_3did(data1990_no2000):
         pd.DataFrame: data for triple did estimation.
 
     """
-    data1990_no2000["CN1990A_SEX"].replace({2: 0}, inplace=True)
-    data1990_no2000["CN1990A_NATION"].replace(list(range(2, 100)), 0, inplace=True)
-    data1990_no2000["CN1990A_HHTYA"].replace({1: 0}, inplace=True)
-    data1990_no2000["CN1990A_HHTYA"].replace([2, 9], 1, inplace=True)
-    data1990_no2000.drop(
-        data1990_no2000[data1990_no2000["CN1990A_BIRTHY"] < 980].index,
-        inplace=True,
-    )
-    data1990_no2000.reset_index(drop=True, inplace=True)
-    data1990_no2000["Treat"] = np.zeros(data1990_no2000.shape[0], dtype="int")
-    data1990_no2000.loc[data1990_no2000["CN1990A_BIRTHY"] > 984, "Treat"] = 1
-    data1990_no2000["H*T"] = (
-        data1990_no2000["CN1990A_NATION"] * data1990_no2000["Treat"]
-    )
-    data1990_no2000["H*K"] = (
-        data1990_no2000["CN1990A_NATION"] * data1990_no2000["CN1990A_HHTYA"]
-    )
-    data1990_no2000["K*T"] = data1990_no2000["CN1990A_HHTYA"] * data1990_no2000["Treat"]
-    data1990_no2000["H*K*T"] = (
-        data1990_no2000["CN1990A_NATION"]
-        * data1990_no2000["CN1990A_HHTYA"]
-        * data1990_no2000["Treat"]
-    )
-
-    return data1990_no2000
+    data = data1990_no2000[data1990_no2000["CN1990A_BIRTHY"] >= 980]
+    return data.assign(
+        CN1990A_SEX=data["CN1990A_SEX"].replace({2: 0}),
+        CN1990A_NATION=data["CN1990A_NATION"].replace(list(range(2, 100)), 0),
+        CN1990A_HHTYA=data["CN1990A_HHTYA"].replace({1: 0}).replace([2, 9], 1),
+        Treat=(data["CN1990A_BIRTHY"] > 984).astype(DTYPES["Treat"]),
+    ).reset_index(drop=True)
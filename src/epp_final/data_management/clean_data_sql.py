@@ -0,0 +1,326 @@
+"""Cleaning steps as SQL queries run out of core by DuckDB.
+
+The queries read the csv or parquet files of the previous step and write their
+products directly, so the data never has to fit into memory: DuckDB runs them on all
+cores and spills to ``BLD / "python" / "duckdb"`` when memory gets scarce. Csv
+products are byte-identical to the ones of the pandas functions in
+``clean_data.py``, parquet products have the same schema and values. Rows are
+ordered like the pandas results, which follow the order of the input rows.
+
+"""
+
+from pathlib import Path
+
+from epp_final.config import BLD
+from epp_final.data_management.clean_data import (
+    CUBE_COLUMNS,
+    clean_fig1_data,
+    clean_fig2_data,
+    raw_columns,
+)
+from epp_final.data_management.schema import DTYPES, SAMPLE2_DTYPES
+
+_EDUCATION = {1: "Illiterate", 2: "Primary", 3: "Junior"}
+_SQL_TYPES = {
+    "int8": "TINYINT",
+    "int16": "SMALLINT",
+    "int32": "INTEGER",
+    "int64": "BIGINT",
+}
+
+
+def clean_raw_data_sql(path, data_info, produces):
+    """Generate data for one census year, see ``clean_raw_data``.
+
+    Args:
+        path (str or pathlib.Path): Path to the raw data.
+        data_info (dict): Information on the raw data, see ``data_info1990.yaml``.
+        produces (str or pathlib.Path): Path of the csv or parquet file to write.
+
+    """
+    data_info = {"year": 1990, **data_info}
+    clean_census_data_sql(path, [data_info], {data_info["year"]: produces})
+
+
+def clean_census_data_sql(path, data_infos, produces):
+    """Split the raw data into one data set per census year in a single scan.
+
+    See ``clean_census_data_chunked``. The raw data is scanned once into a table with
+    the variables of all census years, which DuckDB spills to disk if needed, and
+    every census year is copied from it.
+
+    Args:
+        path (str or pathlib.Path): Path to the raw data.
+        data_infos (list): Information on the raw data of every census year, see
+            ``data_info1990.yaml`` and ``data_info2000.yaml``.
+        produces (dict): Path of the csv or parquet file to write by census year.
+
+    """
+    columns = ", ".join(f'"{name}"' for name in raw_columns(path, data_infos))
+    with _connect() as con:
+        con.execute(f"CREATE TABLE raw AS SELECT {columns} FROM {_source(path)}")
+        for info in data_infos:
+            dtypes = info.get("dtypes", {})
+            selected = ", ".join(
+                _typed(name, dtypes.get(name, "int64"))
+                for name in info[f"variable{info['year']}"]
+            )
+            query = f"SELECT {selected} FROM raw WHERE YEAR = {info['year']}"
+            _copy(query, produces[info["year"]], con)
+
+
+def clean_count_cube_sql(path, produces):
+    """Collapse the 1990 data into the number of individuals per cell.
+
+    Args:
+        path (str or pathlib.Path): Path to data1990_raw.
+        produces (str or pathlib.Path): Path of the csv or parquet file to write.
+
+    """
+    columns = ", ".join(CUBE_COLUMNS)
+    query = f"""
+        SELECT {columns}, count(*) AS count FROM {_source(path)}
+        GROUP BY {columns} ORDER BY {columns}
+    """
+    _copy(query, produces)
+
+
+def clean_fig1_data_sql(path):
+    """Generate data for figure 1 from the count cube.
+
+    Args:
+        path (str or pathlib.Path): Path to the count cube.
+
+    Returns:
+        pd.DataFrame: birth_sex--sex ratios by birth cohorts, see ``clean_fig1_data``.
+
+    """
+    return clean_fig1_data(_cell_counts(path, []), weights="count")
+
+
+def clean_fig2_data_sql(path):
+    """Generate data for figure 2 from the count cube.
+
+    Args:
+        path (str or pathlib.Path): Path to the count cube.
+
+    Returns:
+        pd.DataFrame: sex ratios by birth cohorts for Han and minorities.
+
+    """
+    return clean_fig2_data(_cell_counts(path, ["CN1990A_NATION"]), weights="count")
+
+
+def _cell_counts(path, by):
+    """Number of individuals by birth year, sex and further variables since 1945.
+
+    Args:
+        path (str or pathlib.Path): Path to the count cube.
+        by (list): further variables.
+
+    Returns:
+        pd.DataFrame: cells and their number of individuals in column "count".
+
+    """
+    columns = ", ".join(["CN1990A_BIRTHY", "CN1990A_SEX", *by])
+    with _connect() as con:
+        return con.execute(
+            f"""
+            SELECT {columns}, sum(count)::BIGINT AS count FROM {_source(path)}
+            WHERE CN1990A_BIRTHY >= 945 GROUP BY {columns} ORDER BY {columns}
+            """,
+        ).df()
+
+
+def clean_data_with_control_sql(path, produces):
+    """Create the cleaned data with control variables, see ``clean_data_with_control``.
+
+    The pandas function keeps the children in the order of the input and each
+    child's fathers and mothers in the order of the input, which the query recovers
+    from the row ids of the loaded data. The education dummies of the parents are
+    the first four levels observed among the fathers and the mothers, respectively.
+
+    Args:
+        path (str or pathlib.Path): Path to data1990_raw.
+        produces (str or pathlib.Path): Path of the csv or parquet file to write.
+
+    """
+    with _connect() as con:
+        con.execute(f"CREATE TABLE data AS SELECT * FROM {_source(path)}")
+        columns = [name for name, *_ in con.execute("DESCRIBE data").fetchall()]
+        education = " ".join(
+            f"WHEN CN1990A_EDLEV1 = {level} THEN '{label}'"
+            for level, label in _EDUCATION.items()
+        )
+        recode = {
+            "CN1990A_SEX": "CASE WHEN CN1990A_SEX = 2 THEN 0 ELSE CN1990A_SEX END",
+            "CN1990A_NATION": "CASE WHEN CN1990A_NATION BETWEEN 2 AND 99 THEN 0 "
+            "ELSE CN1990A_NATION END",
+            "CN1990A_HHTYA": "CASE WHEN CN1990A_HHTYA IN (2, 9) THEN 0 "
+            "ELSE CN1990A_HHTYA END",
+            "CN1990A_EDLEV1": "CASE WHEN CN1990A_EDLEV1 BETWEEN 4 AND 7 THEN 'High' "
+            f"{education} ELSE CN1990A_EDLEV1::VARCHAR END",
+        }
+        sample2 = ", ".join(
+            _typed(name, SAMPLE2_DTYPES.get(name), recode.get(name, name))
+            for name in columns
+        )
+        treat = _typed("Treat", DTYPES["Treat"], "CN1990A_BIRTHY > 979")
+        interact = _typed(
+            "OneChildInteract",
+            DTYPES["OneChildInteract"],
+            "(CN1990A_BIRTHY > 979)::INTEGER * CN1990A_NATION",
+        )
+        con.execute(
+            f"""
+            CREATE TABLE sample2 AS
+            WITH kept AS (
+                SELECT rowid AS row_id, * FROM data
+                WHERE CN1990A_RELATE <= 3
+                AND (CN1990A_RELATE = 3 OR CN1990A_EDLEV1 != 0)
+                QUALIFY count(*) OVER (PARTITION BY SERIAL) >= 3
+            ),
+            recoded AS (SELECT row_id, {sample2} FROM kept)
+            SELECT *, {treat}, {interact} FROM recoded
+            """,
+        )
+        parents = {
+            "father": "CN1990A_SEX = 1",
+            "mother": "CN1990A_SEX = 0 AND CN1990A_BIRTHY >= 952",
+        }
+        dummies = []
+        for parent, condition in parents.items():
+            con.execute(
+                f"""
+                CREATE TABLE {parent} AS SELECT row_id, SERIAL, CN1990A_EDLEV1
+                FROM sample2 WHERE CN1990A_RELATE IN (1, 2) AND {condition}
+                """,
+            )
+            levels = con.execute(
+                f"SELECT DISTINCT CN1990A_EDLEV1 FROM {parent} ORDER BY 1",
+            ).fetchall()
+            dummies += [
+                _dummy(
+                    f"{parent}.CN1990A_EDLEV1 = '{level}'",
+                    f"CN1990A_EDLEV1_{level}_{parent}",
+                    produces,
+                )
+                for (level,) in levels[:4]
+            ]
+        child = ", ".join(
+            f"child.{name}" for name in [*columns, "Treat", "OneChildInteract"]
+        )
+        query = f"""
+            SELECT {child}, {", ".join(dummies)}
+            FROM sample2 AS child
+            JOIN father ON child.SERIAL = father.SERIAL
+            JOIN mother ON child.SERIAL = mother.SERIAL
+            WHERE child.CN1990A_RELATE = 3 AND child.CN1990A_BIRTHY >= 973
+            ORDER BY child.row_id, father.row_id, mother.row_id
+        """
+        _copy(query, produces, con)
+
+
+def _typed(name, dtype, expression=None):
+    """Select an expression stored with the SQL type of a pandas dtype.
+
+    Args:
+        name (str): name of the column.
+        dtype (str or None): dtype, see ``DTYPES``, the type of the expression is
+            kept for dtypes other than integers.
+        expression (str, optional): SQL expression, the column itself by default.
+
+    Returns:
+        str: SQL expression.
+
+    """
+    expression = expression or f'"{name}"'
+    if dtype not in _SQL_TYPES:
+        return f'{expression} AS "{name}"'
+    return f'({expression})::{_SQL_TYPES[dtype]} AS "{name}"'
+
+
+def _dummy(condition, name, produces):
+    """Select a dummy, written like pandas writes booleans.
+
+    Args:
+        condition (str): SQL condition.
+        name (str): name of the column.
+        produces (str or pathlib.Path): Path of the file written.
+
+    Returns:
+        str: SQL expression.
+
+    """
+    if Path(produces).suffix == ".parquet":
+        return f'({condition}) AS "{name}"'
+    return f"""CASE WHEN {condition} THEN 'True' ELSE 'False' END AS "{name}\""""
+
+
+def _source(path):
+    """Table function reading a csv or parquet file.
+
+    Args:
+        path (str or pathlib.Path): Path to file, the suffix selects the format.
+
+    Returns:
+        str: SQL expression.
+
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return f"read_parquet({_literal(path)})"
+    return f"read_csv({_literal(path)}, header = true)"
+
+
+def _copy(query, produces, con=None):
+    """Write the result of a query to a csv or parquet file.
+
+    Args:
+        query (str): SQL query.
+        produces (str or pathlib.Path): Path to file, the suffix selects the format.
+        con (duckdb.DuckDBPyConnection, optional): connection, a new one by default.
+
+    """
+    produces = Path(produces)
+    if produces.suffix == ".parquet":
+        options = "FORMAT parquet, COMPRESSION zstd"
+    else:
+        options = "FORMAT csv, HEADER true"
+    statement = f"COPY ({query}) TO {_literal(produces)} ({options})"
+    if con is not None:
+        con.execute(statement)
+        return
+    with _connect() as con:
+        con.execute(statement)
+
+
+def _literal(path):
+    """SQL string literal of a path, quotes in the path are escaped.
+
+    Args:
+        path (str or pathlib.Path): path.
+
+    Returns:
+        str: SQL expression.
+
+    """
+    quoted = str(path).replace("'", "''")
+    return f"'{quoted}'"
+
+
+def _connect():
+    """Open a DuckDB database which keeps the input order and spills to disk.
+
+    Returns:
+        duckdb.DuckDBPyConnection: connection.
+
+    """
+    import duckdb
+
+    return duckdb.connect(
+        config={
+            "preserve_insertion_order": True,
+            "temp_directory": str(BLD / "python" / "duckdb"),
+        },
+    )
@@ -0,0 +1,196 @@
+"""Index of the households of a data set by SERIAL.
+
+The rows of every household are a range of an array of row positions sorted by
+SERIAL, given by an array of offsets like a CSR sparse matrix. Household sizes, the
+first member of every household and the linking of members within households are
+therefore array operations of linear cost instead of a groupby or merge on SERIAL
+each time.
+
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+
+class HouseholdIndex:
+    """Rows of every household of a data set.
+
+    Households are numbered in the order of their SERIAL.
+
+    Attributes:
+        order (np.ndarray): row positions sorted by SERIAL, stable within households.
+        offsets (np.ndarray): household i has the rows ``order[offsets[i]:offsets[i
+            + 1]]``.
+        serial (np.ndarray): SERIAL of every household.
+
+    """
+
+    def __init__(self, order, offsets, serial):
+        """Store the arrays describing the groups."""
+        self.order = order
+        self.offsets = offsets
+        self.serial = serial
+
+    @classmethod
+    def from_serial(cls, serial):
+        """Build the index from the SERIAL of every row.
+
+        Sorting is skipped if the rows are already sorted by SERIAL, as in the
+        census, so that the index is built in linear time.
+
+        Args:
+            serial (pd.Series or np.ndarray): SERIAL of every row.
+
+        Returns:
+            HouseholdIndex: index of the households.
+
+        """
+        serial = np.asarray(serial)
+        if np.all(serial[1:] >= serial[:-1]):
+            order = np.arange(serial.shape[0])
+        else:
+            order = np.argsort(serial, kind="stable")
+        sorted_serial = serial[order]
+        first = np.flatnonzero(sorted_serial[1:] != sorted_serial[:-1]) + 1
+        first = np.r_[0, first] if serial.shape[0] else first
+        return cls(order, np.append(first, serial.shape[0]), sorted_serial[first])
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by ``save``.
+
+        Args:
+            path (str or pathlib.Path): path of the npz file.
+
+        Returns:
+            HouseholdIndex: index of the households.
+
+        """
+        with np.load(path) as arrays:
+            return cls(arrays["order"], arrays["offsets"], arrays["serial"])
+
+    def save(self, path):
+        """Write the index as npz file.
+
+        Args:
+            path (str or pathlib.Path): path of the npz file.
+
+        """
+        with open(path, "wb") as file:
+            np.savez(file, order=self.order, offsets=self.offsets, serial=self.serial)
+
+    def __len__(self):
+        """Number of households."""
+        return self.serial.shape[0]
+
+    def __cache_key__(self):
+        """Contents identifying the index, see ``epp_final.cache``."""
+        return self.order, self.offsets, self.serial
+
+    @property
+    def n_rows(self):
+        """int: number of rows of the data set."""
+        return self.order.shape[0]
+
+    @property
+    def sizes(self):
+        """np.ndarray: number of rows of every household."""
+        return np.diff(self.offsets)
+
+    @cached_property
+    def household(self):
+        """np.ndarray: household of every row."""
+        household = np.empty(self.n_rows, dtype=np.int64)
+        household[self.order] = np.repeat(np.arange(len(self)), self.sizes)
+        return household
+
+    def count(self, mask):
+        """Number of rows of every household for which a condition holds.
+
+        Args:
+            mask (np.ndarray or pd.Series): boolean condition of every row.
+
+        Returns:
+            np.ndarray: number of rows by household.
+
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        mask = np.asarray(mask, dtype=np.int64)[self.order]
+        return np.add.reduceat(mask, self.offsets[:-1])
+
+    def first(self, values):
+        """Value of the first row of every household.
+
+        Args:
+            values (np.ndarray or pd.Series): value of every row.
+
+        Returns:
+            np.ndarray: value by household.
+
+        """
+        return np.asarray(values)[self.order[self.offsets[:-1]]]
+
+    def members(self, mask):
+        """Rows for which a condition holds, grouped by household.
+
+        Args:
+            mask (np.ndarray or pd.Series): boolean condition of every row.
+
+        Returns:
+            tuple: the row positions (np.ndarray) sorted by household, stable within
+                households, and the offsets (np.ndarray) of every household in them.
+
+        """
+        mask = np.asarray(mask)
+        rows = self.order[mask[self.order]]
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(self.count(mask), out=offsets[1:])
+        return rows, offsets
+
+    def subset(self, mask):
+        """Index of the data set reduced to the rows for which a condition holds.
+
+        Args:
+            mask (np.ndarray or pd.Series): boolean condition of every row.
+
+        Returns:
+            HouseholdIndex: index of the kept rows, households without kept rows are
+                dropped.
+
+        """
+        mask = np.asarray(mask)
+        rows, offsets = self.members(mask)
+        position = np.cumsum(mask) - 1
+        nonempty = np.diff(offsets) > 0
+        return HouseholdIndex(
+            position[rows],
+            np.append(offsets[:-1][nonempty], offsets[-1]),
+            self.serial[nonempty],
+        )
+
+
+def link_members(index, rows, mask):
+    """Pair rows with every member of their household for which a condition holds.
+
+    The pairs are ordered by the given rows and then by the members in their order
+    in the data, like the rows of an inner merge on SERIAL of data sorted by SERIAL.
+
+    Args:
+        index (HouseholdIndex): index of the households of the data set.
+        rows (np.ndarray): row positions, e.g. of children.
+        mask (np.ndarray or pd.Series): boolean condition of the members, e.g. of
+            fathers.
+
+    Returns:
+        tuple: the position in ``rows`` (np.ndarray) and the row position of the
+            member (np.ndarray) of every pair.
+
+    """
+    members, offsets = index.members(mask)
+    household = index.household[rows]
+    n_members = np.diff(offsets)[household]
+    pairs = np.repeat(np.arange(rows.shape[0]), n_members)
+    rank = np.arange(pairs.shape[0]) - (np.cumsum(n_members) - n_members)[pairs]
+    return pairs, members[offsets[household[pairs]] + rank]
@@ -0,0 +1,8 @@
+"""Storage types of the census variables, see ``data_info1990.yaml``."""
+
+from epp_final.config import SRC
+from epp_final.utilities import read_yaml
+
+DTYPES = read_yaml(SRC / "data_management" / "data_info1990.yaml")["dtypes"]
+# Sample 2 stores the education of children and parents as labels.
+SAMPLE2_DTYPES = {**DTYPES, "CN1990A_EDLEV1": "category"}
@@ -0,0 +1,144 @@
+"""Synthetic census extracts with the structure of the IPUMS raw data."""
+
+import numpy as np
+import pandas as pd
+
+from epp_final.utilities import write_data_chunks
+
+# Number of children by residence, rural (HHTYA 1) and urban (HHTYA 2).
+_CHILDREN_P = {1: [0.08, 0.22, 0.35, 0.22, 0.13], 2: [0.12, 0.55, 0.25, 0.06, 0.02]}
+_EDUCATION_P = [0.05, 0.2, 0.3, 0.25, 0.1, 0.05, 0.03, 0.02]
+# Members per household: head, spouse, four children and one other relative.
+_SLOTS = 7
+# Expected number of persons per household, used to convert rows into households.
+PERSONS_PER_HOUSEHOLD = 3.67
+
+
+def synthetic_census(n_households, seed=0, first_serial=1):
+    """Draw households of the 1990 and 2000 censuses.
+
+    Every household has a head, a spouse with probability 0.9, up to four children
+    born until 1990 and another relative with probability 0.2, so there are about
+    four persons per household. Persons of a household are consecutive rows with
+    increasing PERN.
+    Ethnicity and residence (hukou) are household characteristics. Sons are more
+    likely among Han children born after 1979, so the one-child policy effect of the
+    analysis is positive.
+
+    Args:
+        n_households (int): number of households.
+        seed (int or np.random.SeedSequence): seed of the random number generator.
+        first_serial (int): SERIAL of the first household.
+
+    Returns:
+        pd.DataFrame: persons with the columns of ``raw_data.csv``.
+
+    """
+    rng = np.random.default_rng(seed)
+    H = n_households
+    year = np.where(rng.random(H) < 0.7, 1990, 2000)
+    nation = np.where(rng.random(H) < 0.92, 1, rng.integers(2, 57, H))
+    hukou = rng.choice([1, 2, 9], size=H, p=[0.7, 0.28, 0.02])
+    head_birth = rng.integers(925, 968, H)
+    head_sex = np.where(rng.random(H) < 0.9, 1, 2)
+
+    present = np.zeros((H, _SLOTS), dtype=bool)
+    relate = np.zeros((H, _SLOTS), dtype="int64")
+    birth = np.zeros((H, _SLOTS), dtype="int64")
+    sex = np.zeros((H, _SLOTS), dtype="int64")
+    present[:, 0], relate[:, 0], birth[:, 0], sex[:, 0] = True, 1, head_birth, head_sex
+    present[:, 1] = rng.random(H) < 0.9
+    relate[:, 1] = 2
+    birth[:, 1] = head_birth + rng.integers(-3, 6, H)
+    sex[:, 1] = 3 - head_sex
+
+    n_children = np.where(
+        hukou == 1,
+        rng.choice(5, size=H, p=_CHILDREN_P[1]),
+        rng.choice(5, size=H, p=_CHILDREN_P[2]),
+    )
+    children = slice(2, 6)
+    relate[:, children] = 3
+    birth[:, children] = head_birth[:, None] + rng.integers(20, 40, (H, 4))
+    # Children born after the census are not drawn.
+    present[:, children] = (np.arange(4) < n_children[:, None]) & (
+        birth[:, children] <= 990
+    )
+    male_p = np.where((nation[:, None] == 1) & (birth[:, children] >= 980), 0.54, 0.515)
+    sex[:, children] = np.where(rng.random((H, 4)) < male_p, 1, 2)
+
+    present[:, 6] = rng.random(H) < 0.2
+    relate[:, 6] = rng.integers(4, 9, H)
+    birth[:, 6] = rng.integers(915, 991, H)
+    sex[:, 6] = rng.integers(1, 3, H)
+
+    education = rng.choice(8, size=(H, _SLOTS), p=_EDUCATION_P)
+    education[birth >= 983] = 0
+    household = np.broadcast_to(np.arange(H)[:, None], (H, _SLOTS))[present]
+    year = year[household]
+    birth = birth[present]
+    persons = pd.DataFrame(
+        {
+            "YEAR": year,
+            "SERIAL": first_serial + household,
+            "PERWT": 1.0,
+            "CN1990A_SEX": sex[present],
+            "CN1990A_NATION": nation[household],
+            "CN1990A_HHTYA": hukou[household],
+            "CN1990A_BIRTHY": birth,
+            "CN1990A_RELATE": relate[present],
+            "CN1990A_EDLEV1": education[present],
+            "CN1990A_PERN": np.cumsum(present, axis=1)[present],
+        },
+    )
+    # The 2000 variables hold the same values for the 2000 census and 0 otherwise.
+    variables = [name for name in persons if name.startswith("CN1990A_")]
+    for name in variables:
+        persons[name.replace("1990", "2000")] = np.where(
+            year == 2000,
+            persons[name],
+            0,
+        )
+    return persons
+
+
+def synthetic_census_chunks(n_households, seed=0, chunksize=250_000):
+    """Draw a synthetic census in chunks of households.
+
+    Every chunk has its own random stream spawned from ``seed``, so the data only
+    depends on ``seed`` and ``chunksize``, and extracts larger than memory can be
+    written chunk by chunk.
+
+    Args:
+        n_households (int): number of households.
+        seed (int): seed of the random number generator.
+        chunksize (int): number of households per chunk.
+
+    Yields:
+        pd.DataFrame: persons of the next chunk of households.
+
+    """
+    seeds = np.random.SeedSequence(seed).spawn(-(-n_households // chunksize))
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunksize
+        size = min(chunksize, n_households - start)
+        yield synthetic_census(size, chunk_seed, first_serial=start + 1)
+
+
+def write_synthetic_census(path, n_households, seed=0, chunksize=250_000):
+    """Write a synthetic raw data set to a csv or parquet file.
+
+    Args:
+        path (str or pathlib.Path): path of the file.
+        n_households (int): number of households.
+        seed (int): seed of the random number generator.
+        chunksize (int): number of households per chunk.
+
+    Returns:
+        int: number of rows written.
+
+    """
+    return write_data_chunks(
+        synthetic_census_chunks(n_households, seed, chunksize),
+        path,
+    )
@@ -3,96 +3,166 @@
 import pandas as pd
 import pytask
 
-from epp_final.config import BLD, SRC
+from epp_final.cache import cached
+from epp_final.config import BLD, DATA_FORMAT, ENGINE, SRC
 from epp_final.data_management.clean_data import (
-    clean_data_3did,
+    CUBE_COLUMNS,
+    clean_census_data_chunked,
+    clean_count_cube,
     clean_data_with_control,
     clean_fig1_data,
     clean_fig2_data,
-    clean_raw_data,
     clean_wage_data,
 )
-from epp_final.utilities import read_yaml
+from epp_final.data_management.clean_data_sql import (
+    clean_census_data_sql,
+    clean_count_cube_sql,
+    clean_data_with_control_sql,
+    clean_fig1_data_sql,
+    clean_fig2_data_sql,
+)
+from epp_final.data_management.households import HouseholdIndex
+from epp_final.data_management.schema import DTYPES
+from epp_final.utilities import read_data, read_yaml, write_data
+
+# Census years in the raw data, each is written to its own data set data<year>_raw.
+CENSUS_YEARS = [1990, 2000]
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["clean_data.py"],
-        "data_info": SRC / "data_management" / "data_info1990.yaml",
+        "scripts": ["clean_data.py", "clean_data_sql.py"],
+        **{
+            f"data_info{year}": SRC / "data_management" / f"data_info{year}.yaml"
+            for year in CENSUS_YEARS
+        },
         "data": SRC / "data" / "raw_data.csv",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "data1990_raw.csv")
-def task_clean_data_1990(depends_on, produces):
-    """Clean the data (Python version)."""
-    data_info = read_yaml(depends_on["data_info"])
-    data = pd.read_csv(depends_on["data"])
-    data = clean_raw_data(data, data_info)
-    data.to_csv(produces, index=False)
+@pytask.mark.produces(
+    {
+        year: BLD / "python" / "data" / f"data{year}_raw.{DATA_FORMAT}"
+        for year in CENSUS_YEARS
+    },
+)
+def task_clean_census_data(depends_on, produces):
+    """Split the raw data into one data set per census year in a single pass."""
+    data_infos = [read_yaml(depends_on[f"data_info{year}"]) for year in CENSUS_YEARS]
+    if ENGINE == "duckdb":
+        clean_census_data_sql(depends_on["data"], data_infos, produces)
+        return
+    clean_census_data_chunked(
+        depends_on["data"],
+        data_infos,
+        produces,
+        chunksize=min(info["chunksize"] for info in data_infos),
+    )
 
 
 @pytask.mark.depends_on(
     {"scripts": ["clean_data.py"], "data": SRC / "data" / "wage.xlsx"},
 )
-@pytask.mark.produces(BLD / "python" / "data" / "wage_gap.csv")
+@pytask.mark.produces(BLD / "python" / "data" / f"wage_gap.{DATA_FORMAT}")
 def task_clean_wage_data(depends_on, produces):
     """Creat the wage gap data."""
     data = pd.read_excel(depends_on["data"], index_col=None)
     data = clean_wage_data(data)
-    data.to_csv(produces, index=False)
+    write_data(data, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["clean_data.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
+        "scripts": ["clean_data.py", "clean_data_sql.py", SRC / "cache.py"],
+        "data": BLD / "python" / "data" / f"data1990_raw.{DATA_FORMAT}",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "fig1_data.csv")
+@pytask.mark.produces(BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}")
+def task_clean_count_cube(depends_on, produces):
+    """Collapse the 1990 data into cell counts."""
+    if ENGINE == "duckdb":
+        clean_count_cube_sql(depends_on["data"], produces)
+        return
+    data = read_data(depends_on["data"], columns=CUBE_COLUMNS, dtypes=DTYPES)
+    data = cached(clean_count_cube)(data)
+    write_data(data, produces)
+
+
+@pytask.mark.depends_on(
+    {
+        "scripts": ["clean_data.py", "clean_data_sql.py"],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
+    },
+)
+@pytask.mark.produces(BLD / "python" / "data" / f"fig1_data.{DATA_FORMAT}")
 def task_clean_fig1_data(depends_on, produces):
     """Generate fig1 data."""
-    data = pd.read_csv(depends_on["data"])
-    data = clean_fig1_data(data)
-    data.to_csv(produces, index=False)
+    if ENGINE == "duckdb":
+        write_data(clean_fig1_data_sql(depends_on["data"]), produces)
+        return
+    data = read_data(
+        depends_on["data"],
+        columns=["CN1990A_BIRTHY", "CN1990A_SEX", "count"],
+        filters=[("CN1990A_BIRTHY", ">=", 945)],
+        dtypes=DTYPES,
+    )
+    data = clean_fig1_data(data, weights="count")
+    write_data(data, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["clean_data.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
+        "scripts": ["clean_data.py", "clean_data_sql.py"],
+        "data": BLD / "python" / "data" / f"count_cube.{DATA_FORMAT}",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "fig2_data.csv")
+@pytask.mark.produces(BLD / "python" / "data" / f"fig2_data.{DATA_FORMAT}")
 def task_clean_fig2_data(depends_on, produces):
     """Generate fig2 data."""
-    data = pd.read_csv(depends_on["data"])
-    data = clean_fig2_data(data)
-    data.to_csv(produces, index=False)
+    if ENGINE == "duckdb":
+        write_data(clean_fig2_data_sql(depends_on["data"]), produces)
+        return
+    data = read_data(
+        depends_on["data"],
+        columns=["CN1990A_BIRTHY", "CN1990A_SEX", "CN1990A_NATION", "count"],
+        filters=[("CN1990A_BIRTHY", ">=", 945)],
+        dtypes=DTYPES,
+    )
+    data = clean_fig2_data(data, weights="count")
+    write_data(data, produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["clean_data.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
+        "scripts": ["households.py"],
+        "data": BLD / "python" / "data" / f"data1990_raw.{DATA_FORMAT}",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "Sample2.csv")
-def task_clean_data_with_control(depends_on, produces):
-    """Create sample 2 data (Python version)."""
-    data = pd.read_csv(depends_on["data"])
-    data = clean_data_with_control(data)
-    data.to_csv(produces, index=False)
+@pytask.mark.produces(BLD / "python" / "data" / "data1990_raw_households.npz")
+def task_household_index(depends_on, produces):
+    """Index the households of the 1990 data by SERIAL."""
+    serial = read_data(depends_on["data"], columns=["SERIAL"], dtypes=DTYPES)
+    HouseholdIndex.from_serial(serial["SERIAL"]).save(produces)
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["clean_data.py"],
-        "data": BLD / "python" / "data" / "data1990_raw.csv",
+        "scripts": [
+            "clean_data.py",
+            "clean_data_sql.py",
+            "households.py",
+            SRC / "cache.py",
+        ],
+        "data": BLD / "python" / "data" / f"data1990_raw.{DATA_FORMAT}",
+        "households": BLD / "python" / "data" / "data1990_raw_households.npz",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "triple_did.csv")
-def task_clean_data_3did(depends_on, produces):
-    """Create triple did data (Python version)."""
-    data = pd.read_csv(depends_on["data"])
-    data = clean_data_3did(data)
-    data.to_csv(produces, index=False)
+@pytask.mark.produces(BLD / "python" / "data" / f"Sample2.{DATA_FORMAT}")
+def task_clean_data_with_control(depends_on, produces):
+    """Create sample 2 data (Python version)."""
+    if ENGINE == "duckdb":
+        clean_data_with_control_sql(depends_on["data"], produces)
+        return
+    data = read_data(depends_on["data"], dtypes=DTYPES)
+    households = HouseholdIndex.load(depends_on["households"])
+    data = cached(clean_data_with_control)(data, households)
+    write_data(data, produces)
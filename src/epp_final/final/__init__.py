@@ -1,5 +1,21 @@
 """Functions for formatting results."""
 
-from epp_final.final.plot import plot_results, plot_results_regional, reformat_data
+from epp_final.final.export import export_figures
+from epp_final.final.plot import (
+    figure_data,
+    plot_descriptive,
+    plot_results,
+    plot_results3,
+    plot_results_all,
+    plot_results_regional,
+)
 
-__all__ = [reformat_data, plot_results, plot_results_regional]
+__all__ = [
+    figure_data,
+    plot_results,
+    plot_results_regional,
+    plot_results_all,
+    plot_results3,
+    plot_descriptive,
+    export_figures,
+]
@@ -0,0 +1,75 @@
+"""Export of figures as images or html files."""
+
+import contextlib
+import json
+import time
+from pathlib import Path
+
+IMAGE_FORMATS = ["png", "svg", "pdf"]
+
+
+def export_figures(figures, produces, report=None):
+    """Export figures, all images through one exporter session.
+
+    The format of a figure follows the suffix of its path. Images ("png", "svg" and
+    "pdf") are rendered by kaleido, which is started once for all figures instead of
+    once per figure. Html files need no renderer, they load plotly.js from its CDN,
+    so they are much faster to write and stay interactive.
+
+    Args:
+        figures (dict): plotly figures by name.
+        produces (dict): paths by name, at least for all figures.
+        report (str or pathlib.Path, optional): json file to write the render time
+            of every figure to.
+
+    Returns:
+        dict: render time in seconds by name.
+
+    """
+    paths = {name: Path(produces[name]) for name in figures}
+    images = [path for path in paths.values() if path.suffix[1:] in IMAGE_FORMATS]
+    timings = {}
+    with _exporter() if images else contextlib.nullcontext():
+        for name, fig in figures.items():
+            start = time.perf_counter()
+            _write(fig, paths[name])
+            timings[name] = time.perf_counter() - start
+    if report is not None:
+        Path(report).write_text(json.dumps(timings, indent=2) + "\n")
+    return timings
+
+
+def _write(fig, path):
+    """Write a figure to an image or html file.
+
+    Args:
+        fig (plotly.graph_objects.Figure): figure.
+        path (pathlib.Path): path, the suffix selects the format.
+
+    """
+    if path.suffix == ".html":
+        fig.write_html(path, include_plotlyjs="cdn")
+    else:
+        fig.write_image(path)
+
+
+@contextlib.contextmanager
+def _exporter():
+    """Keep one kaleido renderer running while the figures are exported.
+
+    kaleido 1 starts a new browser for every export unless a sync server is
+    running. Earlier versions keep their renderer alive on their own.
+
+    """
+    try:
+        import kaleido
+    except ImportError:
+        kaleido = None
+    if not hasattr(kaleido, "start_sync_server"):
+        yield
+        return
+    kaleido.start_sync_server()
+    try:
+        yield
+    finally:
+        kaleido.stop_sync_server()
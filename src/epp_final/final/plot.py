@@ -1,31 +1,44 @@
-"""Functions plotting results."""
-import plotly.express as px
-import plotly.graph_objects as go
+"""Functions plotting results.
 
+plotly is only imported by the functions which draw figures, so that importing the
+tasks, e.g. when pytask collects them, does not pay for it.
 
-def reformat_data(data):
-    """Reformat data into separated lists.
+"""
+
+
+def figure_data(results, specification, coefficient, *, regional=False):
+    """Select the data of a figure from the estimation results.
 
     Args:
-        data (dict): regression coefficients
+        results (pd.DataFrame): results in the long format of the results store, see
+            ``epp_final.analysis.results``.
+        specification (str): name of the specification.
+        coefficient (str): name of the coefficient.
+        regional (bool): whether to select the estimates of rural and urban areas
+            instead of the whole country.
 
     Returns:
-        list: list of coefficients for different years.
+        pd.DataFrame: birth year (x) and estimate (y), with the region if regional.
 
     """
-    Pesr_all = []
-    a3_all = []
-    for i in range(980, 991):
-        Pesr_all.append(data[f"{i}"][4])
-        a3_all.append(data[f"{i}"][3])
-    return a3_all, Pesr_all
+    select = (results["specification"] == specification) & (
+        results["coefficient"] == coefficient
+    )
+    whole_country = results["region"] == "All"
+    select &= ~whole_country if regional else whole_country
+    columns = {"birth_year": "x", "estimate": "y", "region": "region"}
+    data = results.loc[select, list(columns)].rename(columns=columns)
+    data = data.sort_values(["region", "x"], ignore_index=True)
+    data["x"] = data["x"].astype("int64")
+    return data if regional else data.drop(columns="region")
 
 
 def plot_results(df, label, title):
     """Plot with plotly.
 
     Args:
-        df (pd.DataFrame): coefficients (y) and year (x)
+        df (pd.DataFrame): coefficients (y) and year (x), optionally with confidence
+            bands (lower, upper)
         label (dict): dict for x and y
         title (string): figure title
 
@@ -33,14 +46,18 @@ def plot_results(df, label, title):
         px.fig: figure
 
     """
-    return px.line(df, x="x", y="y", labels=label, title=title)
+    import plotly.express as px
+
+    fig = px.line(df, x="x", y="y", labels=label, title=title)
+    return _add_bands(fig, df)
 
 
 def plot_results_regional(df, label, title):
     """Plot with plotly, with groups of urban and rural.
 
     Args:
-        df (pd.DataFrame): coefficients (y) and year (x)
+        df (pd.DataFrame): coefficients (y) and year (x), optionally with confidence
+            bands (lower, upper)
         label (dict): dict for x and y
         title (string): figure title
 
@@ -48,7 +65,63 @@ def plot_results_regional(df, label, title):
         px.fig: figure
 
     """
-    return px.line(df, x="x", y="y", labels=label, title=title, color="region")
+    import plotly.express as px
+
+    fig = px.line(df, x="x", y="y", labels=label, title=title, color="region")
+    return _add_bands(fig, df)
+
+
+def _add_bands(fig, df):
+    """Add shaded confidence bands below the lines of a figure.
+
+    Args:
+        fig (px.fig): line figure, one line per region if df has a region column
+        df (pd.DataFrame): data of the figure, bands are drawn if it has lower and
+            upper columns
+
+    Returns:
+        px.fig: figure
+
+    """
+    import plotly.graph_objects as go
+
+    if not {"lower", "upper"}.issubset(df.columns):
+        return fig
+    for line in list(fig.data):
+        band = df if "region" not in df.columns else df[df["region"] == line.name]
+        fig.add_trace(
+            go.Scatter(
+                x=[*band["x"], *band["x"][::-1]],
+                y=[*band["upper"], *band["lower"][::-1]],
+                fill="toself",
+                fillcolor=line.line.color,
+                opacity=0.2,
+                line={"width": 0},
+                hoverinfo="skip",
+                showlegend=False,
+            ),
+        )
+    return fig
+
+
+def _with_bands(df, bands, figure):
+    """Merge the confidence bands of a figure into its data.
+
+    Args:
+        df (pd.DataFrame): data of the figure
+        bands (pd.DataFrame, optional): bands of all figures, see
+            ``bootstrap_bands``
+        figure (str): name of the figure
+
+    Returns:
+        pd.DataFrame: data with lower and upper columns if bands are given.
+
+    """
+    if bands is None:
+        return df
+    keys = ["x", "region"] if "region" in df.columns else ["x"]
+    band = bands.loc[bands["figure"] == figure, [*keys, "lower", "upper"]]
+    return df.merge(band, on=keys, how="left")
 
 
 def plot_fig1(df):
@@ -61,6 +134,8 @@ def plot_fig1(df):
         px.fig: figure 1
 
     """
+    import plotly.express as px
+
     y = df["CN1990A_SEX"]
     x = df["Year"]
     fig1 = px.line(x=x, y=y, title="Sex ratios by birth cohorts")
@@ -78,6 +153,8 @@ def plot_fig2(df):
         px.fig: figure 2
 
     """
+    import plotly.graph_objects as go
+
     fig2 = go.Figure()
     fig2.add_trace(go.Scatter(x=df["Year"], y=df["Han"], name="Han", mode="lines"))
     fig2.add_trace(
@@ -102,6 +179,8 @@ def plot_figapp(df):
         px.fig: figure for wage gap
 
     """
+    import plotly.graph_objects as go
+
     figapp = go.Figure()
     figapp.add_trace(
         go.Scatter(x=df["year"], y=df["male"], mode="lines", name="Male wage"),
@@ -118,19 +197,109 @@ def plot_figapp(df):
     return figapp
 
 
-def plot_data_3did(data):
-    """Reformat data into separated lists.
+def plot_results_all(results, bands=None):
+    """Plot the one-child policy effects of all specifications.
+
+    Args:
+        results (pd.DataFrame): results of the specifications "one_child" and
+            "one_child_control", see ``figure_data``
+        bands (pd.DataFrame, optional): bootstrap confidence bands, see
+            ``bootstrap_bands``
+
+    Returns:
+        dict: figures by file name.
+
+    """
+    dfa3 = _with_bands(figure_data(results, "one_child", "a3"), bands, "A3")
+    dfpesr = _with_bands(figure_data(results, "one_child", "PESR"), bands, "PESR")
+    dfa3_regional = _with_bands(
+        figure_data(results, "one_child", "a3", regional=True),
+        bands,
+        "A3_regional",
+    )
+    dfpesr_regional = _with_bands(
+        figure_data(results, "one_child", "PESR", regional=True),
+        bands,
+        "PESR_regional",
+    )
+    label_a3 = {"x": "Year", "y": "alpha 3"}
+    label_pesr = {"x": "Year", "y": "PESR"}
+    title_a3 = "One-Child Policy Effect on Probability to be a male"
+    title_pesr = "One-Child Policy Effect on Sex Ratio"
+    return {
+        "A3": plot_results(dfa3, label_a3, title_a3),
+        "PESR": plot_results(dfpesr, label_pesr, title_pesr),
+        "A3_regional": plot_results_regional(dfa3_regional, label_a3, title_a3),
+        "PESR_regional": plot_results_regional(
+            dfpesr_regional,
+            label_pesr,
+            title_pesr,
+        ),
+        "A3_control": plot_results(
+            figure_data(results, "one_child_control", "a3"),
+            label_a3,
+            f"{title_a3} (with control)",
+        ),
+        "A3_regional_control": plot_results_regional(
+            figure_data(results, "one_child_control", "a3", regional=True),
+            label_a3,
+            f"{title_a3} (with control)",
+        ),
+        "PESR_regional_control": plot_results_regional(
+            figure_data(results, "one_child_control", "PESR", regional=True),
+            label_pesr,
+            f"{title_pesr} (with control)",
+        ),
+    }
+
+
+def plot_results3(results, bands=None):
+    """Plot the two-child policy effects of the triple did model.
+
+    Args:
+        results (pd.DataFrame): results of the specification "two_child", see
+            ``figure_data``
+        bands (pd.DataFrame, optional): bootstrap confidence bands, see
+            ``bootstrap_bands``
+
+    Returns:
+        dict: figures by file name.
+
+    """
+    dfa7 = _with_bands(figure_data(results, "two_child", "a7"), bands, "A7")
+    dfpesr3 = _with_bands(
+        figure_data(results, "two_child", "PESR"),
+        bands,
+        "PESR_twochild",
+    )
+    return {
+        "A7": plot_results(
+            dfa7,
+            {"x": "Year", "y": "alpha 7"},
+            "Two-Child Policy Effect on Probability to be a male",
+        ),
+        "PESR_twochild": plot_results(
+            dfpesr3,
+            {"x": "Year", "y": "PESR"},
+            "Two-Child Policy Effect on Sex Ratio",
+        ),
+    }
+
+
+def plot_descriptive(fig1_data, fig2_data, wage_gap):
+    """Plot the sex ratios by birth cohort and the gender wage gap.
 
     Args:
-        data (dict): regression coefficients
+        fig1_data (pd.DataFrame): dataframe for figure 1
+        fig2_data (pd.DataFrame): dataframe for figure 2
+        wage_gap (pd.DataFrame): wage gap data frame
 
     Returns:
-        list: list of coefficients for different years.
+        dict: figures by file name.
 
     """
-    Pesr3_all = []
-    a7_all = []
-    for i in range(985, 991):
-        Pesr3_all.append(data[f"{i}"][8])
-        a7_all.append(data[f"{i}"][7])
-    return a7_all, Pesr3_all
+    return {
+        "fig1": plot_fig1(fig1_data),
+        "fig2": plot_fig2(fig2_data),
+        "fig_app": plot_figapp(wage_gap),
+    }
@@ -1,163 +1,130 @@
 """Tasks running the results formatting (tables, figures)."""
 
-import pandas as pd
 import pytask
 
-from epp_final.analysis.model import load_model
-from epp_final.config import BLD
-from epp_final.final.plot import (
-    plot_data_3did,
-    plot_fig1,
-    plot_fig2,
-    plot_figapp,
-    plot_results,
-    plot_results_regional,
-    reformat_data,
-)
+from epp_final.analysis.results import read_results
+from epp_final.config import BLD, BOOTSTRAP_BANDS, DATA_FORMAT, FIGURE_FORMAT
+from epp_final.final.export import export_figures
+from epp_final.final.plot import plot_descriptive, plot_results3, plot_results_all
+from epp_final.utilities import read_data
+
+RESULTS = BLD / "python" / "models" / "results"
+# Bootstrap confidence bands, only drawn if they are built, see ``BOOTSTRAP_BANDS``.
+BANDS = {}
+if BOOTSTRAP_BANDS:
+    BANDS["bands"] = BLD / "python" / "models" / f"bootstrap_bands.{DATA_FORMAT}"
 
+FIGURES_ALL = [
+    "A3",
+    "PESR",
+    "A3_regional",
+    "PESR_regional",
+    "A3_control",
+    "A3_regional_control",
+    "PESR_regional_control",
+]
 kwargs = {
     "produces": {
-        "produces1": BLD / "python" / "figures" / "A3.png",
-        "produces2": BLD / "python" / "figures" / "PESR.png",
-        "produces3": BLD / "python" / "figures" / "A3_regional.png",
-        "produces4": BLD / "python" / "figures" / "PESR_regional.png",
-        "produces5": BLD / "python" / "figures" / "A3_control.png",
-        "produces6": BLD / "python" / "figures" / "A3_regional_control.png",
-        "produces7": BLD / "python" / "figures" / "PESR_regional_control.png",
+        **{
+            name: BLD / "python" / "figures" / f"{name}.{FIGURE_FORMAT}"
+            for name in FIGURES_ALL
+        },
+        "render_times": BLD / "python" / "figures" / "render_times_results_all.json",
     },
 }
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "models" / "coef1990.pickle",
-        "dfa3_regional": BLD / "python" / "models" / "dfa3_regional.pickle",
-        "dfpesr_regional": BLD / "python" / "models" / "dfpesr_regional.pickle",
-        "dfa3_control": BLD / "python" / "models" / "dfa3_control.pickle",
-        "dfa3_reg_control": BLD / "python" / "models" / "dfa3_regional_control.pickle",
-        "dfapesr_reg_control": BLD
-        / "python"
-        / "models"
-        / "dfpesr_regional_control.pickle",
+        "results": [
+            RESULTS / f"{part}.{DATA_FORMAT}"
+            for part in [
+                "one_child",
+                "one_child_regional",
+                "one_child_control",
+            ]
+        ],
+        **BANDS,
     },
 )
 @pytask.mark.task(kwargs=kwargs)
 def task_plot_results_all(depends_on, produces):
     """Plot the regression results by age (Python version)."""
-    data = load_model(depends_on["data"])
-    a3_all, Pesr_all = reformat_data(data)
-    x = [i + 1000 for i in range(980, 991)]
-    dfa3 = pd.DataFrame({"x": x, "y": a3_all})
-    dfpesr = pd.DataFrame({"x": x, "y": Pesr_all})
-    fig1 = plot_results(
-        dfa3,
-        {"x": "Year", "y": "alpha 3"},
-        "One-Child Policy Effect on Probability to be a male",
-    )
-    fig2 = plot_results(
-        dfpesr,
-        {"x": "Year", "y": "PESR"},
-        "One-Child Policy Effect on Sex Ratio",
-    )
-    fig1.write_image(produces["produces1"])
-    fig2.write_image(produces["produces2"])
-    dfa3_regional = load_model(depends_on["dfa3_regional"])
-    dfpesr_regional = load_model(depends_on["dfpesr_regional"])
-    fig3 = plot_results_regional(
-        dfa3_regional,
-        {"x": "Year", "y": "alpha 3"},
-        "One-Child Policy Effect on Probability to be a male",
-    )
-    fig4 = plot_results_regional(
-        dfpesr_regional,
-        {"x": "Year", "y": "PESR"},
-        "One-Child Policy Effect on Sex Ratio",
-    )
-    fig3.write_image(produces["produces3"])
-    fig4.write_image(produces["produces4"])
-    dfa3_control = load_model(depends_on["dfa3_control"])
-    fig5 = plot_results(
-        dfa3_control,
-        {"x": "Year", "y": "alpha 3"},
-        "One-Child Policy Effect on Probability to be a male (with control)",
-    )
-    fig5.write_image(produces["produces5"])
-    dfa3_reg_control = load_model(depends_on["dfa3_reg_control"])
-    fig6 = plot_results_regional(
-        dfa3_reg_control,
-        {"x": "Year", "y": "alpha 3"},
-        "One-Child Policy Effect on Probability to be a male (with control)",
-    )
-    fig6.write_image(produces["produces6"])
-    dfpesr_reg_control = load_model(depends_on["dfapesr_reg_control"])
-    fig7 = plot_results_regional(
-        dfpesr_reg_control,
-        {"x": "Year", "y": "PESR"},
-        "One-Child Policy Effect on Sex Ratio (with control)",
+    figures = plot_results_all(
+        read_results(depends_on["results"].values(), coefficients=["a3", "PESR"]),
+        _read_bands(depends_on, FIGURES_ALL),
     )
-    fig7.write_image(produces["produces7"])
+    export_figures(figures, produces, report=produces["render_times"])
 
 
 kwargs2 = {
     "produces": {
-        "produces1": BLD / "python" / "figures" / "fig1.png",
-        "produces2": BLD / "python" / "figures" / "fig2.png",
-        "produces3": BLD / "python" / "figures" / "fig_app.png",
+        **{
+            name: BLD / "python" / "figures" / f"{name}.{FIGURE_FORMAT}"
+            for name in ["fig1", "fig2", "fig_app"]
+        },
+        "render_times": BLD / "python" / "figures" / "render_times_fig.json",
     },
 }
 
 
 @pytask.mark.depends_on(
     {
-        "fig1_data": BLD / "python" / "data" / "fig1_data.csv",
-        "fig2_data": BLD / "python" / "data" / "fig2_data.csv",
-        "fig_app": BLD / "python" / "data" / "wage_gap.csv",
+        "fig1_data": BLD / "python" / "data" / f"fig1_data.{DATA_FORMAT}",
+        "fig2_data": BLD / "python" / "data" / f"fig2_data.{DATA_FORMAT}",
+        "fig_app": BLD / "python" / "data" / f"wage_gap.{DATA_FORMAT}",
     },
 )
 @pytask.mark.task(kwargs=kwargs2)
 def task_plot_fig(depends_on, produces):
     """Plot sex ratio by birth year."""
-    fig1_data = pd.read_csv(depends_on["fig1_data"])
-    fig2_data = pd.read_csv(depends_on["fig2_data"])
-    figapp = pd.read_csv(depends_on["fig_app"])
-    fig1 = plot_fig1(fig1_data)
-    fig2 = plot_fig2(fig2_data)
-    figapp = plot_figapp(figapp)
-    fig1.write_image(produces["produces1"])
-    fig2.write_image(produces["produces2"])
-    figapp.write_image(produces["produces3"])
+    figures = plot_descriptive(
+        read_data(depends_on["fig1_data"], columns=["Year", "CN1990A_SEX"]),
+        read_data(depends_on["fig2_data"], columns=["Year", "Han", "Minorities"]),
+        read_data(depends_on["fig_app"], columns=["year", "male", "female"]),
+    )
+    export_figures(figures, produces, report=produces["render_times"])
 
 
+FIGURES3 = ["A7", "PESR_twochild"]
 kwargs3 = {
     "produces": {
-        "produces1": BLD / "python" / "figures" / "A7.png",
-        "produces2": BLD / "python" / "figures" / "PESR_twochild.png",
+        **{
+            name: BLD / "python" / "figures" / f"{name}.{FIGURE_FORMAT}"
+            for name in FIGURES3
+        },
+        "render_times": BLD / "python" / "figures" / "render_times_results3.json",
     },
 }
 
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "models" / "coef_triple_did.pickle",
+        "results": RESULTS / f"two_child.{DATA_FORMAT}",
+        **BANDS,
     },
 )
 @pytask.mark.task(kwargs=kwargs3)
 def task_plot_results3(depends_on, produces):
     """Plot the regression results by age (Python version)."""
-    data = load_model(depends_on["data"])
-    a7_all, Pesr3_all = plot_data_3did(data)
-    x = [i + 1000 for i in range(985, 991)]
-    dfa7 = pd.DataFrame({"x": x, "y": a7_all})
-    dfpesr3 = pd.DataFrame({"x": x, "y": Pesr3_all})
-    fig1 = plot_results(
-        dfa7,
-        {"x": "Year", "y": "alpha 7"},
-        "Two-Child Policy Effect on Probability to be a male",
-    )
-    fig2 = plot_results(
-        dfpesr3,
-        {"x": "Year", "y": "PESR"},
-        "Two-Child Policy Effect on Sex Ratio",
+    figures = plot_results3(
+        read_results([depends_on["results"]], coefficients=["a7", "PESR"]),
+        _read_bands(depends_on, FIGURES3),
     )
-    fig1.write_image(produces["produces1"])
-    fig2.write_image(produces["produces2"])
+    export_figures(figures, produces, report=produces["render_times"])
+
+
+def _read_bands(depends_on, figures):
+    """Read the bootstrap bands of figures, None if they are not built.
+
+    Args:
+        depends_on (dict): dependencies of the task.
+        figures (list): names of the figures.
+
+    Returns:
+        pd.DataFrame or None: bands, see ``bootstrap_bands``.
+
+    """
+    if "bands" not in depends_on:
+        return None
+    return read_data(depends_on["bands"], filters=[("figure", "in", figures)])
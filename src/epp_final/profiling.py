@@ -0,0 +1,167 @@
+"""Profiling of the tasks of the pipeline, a pytask plugin.
+
+The plugin is registered through the "pytask" entry point of the package, see
+``setup.cfg``, and measures every executed task of the project:
+
+- the wall time,
+- the CPU time of the process and of its finished child processes, e.g. the workers
+  of the bootstrap,
+- the peak resident set size of the process while the task runs, which shows the
+  task that drives the peak of a run (on Linux the peak is reset before every task,
+  elsewhere it is the peak of the process so far),
+- the rows of the csv and parquet files the task reads and writes.
+
+The records of a run are written to ``PROFILE_DIR / "report.json"``, slowest task
+first, and appended as one line to ``PROFILE_DIR / "history.jsonl"``, so regressions
+show up between runs. If ``PROFILE_TASKS`` is positive, the tasks run under cProfile
+and the call profiles of the ``PROFILE_TASKS`` slowest tasks are written to
+``PROFILE_DIR``, e.g. for ``python -m pstats``. Tasks run by pytask-parallel in
+other processes are not measured.
+
+"""
+
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytask
+
+from epp_final.config import PROFILE_DIR, PROFILE_TASKS, SRC
+from epp_final.utilities import count_rows
+
+_DATA_SUFFIXES = [".csv", ".parquet"]
+# Measurements of the current run, records and call profiles by task.
+_RECORDS = {}
+_PROFILES = {}
+
+
+@pytask.hookimpl(hookwrapper=True)
+def pytask_execute_build(session):  # noqa: ARG001
+    """Write the report of the run after all tasks are executed."""
+    _RECORDS.clear()
+    _PROFILES.clear()
+    yield
+    if _RECORDS:
+        write_report(_RECORDS, _PROFILES, PROFILE_DIR, PROFILE_TASKS)
+
+
+@pytask.hookimpl(hookwrapper=True)
+def pytask_execute_task(session, task):
+    """Measure the execution of a task of the project."""
+    if not Path(task.path).is_relative_to(SRC):
+        yield
+        return
+    _reset_peak_rss()
+    profile = cProfile.Profile() if PROFILE_TASKS > 0 else None
+    before = os.times()
+    start = time.perf_counter()
+    if profile is not None:
+        profile.enable()
+    outcome = yield
+    if profile is not None:
+        profile.disable()
+    wall = time.perf_counter() - start
+    after = os.times()
+
+    name = task_name(task)
+    _RECORDS[name] = {
+        "task": name,
+        "succeeded": outcome.excinfo is None,
+        "wall_time": wall,
+        "cpu_time": sum(after[:4]) - sum(before[:4]),
+        "peak_rss": _peak_rss(),
+        "rows_in": _rows(session.dag.predecessors(task.name), session),
+        "rows_out": _rows(session.dag.successors(task.name), session),
+    }
+    if profile is not None:
+        _PROFILES[name] = profile
+
+
+def task_name(task):
+    """Name of a task relative to the source directory.
+
+    Args:
+        task (pytask.Task): task.
+
+    Returns:
+        str: e.g. "analysis/task_analysis.py::task_fit_model_1990".
+
+    """
+    return f"{Path(task.path).relative_to(SRC).as_posix()}::{task.base_name}"
+
+
+def write_report(records, profiles, directory, n_profiles):
+    """Write the report of a run and the call profiles of the slowest tasks.
+
+    Args:
+        records (dict): measurements by task, see ``pytask_execute_task``.
+        profiles (dict): cProfile.Profile by task.
+        directory (pathlib.Path): directory of the report.
+        n_profiles (int): number of slowest tasks whose call profile is written.
+
+    Returns:
+        dict: the report.
+
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tasks = sorted(records.values(), key=lambda record: -record["wall_time"])
+    for record in tasks[:n_profiles]:
+        if record["task"] in profiles:
+            path = directory / f"{record['task'].rsplit('::', 1)[-1]}.prof"
+            profiles[record["task"]].dump_stats(path)
+            record["profile"] = path.name
+    report = {
+        "finished": datetime.datetime.now().astimezone().isoformat(),
+        "python": sys.version.split()[0],
+        "tasks": tasks,
+    }
+    (directory / "report.json").write_text(json.dumps(report, indent=2) + "\n")
+    with open(directory / "history.jsonl", "a") as history:
+        history.write(json.dumps(report) + "\n")
+    return report
+
+
+def _rows(names, session):
+    """Rows of the data sets among nodes of the graph of tasks.
+
+    Args:
+        names (iterable): names of nodes.
+        session (pytask.Session): session.
+
+    Returns:
+        dict: number of rows by file name.
+
+    """
+    rows = {}
+    for name in names:
+        path = getattr(session.dag.nodes[name].get("node"), "path", None)
+        if path is not None and path.suffix in _DATA_SUFFIXES and path.exists():
+            rows[path.name] = count_rows(path)
+    return rows
+
+
+def _reset_peak_rss():
+    """Reset the peak resident set size of the process, only possible on Linux."""
+    with contextlib.suppress(OSError):
+        Path("/proc/self/clear_refs").write_text("5")
+
+
+def _peak_rss():
+    """Peak resident set size of the process in bytes, None if unknown."""
+    with contextlib.suppress(OSError):
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems kilobytes.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
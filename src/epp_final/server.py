@@ -0,0 +1,333 @@
+r"""Local HTTP service answering difference-in-differences queries in milliseconds.
+
+The 1990 data is collapsed once into cells of birth year and the factors of the
+models, with the number of individuals and of males per cell. For the regressors of
+a query, the cross products of every birth year are summed from the cells and
+cached, so a regression of any comparison window and treated birth year only adds
+up a few small matrices and solves them, see ``epp_final.analysis.moments``. The
+estimates are the ones of the regressions on the individual data, e.g. of
+``gen_plot_data``.
+
+    $ python -m epp_final.server bld/python/data/count_cube.csv \
+        --sample2 bld/python/data/Sample2.csv
+    $ curl "localhost:8000/effects?model=did&region=urban&compare=1975-1979"
+
+Queries are GET requests of ``/effects`` with the parameters of
+``EffectStatistics.query``, birth years are given with four digits, e.g.
+``years=1985`` or ``years=1980-1990``. ``/health`` answers with the sources of the
+server.
+
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from epp_final.analysis.design import expand_formula, term_factors
+from epp_final.analysis.moments import BirthYearMoments, collapse_cells
+from epp_final.analysis.predict import (
+    _PESR,
+    _PESR3,
+    EDUCATION_CONTROLS,
+    TRIPLE_DID_TERMS,
+    data_processing,
+)
+from epp_final.data_management.clean_data import clean_data_3did
+from epp_final.data_management.schema import DTYPES, SAMPLE2_DTYPES
+from epp_final.utilities import read_data
+
+# Regressors, default windows, code of rural households (CN1990A_HHTYA) and policy
+# effect on the sex ratio of the models.
+MODELS = {
+    "did": {
+        "terms": expand_formula("H*T"),
+        "compare": range(973, 980),
+        "years": range(980, 991),
+        "rural": 1,
+        "pesr": _PESR,
+    },
+    "triple_did": {
+        "terms": TRIPLE_DID_TERMS,
+        "compare": range(980, 985),
+        "years": range(985, 991),
+        "rural": 0,
+        "pesr": _PESR3,
+    },
+}
+REGIONS = ["all", "rural", "urban"]
+NATIONS = ["all", "han", "minorities"]
+CONTROLS = ["none", "education"]
+
+
+class EffectStatistics:
+    """Cells of the 1990 data with cached cross products by birth year.
+
+    Args:
+        count_cube (pd.DataFrame): count cube, see ``clean_count_cube``.
+        sample2 (pd.DataFrame, optional): Sample 2 data, needed for queries with
+            educational controls.
+
+    """
+
+    def __init__(self, count_cube, sample2=None):
+        """Collapse the data into the cells of every model."""
+        self.cells = {
+            "did": collapse_cells(
+                data_processing(count_cube.copy()),
+                weights="count",
+            ),
+            "triple_did": collapse_cells(
+                clean_data_3did(count_cube),
+                weights="count",
+            ),
+        }
+        self.controls = {}
+        if sample2 is not None:
+            # The education dummies of father and mother and hukou.
+            self.controls["education"] = [*EDUCATION_CONTROLS, "CN1990A_HHTYA"]
+            self.cells["did_education"] = collapse_cells(
+                sample2,
+                self.controls["education"],
+            )
+        self._moments = {}
+        self._lock = threading.Lock()
+
+    def query(
+        self,
+        model="did",
+        region="all",
+        nation="all",
+        controls="none",
+        compare=None,
+        years=None,
+    ):
+        """Estimate the effects of a model for a subgroup and windows of birth years.
+
+        Every treated birth year is compared with the pooled comparison cohort in a
+        separate regression, as in the figures. Terms of factors which are constant
+        in the subgroup, e.g. Han among Han, are dropped, and the policy effect on
+        the sex ratio (PESR) is only given if no term of the model is dropped.
+
+        Args:
+            model (str): "did" (one-child policy, children only) or "triple_did"
+                (two-child policy).
+            region (str): "all", "rural" or "urban".
+            nation (str): "all", "han" or "minorities".
+            controls (str): "none" or "education" (parental education and hukou,
+                only for "did").
+            compare (range, optional): birth years of the comparison cohort, e.g.
+                ``range(973, 980)``. Defaults to the one of the model.
+            years (range, optional): treated birth years. Defaults to the ones of
+                the model.
+
+        Returns:
+            dict: the regressors ("terms") and the coefficients a0 (intercept) to
+                ak and the PESR by birth year ("estimates").
+
+        Raises:
+            ValueError: if a parameter is unknown or a window has no data.
+
+        """
+        for name, value, values in [
+            ("model", model, MODELS),
+            ("region", region, REGIONS),
+            ("nation", nation, NATIONS),
+            ("controls", controls, CONTROLS),
+        ]:
+            if value not in values:
+                info = f"Unknown {name} {value!r}, use one of {list(values)}."
+                raise ValueError(info)
+        spec = MODELS[model]
+        source = model
+        terms = spec["terms"]
+        if controls != "none":
+            if model != "did" or controls not in self.controls:
+                info = f"Controls {controls!r} are not available for model {model}."
+                raise ValueError(info)
+            source = f"{model}_{controls}"
+            terms = [*terms, *self.controls[controls]]
+        compare = spec["compare"] if compare is None else compare
+        years = spec["years"] if years is None else years
+        if not len(compare) or not len(years) or set(compare) & set(years):
+            info = "The comparison and treated birth years must be disjoint."
+            raise ValueError(info)
+
+        subgroup = {}
+        if region != "all":
+            rural = region == "rural"
+            subgroup["CN1990A_HHTYA"] = spec["rural"] if rural else 1 - spec["rural"]
+        if nation != "all":
+            subgroup["CN1990A_NATION"] = int(nation == "han")
+        terms = [
+            term for term in terms if not set(term_factors(term)).intersection(subgroup)
+        ]
+        coef = self._solve(
+            source,
+            tuple(sorted(subgroup.items())),
+            terms,
+            compare,
+            years,
+        )
+        estimates = {"birth_year": np.array(years) + 1000}
+        estimates.update({f"a{i}": coef[:, i] for i in range(coef.shape[1])})
+        if terms[: len(spec["terms"])] == spec["terms"]:
+            estimates["PESR"] = spec["pesr"](*coef[:, : len(spec["terms"]) + 1].T)
+        estimates = pd.DataFrame(estimates)
+        return {"terms": ["const", *terms], "estimates": estimates}
+
+    def _solve(self, source, subgroup, terms, compare, years):
+        """Solve the regressions of all treated birth years from the moments.
+
+        Args:
+            source (str): name of the cells.
+            subgroup (tuple): (column, value) pairs the cells are restricted to.
+            terms (list): regressors without the intercept.
+            compare (range): birth years of the comparison cohort.
+            years (range): treated birth years, one regression each.
+
+        Returns:
+            np.ndarray: coefficients (intercept first) of shape (len(years), k).
+
+        """
+        moments = self._cached_moments(source, subgroup, tuple(terms))
+        return moments.window_ols(terms, compare, years)
+
+    def _cached_moments(self, source, subgroup, terms):
+        """Cross products of the regressors by birth year, computed once.
+
+        Args:
+            source (str): name of the cells.
+            subgroup (tuple): (column, value) pairs the cells are restricted to.
+            terms (tuple): regressors without the intercept.
+
+        Returns:
+            BirthYearMoments: cross products of the cells of the subgroup.
+
+        """
+        key = (source, subgroup, terms)
+        with self._lock:
+            if key not in self._moments:
+                cells = self.cells[source]
+                mask = np.ones(cells.shape[0], dtype=bool)
+                for name, value in subgroup:
+                    mask &= cells[name].to_numpy() == value
+                self._moments[key] = BirthYearMoments(cells, list(terms), mask)
+            return self._moments[key]
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answer queries of ``/effects`` and ``/health`` with JSON."""
+
+    def do_GET(self):  # noqa: N802
+        """Answer a GET request."""
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._reply(200, {"sources": list(self.server.statistics.cells)})
+        elif url.path == "/effects":
+            start = time.perf_counter()
+            try:
+                params = _parse_query(url.query)
+                result = self.server.statistics.query(**params)
+            except (TypeError, ValueError) as error:
+                self._reply(400, {"error": str(error)})
+                return
+            # Infinite and undefined estimates, e.g. of empty cells, become null.
+            estimates = result["estimates"].replace([np.inf, -np.inf], np.nan)
+            estimates = estimates.astype(object).where(estimates.notna(), None)
+            self._reply(
+                200,
+                {
+                    "terms": result["terms"],
+                    "estimates": estimates.to_dict("records"),
+                    "milliseconds": 1000 * (time.perf_counter() - start),
+                },
+            )
+        else:
+            self._reply(404, {"error": f"Unknown path {url.path}."})
+
+    def _reply(self, status, body):
+        content = json.dumps(body, allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):  # noqa: A002
+        """Log a request if the server is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _parse_query(query):
+    """Parameters of ``EffectStatistics.query`` from a query string.
+
+    Args:
+        query (str): e.g. "model=did&compare=1975-1979".
+
+    Returns:
+        dict: parameters, birth years as ranges of three digit years.
+
+    Raises:
+        ValueError: if a birth year is not a number.
+
+    """
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    for name in ["compare", "years"]:
+        if name in params:
+            first, _, last = params[name].partition("-")
+            params[name] = range(int(first) - 1000, int(last or first) - 999)
+    return params
+
+
+def make_server(statistics, host="127.0.0.1", port=8000, *, verbose=False):
+    """Create the HTTP server, every request is answered in its own thread.
+
+    Args:
+        statistics (EffectStatistics): statistics of the data.
+        host (str): address to listen on.
+        port (int): port to listen on, 0 picks a free port.
+        verbose (bool): log every request.
+
+    Returns:
+        ThreadingHTTPServer: server, start it with ``serve_forever``.
+
+    """
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.statistics = statistics
+    server.verbose = verbose
+    return server
+
+
+def main():
+    """Serve the data given on the command line until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("count_cube", help="path of count_cube.csv or .parquet")
+    parser.add_argument("--sample2", help="path of Sample2.csv or .parquet")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    sample2 = None
+    if args.sample2 is not None:
+        sample2 = read_data(args.sample2, dtypes=SAMPLE2_DTYPES)
+    statistics = EffectStatistics(read_data(args.count_cube, dtypes=DTYPES), sample2)
+    server = make_server(statistics, args.host, args.port, verbose=args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")  # noqa: T201
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""In-memory session running the whole analysis without intermediate files."""
+
+from functools import cached_property
+
+import pandas as pd
+
+from epp_final.analysis.bootstrap import bootstrap_bands
+from epp_final.analysis.grid import CONTROL_SPECIFICATION, SPEC_GRID, run_grid
+from epp_final.analysis.permutation import randomization_inference
+from epp_final.analysis.predict import (
+    data_processing,
+    event_study,
+    gen_plot_data,
+    gen_plot_data3,
+    rural_urban_dataframe,
+    year_data_split,
+    year_data_split3,
+)
+from epp_final.analysis.results import (
+    ONE_CHILD_COEFFICIENTS,
+    RESULT_INDEX,
+    TWO_CHILD_COEFFICIENTS,
+    coefficient_results,
+    event_study_results,
+    frame_results,
+)
+from epp_final.cache import cached
+from epp_final.data_management.clean_data import (
+    CUBE_COLUMNS,
+    clean_count_cube,
+    clean_data_3did,
+    clean_data_with_control,
+    clean_fig1_data,
+    clean_fig2_data,
+    clean_wage_data,
+)
+from epp_final.data_management.households import HouseholdIndex
+from epp_final.data_management.schema import DTYPES
+from epp_final.final.plot import (
+    plot_fig1,
+    plot_fig2,
+    plot_figapp,
+    plot_results3,
+    plot_results_all,
+)
+from epp_final.utilities import read_data
+
+
+class Session:
+    """Run the analyses of the project in memory.
+
+    The 1990 data is cleaned once, and the processed data and year splits are shared
+    by all analyses. Every intermediate result is computed on first access and kept,
+    so ``Session.from_files(path).figures()`` runs the whole project in one call.
+    The pytask tasks are thin wrappers around the same attributes.
+
+    Args:
+        data1990 (pd.DataFrame, optional): 1990 data, see ``clean_raw_data``.
+        count_cube (pd.DataFrame, optional): count cube, computed from data1990 if
+            not given.
+        sample2 (pd.DataFrame, optional): Sample 2 data, computed from data1990 if
+            not given.
+        wage (pd.DataFrame, optional): raw wage data, see ``wage.xlsx``.
+        cache (str or pathlib.Path, optional): directory of an on-disk cache of the
+            cleaning steps and estimates, see ``epp_final.cache.cached``.
+
+    """
+
+    def __init__(
+        self,
+        data1990=None,
+        count_cube=None,
+        sample2=None,
+        wage=None,
+        cache=None,
+    ):
+        """Store the inputs, see the class docstring."""
+        self.data1990 = data1990
+        self.wage = wage
+        self.cache = cache
+        if count_cube is not None:
+            self.count_cube = count_cube
+        if sample2 is not None:
+            self.sample2 = sample2
+
+    @classmethod
+    def from_files(cls, data1990, wage=None, cache=None):
+        """Start a session from the stored 1990 data.
+
+        Args:
+            data1990 (str or pathlib.Path): path to ``data1990_raw``.
+            wage (str or pathlib.Path, optional): path to ``wage.xlsx``.
+            cache (str or pathlib.Path, optional): directory of an on-disk cache.
+
+        Returns:
+            Session: the session.
+
+        """
+        wage = None if wage is None else pd.read_excel(wage, index_col=None)
+        return cls(read_data(data1990, dtypes=DTYPES), wage=wage, cache=cache)
+
+    def _run(self, func, ignore=()):
+        """Wrap a function with the on-disk cache of the session, if any."""
+        return func if self.cache is None else cached(func, self.cache, ignore=ignore)
+
+    @cached_property
+    def count_cube(self):
+        """pd.DataFrame: number of individuals per cell of the 1990 data."""
+        return self._run(clean_count_cube)(self.data1990[CUBE_COLUMNS])
+
+    @cached_property
+    def households(self):
+        """HouseholdIndex: households of the 1990 data."""
+        return HouseholdIndex.from_serial(self.data1990["SERIAL"])
+
+    @cached_property
+    def sample2(self):
+        """pd.DataFrame: Sample 2 data with parental education."""
+        return self._run(clean_data_with_control)(self.data1990, self.households)
+
+    @cached_property
+    def year_data(self):
+        """YearWindows: processed children data split by birth year."""
+        return year_data_split(self._run(data_processing)(self.count_cube.copy()))
+
+    @cached_property
+    def year_data_triple_did(self):
+        """YearWindows: triple did data split by birth year."""
+        return year_data_split3(self._run(clean_data_3did)(self.count_cube))
+
+    @cached_property
+    def coef1990(self):
+        """dict: coefficients and PESR by birth year."""
+        return self._run(gen_plot_data)(self.year_data, weights="count")
+
+    @cached_property
+    def event_study(self):
+        """tuple: estimates and covariance of the joint event study."""
+        return self._run(event_study)(
+            self.year_data.data,
+            self.year_data.years,
+            self.year_data.compare,
+            weights="count",
+        )
+
+    @cached_property
+    def regional(self):
+        """tuple: alpha 3 and PESR for urban and rural areas."""
+        return self._run(rural_urban_dataframe)(self.year_data, weights="count")
+
+    @cached_property
+    def spec_grid(self):
+        """pd.DataFrame: results of the specification grid, see ``run_grid``."""
+        return self._run(run_grid)(self.sample2, SPEC_GRID)
+
+    @cached_property
+    def coef_triple_did(self):
+        """dict: triple did coefficients and PESR by birth year."""
+        return self._run(gen_plot_data3)(self.year_data_triple_did, weights="count")
+
+    @cached_property
+    def fig1_data(self):
+        """pd.DataFrame: sex ratios by birth cohort."""
+        return clean_fig1_data(self.count_cube, weights="count")
+
+    @cached_property
+    def fig2_data(self):
+        """pd.DataFrame: sex ratios by birth cohort for Han and minorities."""
+        return clean_fig2_data(self.count_cube, weights="count")
+
+    @cached_property
+    def wage_gap(self):
+        """pd.DataFrame: gender wage gap in urban China."""
+        return clean_wage_data(self.wage)
+
+    def results(self, parts=None):
+        """Collect the estimation results in the long format of the results store.
+
+        Args:
+            parts (list, optional): parts of the results store to collect, the names
+                of the files written by the pytask tasks. Defaults to all parts.
+
+        Returns:
+            pd.DataFrame: results, see ``epp_final.analysis.results``, every part
+                sorted like in the results store.
+
+        """
+        builders = {
+            "one_child": lambda: coefficient_results(
+                self.coef1990,
+                "one_child",
+                ONE_CHILD_COEFFICIENTS,
+            ),
+            "one_child_regional": lambda: pd.concat(
+                [
+                    frame_results(frame, "one_child", coefficient)
+                    for frame, coefficient in zip(
+                        self.regional, ["a3", "PESR"], strict=True
+                    )
+                ],
+            ),
+            "event_study": lambda: event_study_results(self.event_study[0]),
+            "one_child_control": lambda: self.spec_grid[
+                self.spec_grid["specification"] == CONTROL_SPECIFICATION
+            ],
+            "spec_grid": lambda: self.spec_grid[
+                self.spec_grid["specification"] != CONTROL_SPECIFICATION
+            ],
+            "two_child": lambda: coefficient_results(
+                self.coef_triple_did,
+                "two_child",
+                TWO_CHILD_COEFFICIENTS,
+            ),
+        }
+        parts = builders if parts is None else parts
+        return pd.concat(
+            [builders[part]().sort_values(RESULT_INDEX) for part in parts],
+            ignore_index=True,
+        )
+
+    def bootstrap_bands(self, n_draws=999, seed=0, n_jobs=1):
+        """Bootstrap confidence bands of the main figures by resampling households.
+
+        Args:
+            n_draws (int): number of bootstrap replicates.
+            seed (int): seed of the random number generator.
+            n_jobs (int): number of processes, -1 uses all cores.
+
+        Returns:
+            pd.DataFrame: bands, see ``bootstrap_bands``.
+
+        """
+        return self._run(bootstrap_bands, ignore=["n_jobs"])(
+            self.data1990,
+            n_draws,
+            seed,
+            n_jobs,
+        )
+
+    def randomization_inference(self, n_permutations=999, seed=0, n_jobs=1):
+        """Randomization p-values by permuting Han status between households.
+
+        Args:
+            n_permutations (int): number of permutations.
+            seed (int): seed of the random number generator.
+            n_jobs (int): number of processes, -1 uses all cores.
+
+        Returns:
+            tuple: p-values and permutation distributions, see
+                ``randomization_inference``.
+
+        """
+        return self._run(randomization_inference, ignore=["n_jobs"])(
+            self.data1990,
+            n_permutations,
+            seed,
+            n_jobs,
+        )
+
+    def figures(self, bands=None):
+        """Create all figures.
+
+        Args:
+            bands (pd.DataFrame, optional): confidence bands drawn in the figures of
+                alpha 3, PESR and alpha 7, see ``Session.bootstrap_bands``.
+
+        Returns:
+            dict: figures by the names of the files written by the pytask tasks. The
+                wage gap figure is only included if the wage data was given.
+
+        """
+        results = self.results()
+        figures = {
+            **plot_results_all(results, bands),
+            **plot_results3(results, bands),
+            "fig1": plot_fig1(self.fig1_data),
+            "fig2": plot_fig2(self.fig2_data),
+        }
+        if self.wage is not None:
+            figures["fig_app"] = plot_figapp(self.wage_gap)
+        return figures
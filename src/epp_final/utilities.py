@@ -1,6 +1,23 @@
 """Utilities used in various parts of the project."""
 
+import operator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import yaml
+from pandas.api.types import is_integer_dtype
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, value: column.isin(value),
+    "not in": lambda column, value: ~column.isin(value),
+}
 
 
 def read_yaml(path):
@@ -23,3 +40,191 @@ def read_yaml(path):
             )
             raise ValueError(info) from error
     return out
+
+
+def read_data(path, columns=None, filters=None, dtypes=None):
+    """Read a data set stored as csv or parquet file.
+
+    For parquet files the column selection and the filters are pushed into the read,
+    so only the requested columns and row groups are decoded. Both formats are cast
+    to the given dtypes with ``set_dtypes``, which checks the ranges of integers.
+
+    Args:
+        path (str or pathlib.Path): Path to file, the suffix selects the format.
+        columns (list, optional): Columns to load. Defaults to all columns.
+        filters (list, optional): Row filters as ``(column, operator, value)`` tuples
+            which are combined with "and". Supported operators are "==", "!=", "<",
+            "<=", ">", ">=", "in" and "not in".
+        dtypes (dict, optional): dtypes by column name, see ``set_dtypes``.
+
+    Returns:
+        pandas.DataFrame: The data set.
+
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        data = pd.read_parquet(path, columns=columns, filters=filters)
+        return data if dtypes is None else set_dtypes(data, dtypes)
+    filters = filters or []
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys([*columns, *(name for name, _, _ in filters)]))
+    data = pd.read_csv(path, usecols=usecols)
+    if filters:
+        keep = pd.Series(True, index=data.index)
+        for name, op, value in filters:
+            keep &= _OPERATORS[op](data[name], value)
+        data = data[keep].reset_index(drop=True)
+    if columns is not None:
+        data = data[list(columns)]
+    return data if dtypes is None else set_dtypes(data, dtypes)
+
+
+def set_dtypes(data, dtypes):
+    """Cast the columns of a data set to the given dtypes.
+
+    Columns without a dtype are left unchanged. Integer columns are checked to fit
+    into the range of their new dtype, so that values are never truncated.
+
+    Args:
+        data (pandas.DataFrame): The data set.
+        dtypes (dict): dtypes by column name, columns which are not in the data are
+            ignored.
+
+    Returns:
+        pandas.DataFrame: The data set with the new dtypes.
+
+    Raises:
+        ValueError: If an integer column does not fit into its dtype.
+
+    """
+    dtypes = {name: dtype for name, dtype in dtypes.items() if name in data.columns}
+    for name, dtype in dtypes.items():
+        column = data[name]
+        if not (is_integer_dtype(dtype) and is_integer_dtype(column)):
+            continue
+        info = np.iinfo(dtype)
+        if column.shape[0] and (column.min() < info.min or column.max() > info.max):
+            info = f"Column {name} has values outside of the range of {dtype}."
+            raise ValueError(info)
+    return data.astype(dtypes)
+
+
+def write_data(data, path):
+    """Write a data set as csv or parquet file.
+
+    Object columns are stored as strings in parquet files, which is what reading the
+    same data back from a csv file yields.
+
+    Args:
+        data (pandas.DataFrame): The data set.
+        path (str or pathlib.Path): Path to file, the suffix selects the format.
+
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        _to_parquet_table(data).to_parquet(path, index=False, compression="zstd")
+    else:
+        data.to_csv(path, index=False)
+
+
+def write_data_chunks(chunks, path):
+    """Write data sets one after another into a single csv or parquet file.
+
+    Args:
+        chunks (iterable): Iterable of pandas.DataFrame with identical columns.
+        path (str or pathlib.Path): Path to file, the suffix selects the format.
+
+    Returns:
+        int: Number of rows written.
+
+    """
+    n_rows = write_data_partitions(({0: chunk} for chunk in chunks), {0: path})
+    return n_rows[0]
+
+
+def write_data_partitions(chunks, paths):
+    """Write the partitions of data sets streamed in chunks into one file each.
+
+    Every chunk holds a piece of every partition, e.g. the persons of every census
+    year in a chunk of the raw data, so the source is consumed in a single pass.
+
+    Args:
+        chunks (iterable): Iterable of dicts mapping the name of a partition to a
+            pandas.DataFrame, the columns of a partition are the same in all chunks.
+        paths (dict): Path of the csv or parquet file of every partition, the suffix
+            selects the format.
+
+    Returns:
+        dict: Number of rows written by partition.
+
+    """
+    paths = {name: Path(path) for name, path in paths.items()}
+    n_rows = dict.fromkeys(paths, 0)
+    writers = {}
+    try:
+        for i, chunk in enumerate(chunks):
+            for name, path in paths.items():
+                part = chunk[name]
+                if path.suffix == ".parquet":
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    table = pa.Table.from_pandas(
+                        _to_parquet_table(part),
+                        preserve_index=False,
+                    )
+                    if name not in writers:
+                        writers[name] = pq.ParquetWriter(
+                            path,
+                            table.schema,
+                            compression="zstd",
+                        )
+                    writers[name].write_table(table)
+                else:
+                    part.to_csv(
+                        path,
+                        mode="w" if i == 0 else "a",
+                        header=i == 0,
+                        index=False,
+                    )
+                n_rows[name] += part.shape[0]
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return n_rows
+
+
+def count_rows(path):
+    """Count the rows of a data set stored as csv or parquet file without loading it.
+
+    Parquet files store the number of rows in their metadata. Csv files are scanned
+    for line breaks, values with line breaks are not supported.
+
+    Args:
+        path (str or pathlib.Path): Path to file, the suffix selects the format.
+
+    Returns:
+        int: Number of rows, without the header of csv files.
+
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    n_lines = 0
+    last = b"\n"
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            n_lines += block.count(b"\n")
+            last = block[-1:]
+    # The last line may lack a line break.
+    n_lines += last != b"\n"
+    return max(n_lines - 1, 0)
+
+
+def _to_parquet_table(data):
+    """Convert object columns to strings so that they can be stored in parquet."""
+    objects = data.select_dtypes("object").columns
+    return data.astype(dict.fromkeys(objects, str))
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.bootstrap import (
+    _percentile_band,
+    bootstrap_bands,
+    bootstrap_coefficients,
+)
+from epp_final.analysis.predict import _window_ols, data_processing, year_data_split
+from epp_final.session import Session
+
+X_VARIABLES = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+
+
+@pytest.fixture()
+def children(households):
+    return data_processing(households.copy())
+
+
+def test_draws_equal_fits_on_resampled_households(children):
+    coef = bootstrap_coefficients(
+        children,
+        X_VARIABLES,
+        range(980, 991),
+        range(973, 980),
+        n_draws=3,
+        seed=4,
+    )
+    household, _ = pd.factorize(children["SERIAL"])
+    n_households = household.max() + 1
+    for r, seed in enumerate(np.random.SeedSequence(4).spawn(3)):
+        rng = np.random.default_rng(seed)
+        draws = np.bincount(
+            rng.integers(n_households, size=n_households),
+            minlength=n_households,
+        )
+        resampled = year_data_split(children.assign(w=draws[household]))
+        expected = _window_ols(resampled, X_VARIABLES, range(980, 991), weights="w")
+        np.testing.assert_allclose(coef[r], expected, atol=1e-12)
+
+
+def test_draws_do_not_depend_on_n_jobs(children):
+    args = (children, X_VARIABLES, range(980, 991), range(973, 980))
+    np.testing.assert_allclose(
+        bootstrap_coefficients(*args, n_draws=5, seed=1, n_jobs=1),
+        bootstrap_coefficients(*args, n_draws=5, seed=1, n_jobs=2),
+        rtol=1e-12,
+    )
+
+
+def test_more_jobs_than_draws(children):
+    args = (children, X_VARIABLES, range(980, 991), range(973, 980))
+    coef = bootstrap_coefficients(*args, n_draws=2, seed=1, n_jobs=3)
+    assert coef.shape[0] == 2
+    np.testing.assert_allclose(
+        coef,
+        bootstrap_coefficients(*args, n_draws=2, seed=1, n_jobs=1),
+        rtol=1e-12,
+    )
+
+
+def test_band_drops_draws_without_estimate():
+    draws = np.array(
+        [
+            [1.0, 1.0, np.inf],
+            [2.0, np.inf, np.nan],
+            [3.0, 3.0, -np.inf],
+        ],
+    )
+    band = _percentile_band(draws, "PESR", 1980, "All", level=0.5)
+    np.testing.assert_array_equal(band["dropped"], [0, 1, 3])
+    np.testing.assert_allclose(band["lower"], [1.5, 1.5, np.nan])
+    np.testing.assert_allclose(band["upper"], [2.5, 2.5, np.nan])
+
+
+def test_bands_in_figures(households):
+    bands = bootstrap_bands(households, n_draws=20)
+    assert (bands["lower"] <= bands["upper"]).all()
+    assert (bands["dropped"] < 20).all()
+    assert set(bands["figure"]) == {
+        "A3",
+        "PESR",
+        "A3_regional",
+        "PESR_regional",
+        "A7",
+        "PESR_twochild",
+    }
+    figures = Session(households).figures(bands)
+    assert len(figures["A3"].data) == 2
+    assert len(figures["A3_regional"].data) == 4
+    assert len(figures["A7"].data) == 2
+    assert len(figures["A3_control"].data) == 1
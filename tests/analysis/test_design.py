@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.design import design_matrix, expand_formula, factor_columns
+from epp_final.analysis.predict import (
+    TRIPLE_DID_TERMS,
+    gen_plot_data3,
+    year_data_split3,
+)
+from epp_final.data_management.schema import DTYPES
+
+
+@pytest.fixture()
+def data():
+    rng = np.random.default_rng(0)
+    n_obs = 2000
+    data = pd.DataFrame(
+        {
+            "CN1990A_SEX": rng.integers(0, 2, size=n_obs),
+            "CN1990A_NATION": rng.integers(0, 2, size=n_obs),
+            "CN1990A_HHTYA": rng.integers(0, 2, size=n_obs),
+            "CN1990A_BIRTHY": rng.integers(980, 991, size=n_obs),
+            "X": rng.integers(0, 2, size=n_obs),
+        },
+    )
+    return data.astype({name: DTYPES.get(name, "int8") for name in data})
+
+
+def test_expand_formula():
+    assert TRIPLE_DID_TERMS == ["H", "T", "K", "H*T", "H*K", "T*K", "H*T*K"]
+    terms = expand_formula("H*T*K*X")
+    assert len(terms) == 15
+    assert terms[-1] == "H*T*K*X"
+    assert factor_columns(terms) == [
+        "CN1990A_NATION",
+        "Treat",
+        "CN1990A_HHTYA",
+        "X",
+    ]
+
+
+def test_design_matrix_builds_interactions(data):
+    data = data.assign(Treat=(data["CN1990A_BIRTHY"] > 984).astype("int8"))
+    X = design_matrix(data, expand_formula("H*T*K*X"))
+    assert X.shape == (2000, 15)
+    assert X.dtype == "int8"
+    expected = data["CN1990A_NATION"] * data["Treat"] * data["CN1990A_HHTYA"]
+    np.testing.assert_array_equal(X[:, 10], expected)
+    np.testing.assert_array_equal(X[:, 14], expected * data["X"])
+
+
+def test_stored_interactions_give_the_same_fits(data):
+    data["Treat"] = (data["CN1990A_BIRTHY"] > 984).astype("int8")
+    stored = data.assign(
+        **{
+            "H*T": data["CN1990A_NATION"] * data["Treat"],
+            "H*K": data["CN1990A_NATION"] * data["CN1990A_HHTYA"],
+            "T*K": data["Treat"] * data["CN1990A_HHTYA"],
+            "H*T*K": data["CN1990A_NATION"] * data["Treat"] * data["CN1990A_HHTYA"],
+        },
+    )
+    lazy = gen_plot_data3(year_data_split3(data))
+    for year, coef in gen_plot_data3(year_data_split3(stored)).items():
+        np.testing.assert_allclose(lazy[year], coef)
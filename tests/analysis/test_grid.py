@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.grid import SPEC_GRID, run_grid, spec_grid
+from epp_final.analysis.predict import (
+    control_variables,
+    event_study,
+    gen_plot_data_control,
+    rural_urban_dataframe,
+    year_data_split,
+)
+from epp_final.final.plot import figure_data
+from epp_final.session import Session
+
+
+@pytest.fixture()
+def session(households):
+    return Session(households)
+
+
+def test_control_specification_equals_window_regressions(session):
+    results = session.results(["one_child_control"])
+    year_data = year_data_split(session.sample2)
+    controls = control_variables(session.sample2)
+    pd.testing.assert_frame_equal(
+        figure_data(results, "one_child_control", "a3"),
+        gen_plot_data_control(year_data, controls),
+    )
+    regional = rural_urban_dataframe(year_data, controls)
+    for frame, coefficient in zip(regional, ["a3", "PESR"], strict=True):
+        pd.testing.assert_frame_equal(
+            figure_data(results, "one_child_control", coefficient, regional=True),
+            frame,
+            rtol=1e-9,
+        )
+
+
+@pytest.mark.parametrize(
+    ("covariates", "region", "code"),
+    [("none", "All", None), ("hukou", "Rural", 1)],
+)
+def test_event_study_equals_joint_regression(session, covariates, region, code):
+    grid = spec_grid([covariates], [region], ["1975-1979"], ["event_study"])
+    results = run_grid(session.sample2, grid)
+    estimates = results.pivot(
+        index="birth_year",
+        columns="coefficient",
+        values="estimate",
+    )
+    expected, _ = event_study(
+        session.sample2,
+        range(980, 991),
+        range(975, 980),
+        region=code,
+    )
+    columns = ["a0", "a1", "a2", "a3", "PESR"]
+    np.testing.assert_allclose(estimates[columns], expected[columns], atol=1e-10)
+
+
+def test_spec_grid_is_cross_product():
+    grid = spec_grid(["none", "education"], windows=["1973-1979"])
+    assert grid.shape[0] == 2 * 3 * 2
+    assert "event_study/education/1973-1979" in set(grid["specification"])
+    assert not SPEC_GRID.duplicated(["specification", "region"]).any()
+    with pytest.raises(ValueError, match="Unknown window"):
+        spec_grid(windows=["1970-1979"])
+    with pytest.raises(ValueError, match="more than once"):
+        run_grid(pd.DataFrame(), pd.concat([grid, grid]))
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from epp_final.analysis.design import expand_formula
+from epp_final.analysis.permutation import (
+    _permute,
+    permutation_coefficients,
+    randomization_inference,
+)
+from epp_final.analysis.predict import _window_ols, data_processing, year_data_split
+from epp_final.data_management.households import HouseholdIndex
+
+X_VARIABLES = expand_formula("H*T")
+
+
+@pytest.fixture()
+def children(households):
+    return data_processing(households.copy())
+
+
+def _fit(children):
+    return _window_ols(year_data_split(children), X_VARIABLES, range(980, 991))
+
+
+def _status_vectors(status, offsets):
+    return sorted(
+        tuple(status[a:b]) for a, b in zip(offsets[:-1], offsets[1:], strict=True)
+    )
+
+
+def test_permutations_equal_fits_on_permuted_households(children):
+    index = HouseholdIndex.from_serial(children["SERIAL"])
+    status = children["CN1990A_NATION"].to_numpy(dtype=float)[index.order]
+    # Some households have members of different ethnicity.
+    mixed = np.maximum.reduceat(status, index.offsets[:-1]) != np.minimum.reduceat(
+        status,
+        index.offsets[:-1],
+    )
+    assert mixed.any()
+    observed, permuted = permutation_coefficients(
+        children,
+        X_VARIABLES,
+        range(980, 991),
+        range(973, 980),
+        n_permutations=3,
+        seed=4,
+    )
+    np.testing.assert_allclose(observed, _fit(children), atol=1e-12)
+    seeds = np.random.SeedSequence(4).spawn(3)
+    for r, permuted_status in enumerate(_permute(status, index.offsets, seeds)):
+        assert _status_vectors(permuted_status, index.offsets) == _status_vectors(
+            status,
+            index.offsets,
+        )
+        nation = np.empty_like(status)
+        nation[index.order] = permuted_status
+        expected = _fit(children.assign(CN1990A_NATION=nation))
+        np.testing.assert_allclose(permuted[r], expected, atol=1e-12)
+
+
+def test_permutations_do_not_depend_on_n_jobs(children):
+    args = (children, X_VARIABLES, range(980, 991), range(973, 980), 10, 2)
+    _, permuted = permutation_coefficients(*args)
+    _, permuted_parallel = permutation_coefficients(*args, n_jobs=2)
+    np.testing.assert_allclose(permuted_parallel, permuted, atol=1e-12)
+
+
+def test_randomization_inference(households):
+    summary, distribution = randomization_inference(households, 19, seed=1)
+    assert summary.groupby("effect").size().to_dict() == {
+        "H*K*T": 6,
+        "OneChildInteract": 11,
+    }
+    assert summary["p_value"].between(1 / 20, 1).all()
+    assert distribution.shape == (19 * 17, 4)
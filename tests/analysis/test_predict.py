@@ -1,9 +1,16 @@
 """Tests for the prediction model."""
+import numpy as np
 import pandas as pd
 import pytest
 from epp_final.analysis.predict import (
     _PESR,
+    _PESR3,
+    _PESR3_gradient,
+    _PESR_gradient,
+    _window_ols,
     data_processing,
+    delta_method_se,
+    event_study,
     gen_plot_data,
     gen_plot_data_control,
     rural_urban_dataframe,
@@ -20,6 +27,23 @@ def data():
     return out
 
 
+@pytest.fixture()
+def children():
+    rng = np.random.default_rng(0)
+    n_obs = 3000
+    data = pd.DataFrame(
+        {
+            "CN1990A_SEX": rng.integers(0, 2, size=n_obs),
+            "CN1990A_NATION": rng.choice([0, 1], size=n_obs, p=[0.2, 0.8]),
+            "CN1990A_HHTYA": rng.integers(0, 2, size=n_obs),
+            "CN1990A_BIRTHY": rng.integers(973, 991, size=n_obs),
+        },
+    )
+    data["Treat"] = (data["CN1990A_BIRTHY"] > 979).astype("int")
+    data["OneChildInteract"] = data["Treat"] * data["CN1990A_NATION"]
+    return data
+
+
 def test_year_data_split(data):
     data_p = data_processing(data["data1990"])
     year_data = year_data_split(data_p)
@@ -57,3 +81,101 @@ def test_only_with_control(data):
     X_variables_c = data["sample2"].columns[[2, 8, 9, 11, 12, 13, 15, 16, 17, 3]]
     dfa3_control = gen_plot_data_control(year_data, X_variables_c)
     assert dfa3_control.shape[0] == 11
+
+
+def test_year_windows_equal_copied_windows(children):
+    year_data = year_data_split(children)
+    compare = children["CN1990A_BIRTHY"].between(973, 979)
+    assert list(year_data) == [f"Birth{i}" for i in range(980, 991)]
+    for i in range(980, 991):
+        pd.testing.assert_frame_equal(
+            year_data[f"Birth{i}"],
+            children[(children["CN1990A_BIRTHY"] == i) | compare],
+        )
+        assert np.shares_memory(
+            year_data.block(i)["CN1990A_SEX"].to_numpy(),
+            year_data.data["CN1990A_SEX"].to_numpy(),
+        )
+
+
+def test_window_ols_equals_separate_fits(children):
+    year_data = year_data_split(children)
+    X_variables = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+    coef = _window_ols(year_data, X_variables, range(980, 991))
+    for i, coef_i in zip(range(980, 991), coef, strict=True):
+        workdf = year_data[f"Birth{i}"]
+        X = np.column_stack([np.ones(workdf.shape[0]), workdf[X_variables]])
+        expected = np.linalg.lstsq(X, workdf["CN1990A_SEX"], rcond=None)[0]
+        np.testing.assert_allclose(coef_i, expected)
+
+
+def test_window_ols_collinear_region_dummy(children):
+    year_data = year_data_split(children)
+    X_variables = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+    coef = _window_ols(year_data, X_variables, range(980, 991), region=1)
+    coef_collinear = _window_ols(
+        year_data,
+        [*X_variables, "CN1990A_HHTYA"],
+        range(980, 991),
+        region=1,
+    )
+    np.testing.assert_allclose(coef_collinear[:, :4], coef)
+    np.testing.assert_allclose(coef_collinear[:, 4], 0, atol=1e-12)
+
+
+def test_frequency_weights_equal_individual_data(children):
+    cube = children.groupby(list(children.columns)).size().reset_index(name="count")
+    coef = gen_plot_data(year_data_split(children))
+    coef_cube = gen_plot_data(year_data_split(cube), weights="count")
+    for i in range(980, 991):
+        np.testing.assert_allclose(coef_cube[f"{i}"], coef[f"{i}"])
+
+
+def test_event_study_equals_window_fits(children):
+    estimates, _ = event_study(children, range(980, 991), range(973, 980))
+    X_variables = ["CN1990A_NATION", "Treat", "OneChildInteract"]
+    coef = _window_ols(year_data_split(children), X_variables, range(980, 991))
+    np.testing.assert_allclose(estimates[["a0", "a1", "a2", "a3"]], coef)
+    np.testing.assert_allclose(estimates["PESR"], _PESR(*coef.T))
+
+
+def test_event_study_robust_covariance(children):
+    estimates, cov = event_study(children, range(980, 991), range(973, 980))
+    birth = children["CN1990A_BIRTHY"].to_numpy()[:, None]
+    han = children["CN1990A_NATION"].to_numpy()[:, None]
+    dummies = birth == np.arange(980, 991)
+    X = np.column_stack([np.ones_like(han), han, dummies, han * dummies])
+    y = children["CN1990A_SEX"].to_numpy()
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    bread = np.linalg.inv(X.T @ X)
+    meat = (X * ((y - X @ beta) ** 2)[:, None]).T @ X
+    n, k = X.shape
+    np.testing.assert_allclose(cov, bread @ meat @ bread * n / (n - k))
+    np.testing.assert_allclose(estimates["se_a3"], np.sqrt(np.diag(cov))[-11:])
+    cube = children.groupby(list(children.columns)).size().reset_index(name="count")
+    _, cov_cube = event_study(cube, range(980, 991), range(973, 980), "count")
+    pd.testing.assert_frame_equal(cov_cube, cov)
+
+
+@pytest.mark.parametrize(
+    ("func", "gradient", "k"),
+    [(_PESR, _PESR_gradient, 4), (_PESR3, _PESR3_gradient, 8)],
+)
+def test_PESR_gradient(func, gradient, k):
+    coef = np.random.default_rng(1).uniform(-0.05, 0.05, size=(20, k))
+    coef[:, 0] += 0.5
+    h = 1e-6
+    numerical = [
+        (func(*(coef + h * e).T) - func(*(coef - h * e).T)) / (2 * h) for e in np.eye(k)
+    ]
+    np.testing.assert_allclose(gradient(*coef.T), np.transpose(numerical), rtol=1e-6)
+
+
+def test_event_study_pesr_se(children):
+    estimates, cov = event_study(children, range(980, 991), range(973, 980))
+    row = estimates.loc[985]
+    names = ["const", "Han", "Birth985", "Han*Birth985"]
+    grad = _PESR_gradient(*row[["a0", "a1", "a2", "a3"]])
+    expected = delta_method_se(grad, cov.loc[names, names].to_numpy())
+    np.testing.assert_allclose(row["se_PESR"], expected)
+    assert expected == pytest.approx(np.sqrt(grad @ cov.loc[names, names] @ grad))
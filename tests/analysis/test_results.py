@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.predict import (
+    control_variables,
+    gen_plot_data_control,
+    year_data_split,
+)
+from epp_final.analysis.results import read_results, write_results
+from epp_final.final.plot import figure_data
+from epp_final.session import Session
+
+
+@pytest.fixture()
+def session(households):
+    return Session(households)
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_store_round_trip(session, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    parts = ["one_child", "one_child_regional", "event_study", "two_child"]
+    paths = []
+    for part in parts:
+        paths.append(tmp_path / f"{part}.{suffix}")
+        write_results(session.results([part]), paths[-1])
+    pd.testing.assert_frame_equal(read_results(paths), session.results(parts))
+    selection = read_results(
+        paths,
+        specifications=["one_child"],
+        coefficients=["PESR"],
+        regions=["Rural"],
+        columns=["birth_year", "estimate"],
+    )
+    expected = session.regional[1].query("region == 'Rural'")
+    np.testing.assert_array_equal(selection["birth_year"], expected["x"])
+    np.testing.assert_allclose(selection["estimate"], expected["y"])
+
+
+def test_write_rejects_duplicates(session, tmp_path):
+    results = session.results(["one_child"])
+    with pytest.raises(ValueError, match="more than once"):
+        write_results(pd.concat([results, results.head(1)]), tmp_path / "part.csv")
+
+
+def test_results_equal_estimates(session):
+    results = session.results()
+    for i in range(980, 991):
+        coef = results.query(
+            "specification == 'one_child' and region == 'All' and "
+            f"birth_year == {i + 1000}",
+        )
+        np.testing.assert_allclose(
+            coef.set_index("coefficient").loc[["a0", "a1", "a2", "a3", "PESR"]][
+                "estimate"
+            ],
+            session.coef1990[f"{i}"],
+        )
+    pd.testing.assert_frame_equal(
+        figure_data(results, "one_child_control", "a3"),
+        gen_plot_data_control(
+            year_data_split(session.sample2),
+            control_variables(session.sample2),
+        ),
+    )
+    event_study = results[results["specification"] == "event_study"]
+    se = event_study.set_index(["coefficient", "birth_year"])["se"]
+    np.testing.assert_allclose(
+        se.loc["a3"],
+        session.event_study[0]["se_a3"],
+    )
+    assert se.loc["a0"].isna().all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture()
+def households():
+    rng = np.random.default_rng(2)
+    n_households = 1500
+    rows = []
+    for serial in range(1, n_households + 1):
+        birth_head = rng.integers(935, 968)
+        members = [(1, rng.choice([1, 2], p=[0.9, 0.1]), birth_head)]
+        if rng.random() < 0.9:
+            members.append((2, 0, birth_head + rng.integers(-3, 5)))
+        members += [(3, 0, rng.integers(960, 991)) for _ in range(rng.integers(0, 4))]
+        if rng.random() < 0.2:
+            members.append((rng.integers(4, 9), 0, rng.integers(920, 990)))
+        for pern, (relate, sex, birth) in enumerate(members, start=1):
+            if relate == 1:
+                sex = members[0][1]
+            elif relate == 2:
+                sex = 3 - members[0][1]
+            else:
+                sex = rng.choice([1, 2])
+            rows.append(
+                [
+                    serial,
+                    sex,
+                    rng.choice([1, 1, 1, 5, 30]),
+                    rng.choice([1, 2, 9], p=[0.7, 0.28, 0.02]),
+                    birth,
+                    relate,
+                    rng.choice(8, p=[0.05, 0.2, 0.3, 0.25, 0.1, 0.05, 0.03, 0.02]),
+                    pern,
+                ],
+            )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "SERIAL",
+            "CN1990A_SEX",
+            "CN1990A_NATION",
+            "CN1990A_HHTYA",
+            "CN1990A_BIRTHY",
+            "CN1990A_RELATE",
+            "CN1990A_EDLEV1",
+            "CN1990A_PERN",
+        ],
+    )
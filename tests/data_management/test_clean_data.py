@@ -2,8 +2,21 @@ import numpy as np
 import pandas as pd
 import pytest
 from epp_final.analysis.predict import data_processing
-from epp_final.config import TEST_DIR
-from epp_final.data_management import clean_data_with_control
+from epp_final.config import SRC, TEST_DIR
+from epp_final.data_management import (
+    clean_count_cube,
+    clean_data_with_control,
+    clean_fig1_data,
+    clean_fig2_data,
+    clean_raw_data,
+    clean_raw_data_chunked,
+)
+from epp_final.data_management.clean_data import (
+    clean_census_data_chunked,
+    clean_data_3did,
+)
+from epp_final.data_management.schema import DTYPES
+from epp_final.utilities import read_data, read_yaml, set_dtypes
 
 
 @pytest.fixture()
@@ -11,6 +24,36 @@ def data():
     return pd.read_csv(TEST_DIR / "data_management" / "data1990_raw_test.csv")
 
 
+@pytest.fixture()
+def data_info():
+    return read_yaml(SRC / "data_management" / "data_info1990.yaml")
+
+
+@pytest.fixture()
+def raw_data(data_info):
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame(
+        rng.integers(1, 10, size=(50, len(data_info["variable1990"]))),
+        columns=data_info["variable1990"],
+    )
+    raw.insert(0, "YEAR", rng.choice([1990, 2000], size=50))
+    for name in data_info["variable1990"][1:]:
+        raw[name.replace("1990", "2000")] = rng.integers(1, 10, size=50)
+    return raw
+
+
+@pytest.fixture()
+def births():
+    rng = np.random.default_rng(1)
+    return pd.DataFrame(
+        {
+            "CN1990A_BIRTHY": rng.integers(945, 991, size=5000),
+            "CN1990A_SEX": rng.choice([1, 2], size=5000),
+            "CN1990A_NATION": rng.choice([1, 1, 1, 5, 30], size=5000),
+        },
+    )
+
+
 def test_only_child_left(data):
     working_data = clean_data_with_control(data)
     assert sum(working_data["CN1990A_RELATE"] != 3) == 0
@@ -52,3 +95,195 @@ def test_treatment(data):
     after_1979 = sum(data_p["CN1990A_BIRTHY"] > 979)
     treated = sum(data_p["Treat"])
     assert after_1979 == treated
+
+
+def test_chunked_equals_eager(raw_data, data_info, tmp_path):
+    raw_data.to_csv(tmp_path / "raw.csv", index=False)
+    n_rows = clean_raw_data_chunked(
+        tmp_path / "raw.csv",
+        data_info,
+        tmp_path / "data1990.csv",
+        chunksize=7,
+    )
+    expected = clean_raw_data(raw_data, data_info).reset_index(drop=True)
+    assert n_rows == expected.shape[0]
+    pd.testing.assert_frame_equal(
+        read_data(tmp_path / "data1990.csv", dtypes=DTYPES),
+        expected,
+    )
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_census_years_in_one_pass(raw_data, data_info, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    raw_data.to_csv(tmp_path / "raw.csv", index=False)
+    data_infos = [
+        data_info,
+        read_yaml(SRC / "data_management" / "data_info2000.yaml"),
+    ]
+    produces = {
+        info["year"]: tmp_path / f"data{info['year']}_raw.{suffix}"
+        for info in data_infos
+    }
+    n_rows = clean_census_data_chunked(
+        tmp_path / "raw.csv",
+        data_infos,
+        produces,
+        chunksize=7,
+    )
+    for info in data_infos:
+        expected = clean_raw_data(raw_data, info).reset_index(drop=True)
+        assert n_rows[info["year"]] == expected.shape[0]
+        pd.testing.assert_frame_equal(
+            read_data(produces[info["year"]], dtypes=info["dtypes"]),
+            expected,
+        )
+    assert n_rows[1990] + n_rows[2000] == raw_data.shape[0]
+
+
+def test_census_years_check_header(raw_data, data_info, tmp_path):
+    raw_data.drop(columns="CN2000A_PERN").to_csv(tmp_path / "raw.csv", index=False)
+    data_infos = [
+        data_info,
+        read_yaml(SRC / "data_management" / "data_info2000.yaml"),
+    ]
+    with pytest.raises(ValueError, match=r"\['CN2000A_PERN'\].*data_info2000"):
+        clean_census_data_chunked(
+            tmp_path / "raw.csv",
+            data_infos,
+            {1990: tmp_path / "data1990.csv", 2000: tmp_path / "data2000.csv"},
+        )
+    assert not (tmp_path / "data1990.csv").exists()
+
+
+def test_compact_dtypes(raw_data, data_info):
+    data1990 = clean_raw_data(raw_data, data_info)
+    wide = data1990.astype("int64").memory_usage().sum()
+    assert wide > 3 * data1990.memory_usage().sum()
+    assert (data_processing(data1990.copy()).dtypes == "int8").sum() == 7
+    assert data1990["CN1990A_PERN"].dtype == "int16"
+    sample2 = clean_data_with_control(data1990)
+    assert sample2["CN1990A_EDLEV1"].dtype == "category"
+    assert sample2["Treat"].dtype == DTYPES["Treat"]
+
+
+def test_dtypes_out_of_range(raw_data):
+    raw_data.loc[0, "CN1990A_BIRTHY"] = 2**15
+    with pytest.raises(ValueError, match="CN1990A_BIRTHY"):
+        set_dtypes(raw_data, DTYPES)
+
+
+def test_fig1_sex_ratio(births):
+    fig1 = clean_fig1_data(births)
+    cohort = births[births["CN1990A_BIRTHY"] == 980]
+    ratio = sum(cohort["CN1990A_SEX"] == 1) / sum(cohort["CN1990A_SEX"] == 2)
+    assert fig1.shape == (46, 2)
+    assert fig1.loc[1980, "CN1990A_SEX"] == ratio
+
+
+def test_fig2_sex_ratio(births):
+    fig2 = clean_fig2_data(births)
+    cohort = births[births["CN1990A_BIRTHY"] == 980]
+    minority = cohort[cohort["CN1990A_NATION"] != 1]
+    ratio = sum(minority["CN1990A_SEX"] == 1) / sum(minority["CN1990A_SEX"] == 2)
+    assert fig2.shape == (46, 3)
+    assert fig2.loc[fig2["Year"] == 1980, "Minorities"].item() == ratio
+
+
+def test_count_cube_figures(households):
+    cube = clean_count_cube(households)
+    assert cube["count"].sum() == households.shape[0]
+    pd.testing.assert_frame_equal(
+        clean_fig1_data(cube, weights="count"),
+        clean_fig1_data(households),
+    )
+    pd.testing.assert_frame_equal(
+        clean_fig2_data(cube, weights="count"),
+        clean_fig2_data(households),
+    )
+
+
+def _clean_data_with_control_reference(data1990_no2000):
+    """Former implementation of clean_data_with_control, kept as reference."""
+    data1990_no2000["CN1990A_SEX"].replace({2: 0}, inplace=True)
+    data1990_no2000["CN1990A_NATION"].replace(list(range(2, 100)), 0, inplace=True)
+    data1990_no2000["CN1990A_HHTYA"].replace([2, 9], 0, inplace=True)
+    data1990_no2000["Treat"] = np.zeros(data1990_no2000.shape[0], dtype="int")
+    data1990_no2000.loc[data1990_no2000["CN1990A_BIRTHY"] > 979, "Treat"] = 1
+    data1990_no2000["OneChildInteract"] = (
+        data1990_no2000["Treat"] * data1990_no2000["CN1990A_NATION"]
+    )
+    data1990_no2000.drop(
+        data1990_no2000[data1990_no2000["CN1990A_RELATE"] > 3].index,
+        inplace=True,
+    )
+    data1990_no2000.reset_index(drop=True, inplace=True)
+    sample2_data = data1990_no2000.copy()
+    NIU_edu = sample2_data[sample2_data["CN1990A_RELATE"] != 3]["CN1990A_EDLEV1"] == 0
+    drop_index = sample2_data[sample2_data["CN1990A_RELATE"] != 3].loc[NIU_edu, :].index
+    sample2_data.drop(drop_index, inplace=True)
+    data1990_group = sample2_data.groupby(["SERIAL"])
+    wl = np.array(list(data1990_group.groups.values()), dtype=object)
+    get_len = np.vectorize(len)
+    wl_drop = wl[get_len(wl) < 3]
+    wlf = [j for i in wl_drop for j in i]
+    sample2_true = sample2_data.drop(wlf)
+    sample2_true.reset_index(drop=True, inplace=True)
+    sample2_true["CN1990A_EDLEV1"].replace([4, 5, 6, 7], 4, inplace=True)
+    sample2_true["CN1990A_EDLEV1"].replace(
+        {1: "Illiterate", 2: "Primary", 3: "Junior", 4: "High"},
+        inplace=True,
+    )
+    HHH = sample2_true["CN1990A_RELATE"] == 1
+    HHS = sample2_true["CN1990A_RELATE"] == 2
+    HHC = sample2_true["CN1990A_RELATE"] == 3
+    HHM = sample2_true["CN1990A_SEX"] == 1
+    HHF = sample2_true["CN1990A_SEX"] == 0
+    sample_father = sample2_true[HHH * HHM + HHS * HHM].copy()
+    sample_mother = sample2_true[HHH * HHF + HHS * HHF].copy()
+    sample_mother.drop(
+        sample_mother[sample_mother["CN1990A_BIRTHY"] < 952].index,
+        inplace=True,
+    )
+    sample_child = sample2_true[HHC].copy()
+    sample_father_d = pd.get_dummies(sample_father, columns=["CN1990A_EDLEV1"])
+    sample_mother_d = pd.get_dummies(sample_mother, columns=["CN1990A_EDLEV1"])
+    edu = sample_father_d.iloc[:, [0, 9, 10, 11, 12]].columns
+    sample_parents_d = sample_father_d[edu].merge(
+        sample_mother_d[edu],
+        how="inner",
+        on="SERIAL",
+        suffixes=("_father", "_mother"),
+    )
+    working_data = sample_child.merge(sample_parents_d, how="inner", on="SERIAL")
+    working_data.drop(
+        working_data[working_data["CN1990A_BIRTHY"] < 973].index,
+        inplace=True,
+    )
+    return working_data
+
+
+def test_sample2_equals_reference(households):
+    expected = _clean_data_with_control_reference(households.copy())
+    working_data = clean_data_with_control(households)
+    edu = {"CN1990A_EDLEV1": str}
+    pd.testing.assert_frame_equal(
+        working_data.astype(edu),
+        expected.reset_index(drop=True).astype({**working_data.dtypes, **edu}),
+    )
+
+
+def test_sample2_leaves_input_unchanged(households):
+    before = households.copy()
+    clean_data_with_control(households)
+    pd.testing.assert_frame_equal(households, before)
+
+
+def test_3did_leaves_input_unchanged(households):
+    before = households.copy()
+    triple_did = clean_data_3did(households)
+    pd.testing.assert_frame_equal(households, before)
+    assert (triple_did["CN1990A_BIRTHY"] >= 980).all()
+    assert set(triple_did["CN1990A_HHTYA"]) <= {0, 1}
+    assert (triple_did["Treat"] == (triple_did["CN1990A_BIRTHY"] > 984)).all()
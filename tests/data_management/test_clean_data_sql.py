@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+from epp_final.config import SRC
+from epp_final.data_management import (
+    clean_count_cube,
+    clean_data_with_control,
+    clean_fig1_data,
+    clean_fig2_data,
+    clean_raw_data,
+)
+from epp_final.data_management.clean_data_sql import (
+    clean_census_data_sql,
+    clean_count_cube_sql,
+    clean_data_with_control_sql,
+    clean_fig1_data_sql,
+    clean_fig2_data_sql,
+    clean_raw_data_sql,
+)
+from epp_final.data_management.schema import DTYPES, SAMPLE2_DTYPES
+from epp_final.data_management.synthetic import synthetic_census
+from epp_final.utilities import read_data, read_yaml, set_dtypes, write_data
+
+pytest.importorskip("duckdb")
+
+
+@pytest.fixture()
+def data_info():
+    return read_yaml(SRC / "data_management" / "data_info1990.yaml")
+
+
+@pytest.fixture()
+def census(households):
+    return set_dtypes(households, DTYPES)
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def data1990(request, census, tmp_path):
+    path = tmp_path / f"data1990_raw.{request.param}"
+    write_data(census, path)
+    return path
+
+
+def _assert_same_file(produced, expected, tmp_path, dtypes=DTYPES):
+    path = tmp_path / f"expected{produced.suffix}"
+    write_data(expected, path)
+    if produced.suffix == ".csv":
+        assert produced.read_bytes() == path.read_bytes()
+    pd.testing.assert_frame_equal(
+        read_data(produced, dtypes=dtypes),
+        read_data(path, dtypes=dtypes),
+        check_categorical=False,
+    )
+
+
+def test_raw_data(data_info, tmp_path):
+    raw = tmp_path / "raw_data.csv"
+    write_data(synthetic_census(2000, seed=5), raw)
+    produces = tmp_path / "data1990_raw.csv"
+    clean_raw_data_sql(raw, data_info, produces)
+    _assert_same_file(produces, clean_raw_data(read_data(raw), data_info), tmp_path)
+
+
+def test_paths_with_quotes(census, tmp_path):
+    directory = tmp_path / "o'brien"
+    directory.mkdir()
+    path = directory / "data1990_raw.csv"
+    write_data(census, path)
+    produces = directory / "count_cube.csv"
+    clean_count_cube_sql(path, produces)
+    _assert_same_file(produces, clean_count_cube(census), tmp_path)
+
+
+def test_census_data(data_info, tmp_path):
+    raw = tmp_path / "raw_data.csv"
+    write_data(synthetic_census(2000, seed=5), raw)
+    data_infos = [
+        data_info,
+        read_yaml(SRC / "data_management" / "data_info2000.yaml"),
+    ]
+    produces = {
+        info["year"]: tmp_path / f"data{info['year']}_raw.csv" for info in data_infos
+    }
+    clean_census_data_sql(raw, data_infos, produces)
+    for info in data_infos:
+        _assert_same_file(
+            produces[info["year"]],
+            clean_raw_data(read_data(raw), info),
+            tmp_path,
+            dtypes=info["dtypes"],
+        )
+
+
+def test_count_cube(data1990, census, tmp_path):
+    produces = data1990.with_name(f"count_cube{data1990.suffix}")
+    clean_count_cube_sql(data1990, produces)
+    _assert_same_file(produces, clean_count_cube(census), tmp_path)
+
+
+def test_sample2(data1990, census, tmp_path):
+    produces = data1990.with_name(f"Sample2{data1990.suffix}")
+    clean_data_with_control_sql(data1990, produces)
+    _assert_same_file(
+        produces,
+        clean_data_with_control(census),
+        tmp_path,
+        SAMPLE2_DTYPES,
+    )
+
+
+def test_figure_data(data1990, households):
+    cube = data1990.with_name(f"count_cube{data1990.suffix}")
+    clean_count_cube_sql(data1990, cube)
+    pd.testing.assert_frame_equal(
+        clean_fig1_data_sql(cube),
+        clean_fig1_data(households),
+    )
+    pd.testing.assert_frame_equal(
+        clean_fig2_data_sql(cube),
+        clean_fig2_data(households),
+    )
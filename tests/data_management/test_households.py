@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.data_management.households import HouseholdIndex, link_members
+
+
+@pytest.fixture()
+def members():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "SERIAL": rng.choice([3, 7, 8, 12, 20], size=60),
+            "kind": rng.choice(["father", "mother", "child"], size=60),
+        },
+    )
+
+
+def test_index_matches_groupby(members):
+    index = HouseholdIndex.from_serial(members["SERIAL"])
+    groups = members.groupby("SERIAL")
+    np.testing.assert_array_equal(index.serial, list(groups.groups))
+    np.testing.assert_array_equal(index.sizes, groups.size())
+    np.testing.assert_array_equal(
+        index.household,
+        pd.factorize(members["SERIAL"], sort=True)[0],
+    )
+    np.testing.assert_array_equal(
+        index.first(members["kind"]),
+        groups["kind"].first(),
+    )
+    np.testing.assert_array_equal(
+        index.count(members["kind"] == "child"),
+        groups["kind"].agg(lambda kind: (kind == "child").sum()),
+    )
+
+
+def test_save_and_load(members, tmp_path):
+    index = HouseholdIndex.from_serial(members["SERIAL"])
+    index.save(tmp_path / "households.npz")
+    loaded = HouseholdIndex.load(tmp_path / "households.npz")
+    for name in ["order", "offsets", "serial"]:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(index, name))
+
+
+def test_subset_equals_index_of_subset(members):
+    keep = (members["kind"] != "child").to_numpy()
+    subset = HouseholdIndex.from_serial(members["SERIAL"]).subset(keep)
+    expected = HouseholdIndex.from_serial(members.loc[keep, "SERIAL"])
+    for name in ["order", "offsets", "serial"]:
+        np.testing.assert_array_equal(getattr(subset, name), getattr(expected, name))
+
+
+def test_links_equal_merge(members):
+    members = members.sort_values("SERIAL", kind="stable", ignore_index=True)
+    members = members.reset_index(names="row")
+    index = HouseholdIndex.from_serial(members["SERIAL"])
+    children = np.flatnonzero(members["kind"] == "child")
+    pairs, fathers = link_members(index, children, members["kind"] == "father")
+    expected = members[members["kind"] == "child"].merge(
+        members[members["kind"] == "father"],
+        on="SERIAL",
+    )
+    np.testing.assert_array_equal(children[pairs], expected["row_x"])
+    np.testing.assert_array_equal(fathers, expected["row_y"])
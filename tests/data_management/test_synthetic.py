@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from epp_final.config import SRC
+from epp_final.data_management import clean_raw_data
+from epp_final.data_management.synthetic import (
+    PERSONS_PER_HOUSEHOLD,
+    synthetic_census,
+    synthetic_census_chunks,
+    write_synthetic_census,
+)
+from epp_final.utilities import read_data, read_yaml
+
+
+@pytest.fixture()
+def census():
+    return synthetic_census(5000, seed=3)
+
+
+def test_same_seed_same_data(census):
+    pd.testing.assert_frame_equal(synthetic_census(5000, seed=3), census)
+    assert not synthetic_census(5000, seed=4).equals(census)
+
+
+def test_household_structure(census):
+    households = census.groupby("SERIAL")
+    assert census["SERIAL"].is_monotonic_increasing
+    assert (households["CN1990A_RELATE"].first() == 1).all()
+    assert (census["CN1990A_RELATE"] == 1).sum() == 5000
+    assert (households["CN1990A_PERN"].diff().dropna() == 1).all()
+    assert (households[["YEAR", "CN1990A_NATION"]].nunique() == 1).all().all()
+    assert census["CN1990A_BIRTHY"].between(915, 990).all()
+    assert census["CN1990A_SEX"].isin([1, 2]).all()
+
+
+def test_shares(census):
+    children = census[census["CN1990A_RELATE"] == 3]
+    assert 0.5 < (children["CN1990A_SEX"] == 1).mean() < 0.56
+    heads = census[census["CN1990A_RELATE"] == 1]
+    assert 0.88 < (heads["CN1990A_NATION"] == 1).mean() < 0.96
+    assert 0.66 < (heads["CN1990A_HHTYA"] == 1).mean() < 0.74
+    assert census.shape[0] / 5000 == pytest.approx(PERSONS_PER_HOUSEHOLD, rel=0.02)
+
+
+def test_children_are_not_piled_into_the_last_birth_year(census):
+    children = census[census["CN1990A_RELATE"] == 3]
+    births = children["CN1990A_BIRTHY"].value_counts().sort_index()
+    assert births[990] < 1.5 * births.loc[980:989].mean()
+
+
+def test_written_chunks_are_cleaned_like_raw_data(tmp_path):
+    path = tmp_path / "raw_data.csv"
+    n_rows = write_synthetic_census(path, 2500, seed=1, chunksize=1000)
+    chunks = pd.concat(synthetic_census_chunks(2500, seed=1, chunksize=1000))
+    assert n_rows == chunks.shape[0]
+    assert chunks["SERIAL"].nunique() == 2500
+    data_info = read_yaml(SRC / "data_management" / "data_info1990.yaml")
+    data1990 = clean_raw_data(read_data(path), data_info)
+    assert list(data1990.columns) == data_info["variable1990"]
+    dtypes = {name: data_info["dtypes"][name] for name in data1990.columns}
+    assert data1990.dtypes.to_dict() == dtypes
@@ -0,0 +1,29 @@
+import json
+
+import plotly.graph_objects as go
+import pytest
+from epp_final.final.export import export_figures
+
+
+@pytest.fixture()
+def figures():
+    return {
+        name: go.Figure(go.Scatter(x=[1, 2, 3], y=[3, 1, 2]), {"title": name})
+        for name in ["A3", "PESR"]
+    }
+
+
+def test_export_html(figures, tmp_path):
+    produces = {name: tmp_path / f"{name}.html" for name in figures}
+    timings = export_figures(figures, produces, report=tmp_path / "times.json")
+    assert list(timings) == ["A3", "PESR"]
+    assert json.loads((tmp_path / "times.json").read_text()) == timings
+    assert all("plotly" in path.read_text() for path in produces.values())
+
+
+def test_export_images(figures, tmp_path):
+    pytest.importorskip("kaleido")
+    produces = {"A3": tmp_path / "A3.png", "PESR": tmp_path / "PESR.svg"}
+    export_figures(figures, produces)
+    assert produces["A3"].read_bytes().startswith(b"\x89PNG")
+    assert b"<svg" in produces["PESR"].read_bytes()
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.bootstrap import bootstrap_bands
+from epp_final.analysis.predict import (
+    YearWindows,
+    data_processing,
+    gen_plot_data,
+    year_data_split,
+)
+from epp_final.cache import _project_types, _source, cache_key, cached
+from epp_final.session import Session
+
+
+@pytest.fixture()
+def calls():
+    return []
+
+
+@pytest.fixture()
+def counted(calls):
+    def counted(data, scale=1):
+        calls.append(scale)
+        return data * scale
+
+    return counted
+
+
+def test_hit_skips_call(counted, calls, tmp_path):
+    data = pd.DataFrame({"a": [1, 2, 3]})
+    func = cached(counted, tmp_path)
+    pd.testing.assert_frame_equal(func(data, scale=2), data * 2)
+    pd.testing.assert_frame_equal(func(data.copy(), scale=2), data * 2)
+    assert calls == [2]
+    func(data, scale=3)
+    func(data.assign(a=[1, 2, 4]), scale=3)
+    assert calls == [2, 3, 3]
+
+
+def test_key_is_computed_before_mutation(households, tmp_path):
+    func = cached(data_processing, tmp_path)
+    data = households.copy()
+    processed = func(data)
+    assert cache_key(data_processing, (households,), {}) != cache_key(
+        data_processing,
+        (data,),
+        {},
+    )
+    pd.testing.assert_frame_equal(func(households.copy()), processed)
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+
+def test_source_includes_called_functions():
+    source = _source(gen_plot_data)
+    assert "def event_study" in source
+    assert "def _solve_ols" in source
+    assert "def _event_cells" in source
+
+
+def test_source_includes_classes_of_arguments(households):
+    year_data = year_data_split(data_processing(households.copy()))
+    assert _project_types(((year_data,), {"weights": "count"})) == [YearWindows]
+    source = _source(YearWindows)
+    assert "def block" in source
+    assert "def comparison" in source
+
+
+def test_key_of_year_windows_follows_their_data(households):
+    children = data_processing(households.copy())
+    keys = [
+        cache_key(gen_plot_data, (year_data_split(data),), {})
+        for data in [children, children.copy(), children.iloc[1:]]
+    ]
+    assert keys[0] == keys[1]
+    assert keys[0] != keys[2]
+
+
+def test_ignored_arguments_are_not_in_key(households):
+    keys = [
+        cache_key(bootstrap_bands, (households, 9), {"n_jobs": n_jobs}, ["n_jobs"])
+        for n_jobs in [1, 4]
+    ]
+    assert keys[0] == keys[1]
+    assert keys[0] == cache_key(bootstrap_bands, (households, 9, 0, 2), {}, ["n_jobs"])
+    assert cache_key(bootstrap_bands, (households, 9), {"n_jobs": 4}) != keys[0]
+
+
+def test_least_recently_used_results_are_evicted(counted, calls, tmp_path):
+    data = np.zeros(1000)
+    func = cached(counted, tmp_path, max_size=20_000)
+    func(data, 0)
+    func(data, 1)
+    func(data, 0)
+    func(data, 2)
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+    func(data, 0)
+    func(data, 1)
+    assert calls == [0, 1, 2, 1]
+
+
+def test_session_with_cache(households, tmp_path):
+    year_data = year_data_split(data_processing(households.copy()))
+    expected = gen_plot_data(year_data)
+    for _ in range(2):
+        session = Session(households, cache=tmp_path)
+        coef = session.coef1990
+        for i in range(980, 991):
+            np.testing.assert_allclose(coef[f"{i}"], expected[f"{i}"])
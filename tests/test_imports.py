@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+BASELINE_MODULES = ["numpy", "pandas", "pytask", "yaml"]
+TASK_MODULES = [
+    "epp_final.data_management.task_data_management",
+    "epp_final.analysis.task_analysis",
+    "epp_final.final.task_final",
+]
+# Import time the task modules may add, relative to the one of their common
+# dependencies measured in the same process.
+IMPORT_BUDGET = 0.25
+
+
+def _import(modules):
+    """Import modules one after another in a fresh process.
+
+    Args:
+        modules (list): names of the modules.
+
+    Returns:
+        tuple: cumulative import time in microseconds of every module imported at
+            the top level, and the top-level packages in sys.modules afterwards.
+
+    """
+    code = "; ".join(
+        [
+            *(f"import {module}" for module in modules),
+            "import sys",
+            "print(*{name.partition('.')[0] for name in sys.modules})",
+        ],
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times, set(result.stdout.split())
+
+
+def test_tasks_defer_heavy_dependencies():
+    _, imported = _import(TASK_MODULES)
+    assert "epp_final" in imported
+    assert not imported & {"plotly", "statsmodels", "sklearn", "duckdb", "kaleido"}
+
+
+def test_task_import_budget():
+    times, _ = _import([*BASELINE_MODULES, *TASK_MODULES])
+    baseline = sum(times.get(name, 0) for name in BASELINE_MODULES)
+    added = {name: time for name, time in times.items() if name in TASK_MODULES}
+    assert sum(added.values()) < IMPORT_BUDGET * baseline, added
@@ -0,0 +1,92 @@
+import contextlib
+import json
+import pstats
+from types import SimpleNamespace
+
+import networkx as nx
+import pandas as pd
+import pluggy
+import pytask
+import pytest
+from _pytask import hookspecs
+from epp_final import profiling
+from epp_final.config import SRC
+
+
+class Executor:
+    """Run the tasks of a session in order and ignore their errors like pytask."""
+
+    def __init__(self, pm, tasks):
+        self.pm = pm
+        self.tasks = tasks
+
+    @pytask.hookimpl
+    def pytask_execute_build(self, session):
+        for task in self.tasks:
+            with contextlib.suppress(ValueError):
+                self.pm.hook.pytask_execute_task(session=session, task=task)
+        return True
+
+    @pytask.hookimpl
+    def pytask_execute_task(self, session, task):  # noqa: ARG002
+        task.function()
+        return True
+
+
+@pytest.fixture()
+def report(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profile")
+    monkeypatch.setattr(profiling, "PROFILE_TASKS", 1)
+    data = tmp_path / "data.csv"
+    pd.DataFrame({"a": range(10)}).to_csv(data, index=False)
+    produced = tmp_path / "produced.csv"
+
+    def write():
+        pd.read_csv(data).head(4).to_csv(produced, index=False)
+
+    def fail():
+        raise ValueError
+
+    dag = nx.DiGraph()
+    dag.add_node("data", node=SimpleNamespace(path=data))
+    dag.add_node("produced", node=SimpleNamespace(path=produced))
+    dag.add_edges_from([("data", "task_write"), ("task_write", "produced")])
+    dag.add_node("task_fail")
+    tasks = [
+        SimpleNamespace(
+            name=name,
+            base_name=name,
+            path=SRC / "analysis" / "task_test.py",
+            function=function,
+        )
+        for name, function in [("task_write", write), ("task_fail", fail)]
+    ]
+
+    pm = pluggy.PluginManager("pytask")
+    pm.add_hookspecs(hookspecs)
+    pm.register(Executor(pm, tasks))
+    pm.register(profiling)
+    for _ in range(2):
+        pm.hook.pytask_execute_build(session=SimpleNamespace(dag=dag))
+    return json.loads((tmp_path / "profile" / "report.json").read_text())
+
+
+def test_report(report, tmp_path):
+    tasks = {record["task"]: record for record in report["tasks"]}
+    write = tasks["analysis/task_test.py::task_write"]
+    assert write["succeeded"]
+    assert write["rows_in"] == {"data.csv": 10}
+    assert write["rows_out"] == {"produced.csv": 4}
+    assert write["wall_time"] > 0
+    assert write["peak_rss"] > 0
+    assert not tasks["analysis/task_test.py::task_fail"]["succeeded"]
+    history = (tmp_path / "profile" / "history.jsonl").read_text().splitlines()
+    assert len(history) == 2
+
+
+def test_call_profile_of_slowest_task(report, tmp_path):
+    slowest, other = report["tasks"]
+    assert slowest["wall_time"] >= other["wall_time"]
+    assert "profile" not in other
+    stats = pstats.Stats(str(tmp_path / "profile" / slowest["profile"]))
+    assert stats.total_calls > 0
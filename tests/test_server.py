@@ -0,0 +1,69 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+from epp_final.analysis.predict import (
+    control_variables,
+    rural_urban_dataframe,
+    year_data_split,
+)
+from epp_final.server import EffectStatistics, make_server
+from epp_final.session import Session
+
+
+@pytest.fixture()
+def session(households):
+    return Session(households)
+
+
+@pytest.fixture()
+def statistics(session):
+    return EffectStatistics(session.count_cube, session.sample2)
+
+
+def test_queries_equal_regressions(session, statistics):
+    estimates = statistics.query()["estimates"]
+    expected = [session.coef1990[f"{i}"] for i in range(980, 991)]
+    np.testing.assert_allclose(estimates.iloc[:, 1:], expected, atol=1e-10)
+    estimates = statistics.query(model="triple_did")["estimates"]
+    expected = [session.coef_triple_did[f"{i}"] for i in range(985, 991)]
+    np.testing.assert_allclose(estimates.iloc[:, 1:], expected, atol=1e-10)
+    dfa3_regional, _ = rural_urban_dataframe(
+        year_data_split(session.sample2),
+        control_variables(session.sample2),
+    )
+    estimates = statistics.query(region="urban", controls="education")["estimates"]
+    np.testing.assert_allclose(
+        estimates["a3"],
+        dfa3_regional.query("region == 'Urban'")["y"],
+        atol=1e-10,
+    )
+
+
+def test_subgroups_drop_constant_terms(statistics):
+    result = statistics.query(model="triple_did", nation="han", years=range(985, 986))
+    assert result["terms"] == ["const", "T", "K", "T*K"]
+    assert "PESR" not in result["estimates"]
+    with pytest.raises(ValueError, match="disjoint"):
+        statistics.query(compare=range(975, 981))
+
+
+def test_http_queries(statistics):
+    server = make_server(statistics, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/effects"
+    try:
+        with urllib.request.urlopen(f"{url}?region=rural&years=1985") as response:
+            body = json.loads(response.read())
+        expected = statistics.query(region="rural", years=range(985, 986))
+        assert body["estimates"] == expected["estimates"].to_dict("records")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}?model=ols")
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from epp_final.analysis.predict import (
+    data_processing,
+    gen_plot_data,
+    gen_plot_data_control,
+    year_data_split,
+)
+from epp_final.data_management import clean_count_cube, clean_data_with_control
+from epp_final.final.plot import figure_data
+from epp_final.session import Session
+
+
+@pytest.fixture()
+def session(households):
+    return Session(households)
+
+
+def test_results_match_functions(session, households):
+    year_data = year_data_split(data_processing(households.copy()))
+    expected = gen_plot_data(year_data)
+    for i in range(980, 991):
+        np.testing.assert_allclose(session.coef1990[f"{i}"], expected[f"{i}"])
+    sample2 = clean_data_with_control(households)
+    X_variables_c = sample2.columns[[2, 8, 9, 11, 12, 13, 15, 16, 17, 3]]
+    pd.testing.assert_frame_equal(
+        figure_data(session.results(), "one_child_control", "a3"),
+        gen_plot_data_control(year_data_split(sample2), X_variables_c),
+    )
+
+
+def test_session_from_intermediate_data(session, households):
+    from_intermediate = Session(
+        count_cube=clean_count_cube(households),
+        sample2=clean_data_with_control(households),
+    )
+    pd.testing.assert_frame_equal(from_intermediate.results(), session.results())
+
+
+def test_figures(session):
+    figures = session.figures()
+    assert "fig_app" not in figures
+    assert len(figures) == 11
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from epp_final.utilities import count_rows, read_data, write_data, write_data_chunks
+
+
+@pytest.fixture()
+def data():
+    return pd.DataFrame(
+        {
+            "CN1990A_BIRTHY": [972, 973, 980, 985, 990],
+            "CN1990A_RELATE": [3, 1, 3, 3, 2],
+            "CN1990A_EDLEV1": [0, "High", "Junior", 0, "Primary"],
+        },
+    )
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_read_data_projection_and_filters(data, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"data.{suffix}"
+    write_data(data, path)
+    out = read_data(
+        path,
+        columns=["CN1990A_BIRTHY"],
+        filters=[("CN1990A_BIRTHY", ">=", 973), ("CN1990A_RELATE", "==", 3)],
+    )
+    expected = pd.DataFrame({"CN1990A_BIRTHY": [980, 985]})
+    pd.testing.assert_frame_equal(out, expected)
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_read_data_checks_ranges_of_dtypes(data, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"data.{suffix}"
+    write_data(data.assign(CN1990A_RELATE=[3, 1, 300, 3, 2]), path)
+    with pytest.raises(ValueError, match="CN1990A_RELATE"):
+        read_data(path, dtypes={"CN1990A_RELATE": "int8"})
+
+
+def test_parquet_round_trip_matches_csv(data, tmp_path):
+    pytest.importorskip("pyarrow")
+    write_data(data, tmp_path / "data.csv")
+    write_data(data, tmp_path / "data.parquet")
+    pd.testing.assert_frame_equal(
+        read_data(tmp_path / "data.parquet"),
+        read_data(tmp_path / "data.csv"),
+    )
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_write_data_chunks(data, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    write_data(data, tmp_path / f"whole.{suffix}")
+    chunks = (data.iloc[i : i + 2] for i in range(0, 5, 2))
+    assert write_data_chunks(chunks, tmp_path / f"chunks.{suffix}") == 5
+    pd.testing.assert_frame_equal(
+        read_data(tmp_path / f"chunks.{suffix}"),
+        read_data(tmp_path / f"whole.{suffix}"),
+    )
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_count_rows(data, suffix, tmp_path):
+    if suffix == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"data.{suffix}"
+    write_data(data, path)
+    assert count_rows(path) == 5
+    if suffix == "csv":
+        path.write_bytes(path.read_bytes().rstrip(b"\n"))
+        assert count_rows(path) == 5